@@ -0,0 +1,184 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import aiomysql
+import pymysql
+
+import metrics
+from dbpool import PoolTimeoutError
+from sqlclient import (
+    DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME,
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_MAX_AGE,
+    REVOKE_REFRESH_TOKENS_SQL,
+)
+
+# Expired tokens can no longer be used or replayed, so each login and
+# rotation drops its user's; this keeps the table to the tokens issued within
+# REFRESH_TOKEN_EXPIRE_DAYS without a cleanup job.
+PURGE_EXPIRED_REFRESH_TOKENS_SQL = "DELETE FROM refresh_tokens WHERE user_id = %s AND expires_at <= UTC_TIMESTAMP()"
+
+_pool = None
+_pool_lock = None
+
+async def get_async_pool():
+    """Return the event loop's aiomysql pool, creating it on first use."""
+    global _pool, _pool_lock
+    if _pool is None:
+        if _pool_lock is None:
+            _pool_lock = asyncio.Lock()
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await aiomysql.create_pool(
+                    host=DB_HOST,
+                    port=DB_PORT,
+                    user=DB_USER,
+                    password=DB_PASSWORD,
+                    db=DB_NAME,
+                    minsize=DB_POOL_MIN_SIZE,
+                    maxsize=DB_POOL_MAX_SIZE,
+                    pool_recycle=DB_POOL_MAX_AGE,
+                    autocommit=True,
+                    cursorclass=aiomysql.DictCursor,
+                )
+    return _pool
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        pool.close()
+        await pool.wait_closed()
+
+async def _acquire(pool):
+    started = time.perf_counter()
+    try:
+        db = await asyncio.wait_for(pool.acquire(), DB_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.DB_POOL_TIMEOUTS.inc("async")
+        raise PoolTimeoutError(2013, f"Timed out after {DB_POOL_TIMEOUT:.1f}s waiting for a database connection")
+    metrics.DB_POOL_ACQUIRE_SECONDS.observe(time.perf_counter() - started, "async")
+    return db
+
+async def _run(cursor, query: str, params=None, fetch: str = None):
+    """Awaitable counterpart of `sqlclient._run`."""
+    started = time.perf_counter()
+    try:
+        rows_affected = await cursor.execute(query, params)
+        if fetch == 'one':
+            result = await cursor.fetchone()
+        elif fetch == 'all':
+            result = await cursor.fetchall()
+        else:
+            result = None
+    except pymysql.Error as e:
+        metrics.observe_query(query, time.perf_counter() - started, error=e)
+        raise
+    metrics.observe_query(query, time.perf_counter() - started, metrics.row_count(result, fetch, rows_affected))
+    return result, rows_affected
+
+
+class AsyncUnitOfWork:
+    """Awaitable counterpart of `sqlclient.UnitOfWork`."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    async def execute(self, query: str, params=None, fetch: str = None):
+        """Run one statement and return `(result, rows_affected)`."""
+        return await _run(self.cursor, query, params, fetch)
+
+
+class AsyncSqlClient:
+    """Awaitable database access for the `async def` auth endpoints.
+
+    Only the user lookup and refresh token methods those endpoints need live
+    here; everything else goes through `SqlClient` on the thread pool. Methods
+    return the same `(value, error)` pairs as their `SqlClient` counterparts.
+    """
+
+    async def _execute_query(self, query: str, params: tuple = None, fetch: str = None):
+        """Common function to execute SQL queries."""
+        try:
+            pool = await get_async_pool()
+            db = await _acquire(pool)
+            try:
+                async with db.cursor() as cursor:
+                    result, rows_affected = await _run(cursor, query, params, fetch)
+                    return result, rows_affected, None
+            finally:
+                pool.release(db)
+        except pymysql.Error as e:
+            return None, 0, e
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Run several statements on one pooled connection and commit them together."""
+        pool = await get_async_pool()
+        db = await _acquire(pool)
+        try:
+            async with db.cursor() as cursor:
+                started = time.perf_counter()
+                await db.begin()
+                unit = AsyncUnitOfWork(cursor)
+                try:
+                    yield unit
+                    await db.commit()
+                except BaseException:
+                    await db.rollback()
+                    metrics.observe_transaction("rollback", time.perf_counter() - started)
+                    raise
+                metrics.observe_transaction("commit", time.perf_counter() - started)
+        finally:
+            pool.release(db)
+
+    async def get_user_by_email(self, email: str):
+        sql = "SELECT * FROM users WHERE email = %s"
+        user, _, error = await self._execute_query(sql, (email,), fetch='one')
+        return user, error
+
+    async def store_refresh_token(self, user_id: str, token_hash: str, expires_at: datetime):
+        sql = "INSERT INTO refresh_tokens (id, user_id, token_hash, expires_at) VALUES (%s, %s, %s, %s)"
+        try:
+            async with self.transaction() as tx:
+                await tx.execute(PURGE_EXPIRED_REFRESH_TOKENS_SQL, (user_id,))
+                await tx.execute(sql, (os.urandom(16).hex(), user_id, token_hash, expires_at))
+        except pymysql.Error as e:
+            return False, str(e)
+        return True, None
+
+    async def rotate_refresh_token(self, token_hash: str, new_token_hash: str, expires_at: datetime):
+        """Exchange a live refresh token for a new one and return `(user, error)`.
+
+        A token that was already rotated or revoked coming back means it has
+        leaked, so every refresh token of its user is revoked.
+        """
+        try:
+            async with self.transaction() as tx:
+                current, _ = await tx.execute(
+                    "SELECT id, user_id, expires_at, revoked_at FROM refresh_tokens WHERE token_hash = %s FOR UPDATE",
+                    (token_hash,), fetch='one',
+                )
+                if current is None:
+                    return None, "Invalid refresh token"
+                if current['revoked_at'] is not None:
+                    await tx.execute(REVOKE_REFRESH_TOKENS_SQL, (current['user_id'],))
+                    return None, "Refresh token has been revoked"
+                await tx.execute(PURGE_EXPIRED_REFRESH_TOKENS_SQL, (current['user_id'],))
+                if current['expires_at'] <= datetime.utcnow():
+                    return None, "Refresh token has expired"
+                new_id = os.urandom(16).hex()
+                await tx.execute(
+                    "INSERT INTO refresh_tokens (id, user_id, token_hash, expires_at) VALUES (%s, %s, %s, %s)",
+                    (new_id, current['user_id'], new_token_hash, expires_at),
+                )
+                await tx.execute(
+                    "UPDATE refresh_tokens SET revoked_at = UTC_TIMESTAMP(), replaced_by = %s WHERE id = %s",
+                    (new_id, current['id']),
+                )
+                user, _ = await tx.execute("SELECT * FROM users WHERE id = %s", (current['user_id'],), fetch='one')
+        except pymysql.Error as e:
+            return None, str(e)
+        return user, None
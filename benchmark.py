@@ -0,0 +1,474 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import pymysql
+import requests
+
+from generate_data import generate, partner_email, partner_id, show_id
+from upload_data import execute_sql_from_file, load_dump
+
+# --- Configuration ---
+# The stand-in database is a throwaway MySQL 8 server: reused when one is
+# already listening on BENCH_DB_HOST:BENCH_DB_PORT, otherwise started in Docker.
+BENCH_DB_HOST = os.environ.get("BENCH_DB_HOST", "127.0.0.1")
+BENCH_DB_PORT = int(os.environ.get("BENCH_DB_PORT", "3307"))
+BENCH_DB_USER = os.environ.get("BENCH_DB_USER", "root")
+BENCH_DB_PASSWORD = os.environ.get("BENCH_DB_PASSWORD", "rootpassword")
+BENCH_DB_NAME = os.environ.get("BENCH_DB_NAME", "evergreen_bench")
+BENCH_DB_IMAGE = os.environ.get("BENCH_DB_IMAGE", "mysql:8.0")
+BENCH_DB_CONTAINER = os.environ.get("BENCH_DB_CONTAINER", "evergreen-bench-db")
+BENCH_DB_STARTUP_TIMEOUT = float(os.environ.get("BENCH_DB_STARTUP_TIMEOUT", "120"))
+BENCH_APP_PORT = int(os.environ.get("BENCH_APP_PORT", "8077"))
+BENCH_RESULTS_DIR = os.environ.get("BENCH_RESULTS_DIR", "bench_results")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DUMP_FILE = os.path.join(HERE, "Dump20250719.sql")
+MIGRATION_FILES = sorted(glob.glob(os.path.join(HERE, "migrations", "*.sql")))
+
+# Created by the dump; every seeded partner shares one password.
+ADMIN_EMAIL = "admin@evergreen.com"
+ADMIN_PASSWORD = "adminpassword"
+PARTNER_PASSWORD = "benchpassword"
+
+_TITLE_WORDS = (
+    "History", "Crime", "Money", "Story", "Night", "Radio", "Sports", "Music", "Parent", "Ghost",
+    "Business", "Health", "Science", "Film", "Nation", "Report", "Hour", "Talk", "Wild", "Grit",
+)
+
+
+# --- Stand-in database ---
+
+def _connect(database=None):
+    return pymysql.connect(
+        host=BENCH_DB_HOST,
+        port=BENCH_DB_PORT,
+        user=BENCH_DB_USER,
+        password=BENCH_DB_PASSWORD,
+        database=database,
+        charset="utf8mb4",
+        autocommit=True,
+        cursorclass=pymysql.cursors.DictCursor,
+    )
+
+
+def _database_up() -> bool:
+    try:
+        _connect().close()
+        return True
+    except pymysql.Error:
+        return False
+
+
+def start_database() -> bool:
+    """Make sure a stand-in server is reachable; returns True if this call started a container."""
+    if _database_up():
+        return False
+    print(f"Starting {BENCH_DB_IMAGE} as '{BENCH_DB_CONTAINER}' on port {BENCH_DB_PORT}...")
+    subprocess.run(
+        ["docker", "run", "--detach", "--rm", "--name", BENCH_DB_CONTAINER,
+         "-e", f"MYSQL_ROOT_PASSWORD={BENCH_DB_PASSWORD}", "-p", f"{BENCH_DB_PORT}:3306",
+         BENCH_DB_IMAGE, "--default-authentication-plugin=mysql_native_password"],
+        check=True, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + BENCH_DB_STARTUP_TIMEOUT
+    while not _database_up():
+        if time.monotonic() > deadline:
+            stop_database()
+            raise RuntimeError(f"Stand-in database did not accept connections within {BENCH_DB_STARTUP_TIMEOUT:.0f}s")
+        time.sleep(1)
+    return True
+
+
+def stop_database():
+    subprocess.run(["docker", "stop", BENCH_DB_CONTAINER], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def load_schema():
+    """Recreate the benchmark database from the dump and every migration."""
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{BENCH_DB_NAME}`")
+            cursor.execute(f"CREATE DATABASE `{BENCH_DB_NAME}` CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci")
+    finally:
+        conn.close()
+    summary = load_dump(DUMP_FILE, connect=lambda: _connect(BENCH_DB_NAME), report=lambda message: None)
+    failed = {table: stats["error"] for table, stats in summary["tables"].items() if "error" in stats}
+    if failed:
+        raise RuntimeError(f"Loading the dump failed: {failed}")
+    conn = _connect(BENCH_DB_NAME)
+    try:
+        with conn.cursor() as cursor:
+            for path in MIGRATION_FILES:
+                execute_sql_from_file(cursor, path)
+    finally:
+        conn.close()
+
+
+def seed(shows: int, partners: int, shows_per_partner: int, seed_value: int) -> dict:
+    """Generate seeded shows, partners and associations; returns ids the workloads use."""
+    db = {"host": BENCH_DB_HOST, "port": BENCH_DB_PORT, "user": BENCH_DB_USER,
+          "password": BENCH_DB_PASSWORD, "database": BENCH_DB_NAME}
+    generate(db=db, shows=shows, partners=partners, shows_per_partner=shows_per_partner, ledger_rows=0,
+             seed=seed_value, password=PARTNER_PASSWORD, report=lambda message: None)
+    return {
+        "show_ids": [show_id(seed_value, i) for i in range(shows)],
+        "partners": [{"id": partner_id(seed_value, i), "email": partner_email(i)} for i in range(partners)],
+    }
+
+
+# --- Application under test ---
+
+def start_app(workers: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DB_HOST=BENCH_DB_HOST,
+        DB_PORT=str(BENCH_DB_PORT),
+        DB_USER=BENCH_DB_USER,
+        DB_PASSWORD=BENCH_DB_PASSWORD,
+        DB_NAME=BENCH_DB_NAME,
+    )
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(BENCH_APP_PORT),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=HERE, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            if requests.get(f"{_base_url()}/openapi.json", timeout=1).ok:
+                return app
+        except requests.ConnectionError:
+            pass
+        if app.poll() is not None or time.monotonic() > deadline:
+            stop_app(app)
+            raise RuntimeError("The app did not start; see its output above")
+        time.sleep(0.2)
+
+
+def stop_app(app: subprocess.Popen):
+    app.terminate()
+    try:
+        app.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        app.kill()
+
+
+def _base_url() -> str:
+    return f"http://127.0.0.1:{BENCH_APP_PORT}"
+
+
+def _login(session: requests.Session, email: str, password: str) -> str:
+    response = session.post(f"{_base_url()}/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+# --- Workloads ---
+# Each takes (session, fixture, rng) and issues exactly one request.
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _partner(fixture: dict, rng: random.Random) -> dict:
+    return rng.choice(fixture["partners"])
+
+
+def wl_login(session, fixture, rng):
+    partner = _partner(fixture, rng)
+    return session.post(f"{_base_url()}/login", data={"username": partner["email"], "password": PARTNER_PASSWORD})
+
+
+def wl_users_me(session, fixture, rng):
+    return session.get(f"{_base_url()}/users/me", headers=_auth(_partner(fixture, rng)["token"]))
+
+
+def wl_podcast_get(session, fixture, rng):
+    show_id = rng.choice(fixture["show_ids"])
+    return session.get(f"{_base_url()}/podcasts/{show_id}", headers=_auth(fixture["admin_token"]))
+
+
+_FILTERS = {
+    "media_type": ("video", "audio", "both"),
+    "relationship_level": ("strong", "medium", "weak"),
+    "show_type": ("Branded", "Original", "Partner"),
+    "tentpole": ("true", "false"),
+}
+
+
+def wl_podcasts_filter(session, fixture, rng):
+    field = rng.choice(list(_FILTERS))
+    params = {"limit": 50, field: rng.choice(_FILTERS[field])}
+    return session.get(f"{_base_url()}/podcasts/filter", params=params, headers=_auth(fixture["admin_token"]))
+
+
+def wl_partner_podcasts(session, fixture, rng):
+    return session.get(f"{_base_url()}/partners/me/podcasts", headers=_auth(_partner(fixture, rng)["token"]))
+
+
+def wl_partner_podcasts_admin(session, fixture, rng):
+    partner_id = _partner(fixture, rng)["id"]
+    return session.get(f"{_base_url()}/partners/{partner_id}/podcasts", headers=_auth(fixture["admin_token"]))
+
+
+def wl_podcast_update(session, fixture, rng):
+    show_id = rng.choice(fixture["show_ids"])
+    body = {"latest_cpm_usd": round(rng.uniform(5, 40), 2), "tentpole": rng.random() < 0.2}
+    return session.put(f"{_base_url()}/podcasts/{show_id}", json=body, headers=_auth(fixture["admin_token"]))
+
+
+def wl_podcast_create(session, fixture, rng):
+    body = {
+        "title": f"Bench {rng.choice(_TITLE_WORDS)} {rng.getrandbits(32):08x}",
+        "media_type": rng.choice(("video", "audio", "both")),
+        "show_type": rng.choice(("Branded", "Original", "Partner")),
+        "relationship_level": rng.choice(("strong", "medium", "weak")),
+    }
+    return session.post(f"{_base_url()}/podcasts", json=body, headers=_auth(fixture["admin_token"]))
+
+
+WORKLOADS = {
+    "login": wl_login,
+    "users_me": wl_users_me,
+    "podcast_get": wl_podcast_get,
+    "podcasts_filter": wl_podcasts_filter,
+    "partner_podcasts": wl_partner_podcasts,
+    "partner_podcasts_admin": wl_partner_podcasts_admin,
+    "podcast_update": wl_podcast_update,
+    "podcast_create": wl_podcast_create,
+}
+
+
+# --- Measurement ---
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(len(sorted_values) * pct / 100 + 0.999999))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list, statuses: dict, seconds: float) -> dict:
+    latencies = sorted(latencies)
+    errors = sum(count for code, count in statuses.items() if not 200 <= int(code) < 400)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(latencies) / seconds, 1) if seconds else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        },
+    }
+
+
+def run_workload(workload, fixture: dict, concurrency: int, duration: float, warmup: float, seed_value: int) -> dict:
+    """Drive `workload` from `concurrency` threads for `duration` seconds after a warm-up."""
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    start_at = time.monotonic() + warmup
+    stop_at = start_at + duration
+
+    def worker(index):
+        rng = random.Random(seed_value * 1000 + index)
+        mine, codes = [], {}
+        with requests.Session() as session:
+            while True:
+                began = time.monotonic()
+                if began >= stop_at:
+                    break
+                try:
+                    status = workload(session, fixture, rng).status_code
+                except requests.RequestException:
+                    status = 599  # transport failure, counted as an error
+                finished = time.monotonic()
+                if began >= start_at and finished <= stop_at:
+                    mine.append(round((finished - began) * 1000, 3))
+                    codes[status] = codes.get(status, 0) + 1
+        with lock:
+            latencies.extend(mine)
+            for code, count in codes.items():
+                statuses[code] = statuses.get(code, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, statuses, duration)
+
+
+def _git_commit() -> dict:
+    def git(*args):
+        result = subprocess.run(["git", *args], cwd=HERE, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else None
+    return {"sha": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def save_results(results: dict) -> str:
+    os.makedirs(BENCH_RESULTS_DIR, exist_ok=True)
+    sha = (results["meta"]["commit"]["sha"] or "nogit")[:10]
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = os.path.join(BENCH_RESULTS_DIR, f"{stamp}-{sha}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def print_summary(results: dict):
+    print(f"{'workload':<24}{'req':>8}{'err':>6}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, stats in results["workloads"].items():
+        latency = stats["latency_ms"]
+        print(f"{name:<24}{stats['requests']:>8}{stats['errors']:>6}{stats['throughput_rps'] or 0:>10.1f}"
+              + "".join(f"{latency[p] if latency[p] is not None else float('nan'):>10.2f}" for p in ("p50", "p95", "p99")))
+
+
+# --- Commands ---
+
+def cmd_run(args) -> int:
+    workloads = args.workloads or list(WORKLOADS)
+    unknown = [name for name in workloads if name not in WORKLOADS]
+    if unknown:
+        print(f"Unknown workloads: {', '.join(unknown)} (choose from {', '.join(WORKLOADS)})", file=sys.stderr)
+        return 2
+
+    started_db = start_database()
+    app = None
+    try:
+        print(f"Loading schema into '{BENCH_DB_NAME}' and seeding {args.shows} shows, {args.partners} partners...")
+        load_schema()
+        fixture = seed(args.shows, args.partners, args.shows_per_partner, args.seed)
+        app = start_app(args.app_workers)
+
+        with requests.Session() as session:
+            fixture["admin_token"] = _login(session, ADMIN_EMAIL, ADMIN_PASSWORD)
+            # Token-authenticated workloads rotate over a fixed set of logged-in partners.
+            fixture["partners"] = fixture["partners"][:max(args.concurrency, 1) * 4]
+            for partner in fixture["partners"]:
+                partner["token"] = _login(session, partner["email"], PARTNER_PASSWORD)
+
+        results = {
+            "meta": {
+                "commit": _git_commit(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "shows": args.shows,
+                "partners": args.partners,
+                "shows_per_partner": args.shows_per_partner,
+                "seed": args.seed,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "warmup": args.warmup,
+                "app_workers": args.app_workers,
+            },
+            "workloads": {},
+        }
+        for name in workloads:
+            print(f"Running {name}...")
+            results["workloads"][name] = run_workload(
+                WORKLOADS[name], fixture, args.concurrency, args.duration, args.warmup, args.seed,
+            )
+    finally:
+        if app is not None:
+            stop_app(app)
+        if started_db and not args.keep_db:
+            stop_database()
+
+    print_summary(results)
+    print(f"Saved {save_results(results)}")
+    # Failed requests are usually much faster than real ones, so a run with
+    # errors does not measure what it claims to.
+    failed = {name: {code: count for code, count in stats["statuses"].items() if not 200 <= int(code) < 400}
+              for name, stats in results["workloads"].items() if stats["errors"]}
+    if failed:
+        for name, statuses in failed.items():
+            print(f"{name} had errors: {', '.join(f'{count} x {code}' for code, count in statuses.items())}",
+                  file=sys.stderr)
+        return 1
+    return 0
+
+
+def _change(before, after) -> str:
+    if before is None or after is None or before == 0:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def cmd_compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    for label, results in (("baseline", baseline), ("candidate", candidate)):
+        commit = results["meta"]["commit"]
+        print(f"{label}: {(commit['sha'] or 'unknown')[:10]}{' (dirty)' if commit['dirty'] else ''} "
+              f"at concurrency {results['meta']['concurrency']}, {results['meta']['shows']} shows")
+
+    regressions = []
+    print(f"{'workload':<24}{'rps':>18}{'p50':>18}{'p95':>18}{'p99':>18}")
+    for name in baseline["workloads"]:
+        if name not in candidate["workloads"]:
+            continue
+        before, after = baseline["workloads"][name], candidate["workloads"][name]
+        cells = [f"{after['throughput_rps'] or 0:.1f} {_change(before['throughput_rps'], after['throughput_rps'])}"]
+        for p in ("p50", "p95", "p99"):
+            old, new = before["latency_ms"][p], after["latency_ms"][p]
+            cells.append(f"{new if new is not None else float('nan'):.2f} {_change(old, new)}")
+            if args.fail_over is not None and p == "p95" and old and new and (new - old) / old * 100 > args.fail_over:
+                regressions.append(name)
+        print(f"{name:<24}" + "".join(f"{cell:>18}" for cell in cells))
+
+    if regressions:
+        print(f"p95 regressed more than {args.fail_over}% in: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the API against a seeded stand-in MySQL database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="seed the stand-in database, start the app and run workloads")
+    run.add_argument("--shows", type=int, default=5000)
+    run.add_argument("--partners", type=int, default=200)
+    run.add_argument("--shows-per-partner", type=int, default=10, help="average; each partner gets 1 to 2x-1")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--concurrency", type=int, default=16, help="client threads per workload")
+    run.add_argument("--duration", type=float, default=15, help="measured seconds per workload")
+    run.add_argument("--warmup", type=float, default=2, help="unmeasured seconds before each workload")
+    run.add_argument("--app-workers", type=int, default=1, help="uvicorn worker processes")
+    run.add_argument("--workloads", nargs="+", metavar="NAME", help=f"subset of: {', '.join(WORKLOADS)}")
+    run.add_argument("--keep-db", action="store_true", help="leave a container started by this run running")
+
+    compare = commands.add_parser("compare", help="compare two saved result files")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--fail-over", type=float, metavar="PCT",
+                         help="exit 1 if any workload's p95 latency grew by more than PCT percent")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return cmd_run(args)
+    return cmd_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+
+class PoolTimeoutError(pymysql.err.OperationalError):
+    """No connection could be checked out of the pool before the timeout."""
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class _Waiter:
+    __slots__ = ("entry", "ready")
+
+    def __init__(self):
+        self.entry = None
+        self.ready = False
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of pymysql connections.
+
+    Idle connections are pinged before reuse once they have been idle longer
+    than `ping_after` seconds, and are replaced once they are older than
+    `max_age` seconds. Checkouts block for at most `timeout` seconds when all
+    `max_size` connections are in use.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=5.0, max_age=1800.0, ping_after=5.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if not 0 <= min_size <= max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.ping_after = ping_after
+
+        self._idle = deque()
+        self._size = 0  # open connections, including checked-out ones and ones being opened
+        self._waiters = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._created = 0
+        self._recycled = 0
+        self._ping_failures = 0
+        self._discarded = 0
+        self._timeouts = 0
+        self._checkouts = 0
+        self._wait_seconds = 0.0
+
+    def prefill(self):
+        """Open connections until the pool holds at least `min_size`."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._open()
+            except Exception:
+                with self._cond:
+                    self._free_slot()
+                raise
+            self.release(entry)
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            if self._closed:
+                raise pymysql.err.InterfaceError("Connection pool is closed")
+            if self._idle and not self._waiters:
+                # LIFO keeps the most recently used (warmest) connections busy.
+                entry = self._idle.pop()
+            elif self._size < self.max_size:
+                self._size += 1
+                entry = None
+            else:
+                # Queue up so released connections are handed out first come, first served.
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+                while not waiter.ready:
+                    remaining = deadline - time.monotonic()
+                    if self._closed or remaining <= 0:
+                        self._waiters.remove(waiter)
+                        if self._closed:
+                            raise pymysql.err.InterfaceError("Connection pool is closed")
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            2013, f"Timed out after {timeout:.1f}s waiting for a database connection"
+                        )
+                    self._cond.wait(remaining)
+                entry = waiter.entry
+
+        try:
+            entry = self._checkout(entry)
+        except Exception:
+            with self._cond:
+                self._free_slot()
+            raise
+
+        with self._cond:
+            self._checkouts += 1
+            self._wait_seconds += time.monotonic() - started
+        return entry
+
+    def release(self, entry, discard=False):
+        expired = False
+        if not discard:
+            if time.monotonic() - entry.created_at > self.max_age:
+                expired = True
+            else:
+                try:
+                    # Never hand the next caller a half-finished transaction.
+                    if entry.conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                        entry.conn.rollback()
+                except pymysql.Error:
+                    discard = True
+
+        with self._cond:
+            if discard or expired or self._closed:
+                if discard:
+                    self._discarded += 1
+                elif expired:
+                    self._recycled += 1
+                self._free_slot()
+            else:
+                entry.last_used = time.monotonic()
+                if self._waiters:
+                    waiter = self._waiters.popleft()
+                    waiter.entry, waiter.ready = entry, True
+                    self._cond.notify_all()
+                else:
+                    self._idle.append(entry)
+
+        if discard or expired or self._closed:
+            _close_quietly(entry.conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        entry = self.acquire(timeout)
+        discard = False
+        try:
+            yield entry.conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            # The connection itself is suspect; do not return it to the pool.
+            discard = True
+            raise
+        except GeneratorExit:
+            # A streaming caller was abandoned and may have left unread rows behind.
+            discard = True
+            raise
+        finally:
+            self.release(entry, discard=discard)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            _close_quietly(entry.conn)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "waiting": len(self._waiters),
+                "created": self._created,
+                "recycled": self._recycled,
+                "ping_failures": self._ping_failures,
+                "discarded": self._discarded,
+                "timeouts": self._timeouts,
+                "checkouts": self._checkouts,
+                "avg_wait_ms": round(self._wait_seconds / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+            }
+
+    def _free_slot(self):
+        """Give up one connection slot; call with the lock held."""
+        self._size -= 1
+        if self._waiters and not self._closed:
+            # Let the longest waiter open a replacement connection in this slot.
+            self._size += 1
+            waiter = self._waiters.popleft()
+            waiter.entry, waiter.ready = None, True
+        self._cond.notify_all()
+
+    def _open(self):
+        entry = _PooledConnection(self._connect())
+        with self._cond:
+            self._created += 1
+        return entry
+
+    def _checkout(self, entry):
+        """Validate an idle connection (or open a new one) outside the pool lock."""
+        if entry is None:
+            return self._open()
+        now = time.monotonic()
+        if now - entry.created_at > self.max_age:
+            _close_quietly(entry.conn)
+            with self._cond:
+                self._recycled += 1
+            return self._open()
+        if now - entry.last_used > self.ping_after:
+            try:
+                entry.conn.ping(reconnect=False)
+            except pymysql.Error:
+                _close_quietly(entry.conn)
+                with self._cond:
+                    self._ping_failures += 1
+                return self._open()
+        return entry
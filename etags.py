@@ -0,0 +1,43 @@
+import hashlib
+from typing import Optional
+
+from projection import VERSION_COLUMN
+
+
+def _row_token(row: dict) -> str:
+    return f"{row['id']}:{row[VERSION_COLUMN]}"
+
+
+def _quote(digest) -> str:
+    return f'"{digest.hexdigest()}"'
+
+
+def show_etag(row: dict, columns: tuple = None) -> str:
+    """Strong ETag for one show representation, derived from its row version."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_row_token(row).encode())
+    digest.update(repr(columns).encode())
+    return _quote(digest)
+
+
+def shows_etag(rows, columns: tuple = None, next_cursor: str = None) -> str:
+    """Strong ETag for a list of shows.
+
+    Built from every row's id and version plus the projection and paging, so
+    any create, update or delete that touches the result changes it.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(columns).encode())
+    digest.update((next_cursor or "").encode())
+    for row in rows:
+        digest.update(_row_token(row).encode())
+        digest.update(b"|")
+    return _quote(digest)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header value matches `etag`."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
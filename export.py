@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+
+from fastjson import encode_shows, show_dict
+from projection import SHOW_COLUMNS
+
+# Rows serialized per chunk handed to the StreamingResponse.
+EXPORT_CHUNK_ROWS = 500
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+# Rows are coerced with `fastjson` rather than validated into `Show`: raw
+# pymysql rows (JSON columns as text, for one) are not valid model input, and a
+# validation error here would cut off a response whose 200 is already sent.
+
+
+def ndjson_chunks(rows, columns: tuple = None):
+    """Serialize rows as newline-delimited JSON, one Show per line."""
+    lines = []
+    threshold = 1  # flush the first row on its own so the client sees bytes right away
+    for row in rows:
+        lines.append(encode_shows(row, columns))
+        if len(lines) >= threshold:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+            threshold = EXPORT_CHUNK_ROWS
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def csv_chunks(rows, columns: tuple = None):
+    """Serialize rows as CSV with a header row, applying the Show model's coercions."""
+    header = list(columns or SHOW_COLUMNS)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    # Send the header immediately so the client sees bytes right away.
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    count = 0
+    for row in rows:
+        data = show_dict(row, columns)
+        writer.writerow([_csv_value(data.get(name)) for name in header])
+        count += 1
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+SERIALIZERS = {
+    "ndjson": ndjson_chunks,
+    "csv": csv_chunks,
+}
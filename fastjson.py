@@ -0,0 +1,136 @@
+import datetime
+import json
+import re
+import typing
+from enum import Enum
+from functools import lru_cache
+
+from models import Show
+from projection import SHOW_COLUMNS
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+
+def _bool(value):
+    return bool(value)
+
+
+def _float(value):
+    return float(value)
+
+
+def _int(value):
+    return int(value)
+
+
+def _enum(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def _dict(value):
+    # MySQL JSON columns come back from pymysql as text.
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+
+def _date(value):
+    return value if orjson is not None else value.isoformat()
+
+
+def _converter(annotation):
+    """Pick the coercion the Show schema applies to a raw column value of this type."""
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    base = args[0] if args else annotation
+    if base is bool:
+        return _bool
+    if base is float:
+        return _float
+    if base is int:
+        return _int
+    if base is dict:
+        return _dict
+    if base is datetime.date:
+        return _date
+    if isinstance(base, type) and issubclass(base, Enum):
+        return _enum
+    return None
+
+
+# Column name -> (converter or None, default for a missing column).
+_FIELDS = {
+    name: (_converter(field.annotation), field.default)
+    for name, field in Show.model_fields.items()
+}
+
+
+# Columns MySQL stores as JSON, which pymysql hands back as text.
+JSON_COLUMNS = tuple(name for name, (convert, _) in _FIELDS.items() if convert is _dict)
+
+
+def decode_json_columns(rows):
+    """Parse the JSON columns of a raw `shows` row (or list of rows) in place,
+    so it can be validated into `Show`. Returns its argument."""
+    for row in ([rows] if isinstance(rows, dict) else rows or ()):
+        for name in JSON_COLUMNS:
+            value = row.get(name)
+            if value is not None:
+                row[name] = _dict(value)
+    return rows
+
+
+@lru_cache(maxsize=256)
+def _plan(columns: tuple):
+    return tuple((name,) + _FIELDS[name] for name in columns)
+
+
+def _shape(row: dict, plan) -> dict:
+    out = {}
+    for name, convert, default in plan:
+        value = row.get(name, default)
+        if value is not None and convert is not None:
+            value = convert(value)
+        out[name] = value
+    return out
+
+
+# A number orjson wrote with an exponent ("1e16") or as a long fraction
+# ("0.00001"): the stdlib writes those as "1e+16" and "1e-05". It can also
+# match inside a string, which only costs a slower encode.
+_EXPONENT_FLOAT = re.compile(rb"[:,\[]-?\d+(?:\.\d+)?e|[:,\[]-?0\.0000")
+
+
+def _isoformat(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(content) -> bytes:
+    # Byte-for-byte what FastAPI's JSONResponse renders for the model dump.
+    if orjson is not None:
+        encoded = orjson.dumps(content)
+        if not _EXPONENT_FLOAT.search(encoded):
+            return encoded
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                      default=_isoformat).encode("utf-8")
+
+
+def show_dict(row: dict, columns: tuple = None) -> dict:
+    """A raw `shows` row with the coercions and field order of `Show` (or its
+    partial model for `columns`) applied, as a plain dict."""
+    return _shape(row, _plan(columns or SHOW_COLUMNS))
+
+
+def encode_shows(shows, columns: tuple = None) -> bytes:
+    """Serialize raw `shows` rows (or a single row) straight to JSON bytes.
+
+    Applies the same coercions and field order as validating each row into
+    `Show` (or its partial model for `columns`) and dumping it, without
+    building model instances. Columns outside the schema are dropped.
+    """
+    plan = _plan(columns or SHOW_COLUMNS)
+    if isinstance(shows, dict):
+        return _dumps(_shape(shows, plan))
+    return _dumps([_shape(row, plan) for row in shows])
@@ -0,0 +1,386 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from itertools import accumulate
+
+import pymysql
+
+from auth import get_password_hash
+from revenue import rebuild_rollup
+from sqlclient import DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME, UnitOfWork
+
+# --- Configuration ---
+# Worker processes generating and inserting chunks, each on its own connection.
+GEN_WORKERS = int(os.environ.get("GEN_WORKERS", str(os.cpu_count() or 1)))
+# Rows generated, inserted and committed per task.
+GEN_CHUNK_ROWS = int(os.environ.get("GEN_CHUNK_ROWS", "20000"))
+# Every generated partner logs in with this password.
+GEN_PASSWORD = os.environ.get("GEN_PASSWORD", "password")
+
+# Emptied by --truncate; partner users are deleted, admins are kept.
+GENERATED_TABLES = (
+    "show_revenue_rollup", "ledger_transaction", "show_partners", "partners", "demographic",
+    "revenue_split", "shows", "genre", "subnetwork",
+)
+
+_WORDS = (
+    "History", "Crime", "Money", "Story", "Night", "Radio", "Sports", "Music", "Parent", "Ghost",
+    "Business", "Health", "Science", "Film", "Nation", "Report", "Hour", "Talk", "Wild", "Grit",
+    "Mystery", "Faith", "Comedy", "Surf", "Racing", "Career", "Kitchen", "Garden", "Culture", "Tech",
+)
+_FIRST_NAMES = ("Alex", "Jordan", "Sam", "Taylor", "Morgan", "Casey", "Jamie", "Riley", "Avery", "Quinn")
+_LAST_NAMES = ("Carter", "Nguyen", "Patel", "Garcia", "Smith", "Okafor", "Kowalski", "Rossi", "Kim", "Haddad")
+_BRANDS = ("Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Vandelay", "Soylent", "Tyrell")
+_INDUSTRIES = ("Insurance", "Foods", "Motors", "Bank", "Mattress", "Wireless", "Pharma", "Apparel", "Travel", "Software")
+_AGENCIES = ("Oxford Road", "Ad Results Media", "Veritone One", "Audioboom", "Direct", "Programmatic Exchange")
+_AGE_RANGES = ("18-24", "18-34", "25-44", "35-54", "45-64", "55+")
+_EDUCATION = ("High School", "Some College", "Bachelors", "Masters", "Posgraduate")
+_ADVERTISERS = [f"{brand} {industry}" for industry in _INDUSTRIES for brand in _BRANDS]
+# Fixed, so a seed reproduces the same ledger on any day.
+_LEDGER_START = date(2023, 1, 1)
+_LEDGER_DAYS = 3 * 365
+
+
+def make_id(seed: int, kind: str, index: int) -> uuid.UUID:
+    """The id of the `index`-th generated `kind` row, the same in every worker and run."""
+    digest = hashlib.blake2b(f"{seed}:{kind}:{index}".encode(), digest_size=16).digest()
+    return uuid.UUID(bytes=digest, version=4)
+
+
+def show_id(seed: int, index: int) -> str:
+    return str(make_id(seed, "show", index))
+
+
+def partner_id(seed: int, index: int) -> str:
+    return make_id(seed, "partner", index).hex
+
+
+def partner_email(index: int) -> str:
+    return f"partner{index}@generated.example"
+
+
+def _connect(db: dict):
+    return pymysql.connect(charset="utf8mb4", cursorclass=pymysql.cursors.DictCursor, **db)
+
+
+def default_db() -> dict:
+    return {"host": DB_HOST, "port": DB_PORT, "user": DB_USER, "password": DB_PASSWORD, "database": DB_NAME}
+
+
+def load_enums(cursor) -> dict:
+    """`{(table, column): [values]}` for every enum column, read from the live schema."""
+    cursor.execute(
+        "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND DATA_TYPE = 'enum'"
+    )
+    enums = {}
+    for row in cursor.fetchall():
+        values = re.findall(r"'((?:[^']|'')*)'", row["COLUMN_TYPE"])
+        enums[(row["TABLE_NAME"], row["COLUMN_NAME"])] = [value.replace("''", "'") for value in values]
+    return enums
+
+
+# --- Row generators ---
+# Each takes (rng, seed, begin, end, context) and returns {table: (sql, rows)}.
+
+_SHOW_COLUMNS = (
+    "id", "title", "minimum_guarantee", "annual_usd", "subnetwork_id", "media_type", "tentpole",
+    "relationship_level", "show_type", "evergreen_ownership_pct", "has_sponsorship_revenue",
+    "has_non_evergreen_revenue", "requires_partner_access", "has_branded_revenue", "has_marketing_revenue",
+    "has_web_mgmt_revenue", "genre_id", "is_original", "shows_per_year", "latest_cpm_usd", "ad_slots",
+    "avg_show_length_mins", "start_date", "show_name_in_qbo", "revenue_2023", "revenue_2024", "revenue_2025",
+    "evergreen_production_staff_name", "show_host_contact",
+)
+_DEMOGRAPHIC_COLUMNS = ("show_id", "age_range", "gender", "region", "primary_education", "secondary_education")
+
+
+def _insert_sql(table: str, columns: tuple) -> str:
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+
+def _person(rng: random.Random) -> str:
+    return f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+
+
+def _gen_shows(rng, seed, begin, end, context):
+    enums = context["enums"]
+    qbo_names = enums.get(("shows", "show_name_in_qbo"), [])
+    shows, demographics = [], []
+    for i in range(begin, end):
+        sid = show_id(seed, i)
+        show_type = rng.choice(enums[("shows", "show_type")])
+        base = rng.lognormvariate(10, 1.5)
+        revenue = {str(year): round(base * rng.uniform(0.6, 1.6), 2) for year in (2023, 2024, 2025)}
+        shows.append((
+            sid,
+            f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} {i}",
+            round(rng.uniform(0, 50000), 2) if rng.random() < 0.3 else None,
+            json.dumps(revenue),
+            str(make_id(seed, "subnetwork", rng.randrange(context["subnetworks"]))),
+            rng.choice(enums[("shows", "media_type")]),
+            rng.random() < 0.1,
+            rng.choice(enums[("shows", "relationship_level")]),
+            show_type,
+            round(rng.uniform(0, 1), 3),
+            *(rng.random() < 0.5 for _ in range(6)),
+            str(make_id(seed, "genre", rng.randrange(context["genres"]))),
+            show_type == "Original",
+            rng.randrange(12, 400),
+            round(rng.uniform(5, 40), 2),
+            rng.randrange(1, 6),
+            rng.randrange(10, 120),
+            date(2015, 1, 1) + timedelta(days=rng.randrange(3650)),
+            rng.choice(qbo_names) if qbo_names and rng.random() < 0.6 else None,
+            revenue["2023"],
+            revenue["2024"],
+            revenue["2025"],
+            _person(rng),
+            f"{_person(rng)} <host{i}@generated.example>",
+        ))
+        if rng.random() < 0.7:
+            share = rng.randrange(20, 81)
+            demographics.append((
+                sid,
+                rng.choice(_AGE_RANGES),
+                f"{share}/{100 - share}",
+                rng.choice(enums[("demographic", "region")]),
+                rng.choice(_EDUCATION),
+                rng.choice(_EDUCATION),
+            ))
+    return {
+        "shows": (_insert_sql("shows", _SHOW_COLUMNS), shows),
+        "demographic": (_insert_sql("demographic", _DEMOGRAPHIC_COLUMNS), demographics),
+    }
+
+
+def _gen_partners(rng, seed, begin, end, context):
+    users, partners, links = [], [], []
+    shows = context["shows"]
+    per_partner = context["shows_per_partner"]
+    for i in range(begin, end):
+        user_id = make_id(seed, "user", i).hex
+        users.append((user_id, _person(rng), partner_email(i), context["password_hash"], "partner"))
+        partners.append((partner_id(seed, i), user_id))
+        count = min(shows, rng.randint(1, max(1, 2 * per_partner - 1))) if per_partner else 0
+        for n, show in enumerate(rng.sample(range(shows), count)):
+            links.append((make_id(seed, f"show_partner:{i}", n).hex, show_id(seed, show), partner_id(seed, i)))
+    return {
+        "users": (_insert_sql("users", ("id", "name", "email", "password_hash", "role")), users),
+        "partners": (_insert_sql("partners", ("id", "user_id")), partners),
+        "show_partners": (_insert_sql("show_partners", ("id", "show_id", "partner_id")), links),
+    }
+
+
+def _gen_ledger(rng, seed, begin, end, context):
+    weights = context["advertiser_weights"]
+    shows = context["shows"]
+    rows = []
+    for i in range(begin, end):
+        advertiser = rng.choices(_ADVERTISERS, cum_weights=weights)[0]
+        # A few shows carry most of the revenue; a sliver of lines is unattributed.
+        show = None if not shows or rng.random() < 0.01 else show_id(seed, int(shows * rng.random() ** 3))
+        paid = _LEDGER_START + timedelta(days=rng.randrange(_LEDGER_DAYS))
+        rows.append((
+            make_id(seed, "ledger", i).hex,
+            f"GEN{seed}-{i:010d}",
+            show,
+            paid,
+            max(1, int(rng.lognormvariate(6.5, 1.2))),
+            rng.choice(_AGENCIES),
+            advertiser,
+            f"Podcast advertising {paid:%b %Y}",
+        ))
+    columns = ("id", "transaction_id", "show_id", "payment_date", "amount_received",
+               "customer_name", "advertiser_name", "description")
+    return {"ledger_transaction": (_insert_sql("ledger_transaction", columns), rows)}
+
+
+_GENERATORS = {"shows": _gen_shows, "partners": _gen_partners, "ledger": _gen_ledger}
+
+_worker_conn = None
+
+
+def _init_worker(db: dict):
+    global _worker_conn
+    _worker_conn = _connect(db)
+    with _worker_conn.cursor() as cursor:
+        # Rows are referentially valid and unique by construction, and chunks
+        # of different tables land in any order.
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cursor.execute("SET UNIQUE_CHECKS = 0")
+
+
+def _run_task(kind: str, seed: int, begin: int, end: int, context: dict) -> dict:
+    """Generate and insert one chunk in a single transaction; returns rows per table."""
+    rng = random.Random(f"{seed}:{kind}:{begin}")
+    tables = _GENERATORS[kind](rng, seed, begin, end, context)
+    counts = {}
+    with _worker_conn.cursor() as cursor:
+        for table, (sql, rows) in tables.items():
+            # pymysql rewrites this into multi-row INSERTs of up to ~1 MB each.
+            if rows:
+                cursor.executemany(sql, rows)
+            counts[table] = len(rows)
+    _worker_conn.commit()
+    return counts
+
+
+def _chunks(kind: str, total: int, size: int):
+    for begin in range(0, total, size):
+        yield kind, begin, min(total, begin + size)
+
+
+def _run_tasks(db: dict, tasks: list, seed: int, context: dict, workers: int):
+    """Yield each task's row counts as it completes."""
+    if workers <= 1:
+        _init_worker(db)
+        try:
+            for kind, begin, end in tasks:
+                yield _run_task(kind, seed, begin, end, context)
+        finally:
+            _worker_conn.close()
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db,)) as pool:
+        futures = [pool.submit(_run_task, kind, seed, begin, end, context) for kind, begin, end in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _reference_rows(cursor, seed: int, context: dict):
+    """Genres, subnetworks and revenue split rules: small, so inserted up front."""
+    rng = random.Random(f"{seed}:reference")
+    genre_names = context["enums"][("genre", "name")]
+    cursor.executemany(
+        _insert_sql("genre", ("id", "name")),
+        [(str(make_id(seed, "genre", i)), genre_names[i % len(genre_names)]) for i in range(context["genres"])],
+    )
+    cursor.executemany(
+        _insert_sql("subnetwork", ("id", "name")),
+        [(str(make_id(seed, "subnetwork", i)), f"{rng.choice(_WORDS)} Network {i}") for i in range(context["subnetworks"])],
+    )
+    # A default rule (blank advertiser) plus specific rules, some renegotiated
+    # mid-ledger, so payouts exercise both lookups.
+    split_types = context["enums"][("revenue_split", "split_type")]
+    start = _LEDGER_START
+    rules = [(make_id(seed, "split", 0).hex, "", split_types[0], 50, 50, start)]
+    for n, advertiser in enumerate(_ADVERTISERS[: len(_ADVERTISERS) // 5]):
+        for change in range(rng.randint(1, 2)):
+            partner_pct = rng.randrange(30, 71)
+            rules.append((make_id(seed, f"split:{n}", change).hex, advertiser, rng.choice(split_types),
+                          partner_pct, 100 - partner_pct, start + timedelta(days=change * rng.randrange(180, 720))))
+    cursor.executemany(
+        _insert_sql("revenue_split", ("id", "advertiser_name", "split_type", "partner_pct", "evergreen_pct", "effective_date")),
+        rules,
+    )
+    return {"genre": context["genres"], "subnetwork": context["subnetworks"], "revenue_split": len(rules)}
+
+
+def generate(db: dict = None, shows: int = 10000, partners: int = 1000, shows_per_partner: int = 3,
+             ledger_rows: int = 1000000, subnetworks: int = 20, seed: int = 1, password: str = GEN_PASSWORD,
+             workers: int = GEN_WORKERS, chunk_rows: int = GEN_CHUNK_ROWS, truncate: bool = False, report=print) -> dict:
+    """Fill the database with seeded, referentially valid synthetic data.
+
+    The same arguments produce the same rows whatever the number of workers.
+    Generated ids collide with a previous run's, so re-running with the same
+    seed needs `truncate`. Returns rows per table, seconds and rows/s.
+    """
+    db = db or default_db()
+    started = time.perf_counter()
+    conn = _connect(db)
+    try:
+        with conn.cursor() as cursor:
+            enums = load_enums(cursor)
+            if truncate:
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+                for table in GENERATED_TABLES:
+                    cursor.execute(f"TRUNCATE TABLE {table}")
+                cursor.execute("DELETE rt FROM refresh_tokens rt JOIN users u ON u.id = rt.user_id WHERE u.role = 'partner'")
+                cursor.execute("DELETE FROM users WHERE role = 'partner'")
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+            context = {
+                "enums": enums,
+                "shows": shows,
+                "shows_per_partner": shows_per_partner,
+                "genres": len(enums[("genre", "name")]),
+                "subnetworks": max(1, subnetworks),
+                # One bcrypt hash for every partner: hashing per row would dominate the run.
+                "password_hash": get_password_hash(password),
+                # Zipf-like: the first advertisers buy most of the inventory.
+                "advertiser_weights": list(accumulate(1 / rank for rank in range(1, len(_ADVERTISERS) + 1))),
+            }
+            totals = _reference_rows(cursor, seed, context)
+        conn.commit()
+    finally:
+        conn.close()
+
+    per_partner_rows = 2 + 2 * max(1, shows_per_partner)
+    tasks = (list(_chunks("shows", shows, chunk_rows))
+             + list(_chunks("partners", partners, max(1, chunk_rows // per_partner_rows)))
+             + list(_chunks("ledger", ledger_rows, chunk_rows)))
+    report(f"Generating {shows:,} shows, {partners:,} partners and {ledger_rows:,} ledger rows "
+           f"in {len(tasks)} chunks with {workers} workers...")
+
+    last_report = time.perf_counter()
+    for done, counts in enumerate(_run_tasks(db, tasks, seed, context, workers), 1):
+        for table, rows in counts.items():
+            totals[table] = totals.get(table, 0) + rows
+        if time.perf_counter() - last_report >= 1 or done == len(tasks):
+            last_report = time.perf_counter()
+            elapsed = last_report - started
+            rows = sum(totals.values())
+            report(f"[{elapsed:7.1f}s] {done}/{len(tasks)} chunks  {rows:,} rows  {rows / elapsed:,.0f} rows/s")
+
+    conn = _connect(db)
+    try:
+        with conn.cursor() as cursor:
+            totals["show_revenue_rollup"] = rebuild_rollup(UnitOfWork(conn, cursor))
+        conn.commit()
+    finally:
+        conn.close()
+
+    seconds = time.perf_counter() - started
+    rows = sum(totals.values())
+    return {
+        "rows": totals,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill the database with seeded synthetic data for scale testing.")
+    parser.add_argument("--shows", type=int, default=10000)
+    parser.add_argument("--partners", type=int, default=1000)
+    parser.add_argument("--shows-per-partner", type=int, default=3, help="average; each partner gets 1 to 2x-1")
+    parser.add_argument("--ledger-rows", type=int, default=1000000)
+    parser.add_argument("--subnetworks", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--password", default=GEN_PASSWORD, help="password of every generated partner")
+    parser.add_argument("--workers", type=int, default=GEN_WORKERS)
+    parser.add_argument("--chunk-rows", type=int, default=GEN_CHUNK_ROWS)
+    parser.add_argument("--truncate", action="store_true",
+                        help="empty the generated tables (and delete partner users) first")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = generate(shows=args.shows, partners=args.partners, shows_per_partner=args.shows_per_partner,
+                           ledger_rows=args.ledger_rows, subnetworks=args.subnetworks, seed=args.seed,
+                           password=args.password, workers=args.workers, chunk_rows=args.chunk_rows,
+                           truncate=args.truncate)
+    except pymysql.Error as e:
+        print(f"Data generation failed: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
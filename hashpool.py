@@ -0,0 +1,110 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from auth import get_password_hash, verify_password
+
+# --- Configuration ---
+HASH_POOL_WORKERS = int(os.environ.get("HASH_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_POOL_QUEUE_SIZE = int(os.environ.get("HASH_POOL_QUEUE_SIZE", "32"))
+
+
+class HashPoolBusy(Exception):
+    """Raised when the hashing pool and its wait queue are both full."""
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class HashPool:
+    """Runs bcrypt hashing and verification on a bounded set of worker threads.
+
+    At most `workers` hashes run at once and at most `queue_size` more wait
+    for a worker; anything beyond that is rejected immediately with
+    `HashPoolBusy` instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, queue_size: int = HASH_POOL_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hashpool")
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + running
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._hash_ms = deque(maxlen=1000)
+        self._total_ms = deque(maxlen=1000)
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                self._rejected += 1
+                raise HashPoolBusy("Too many password operations in progress, try again shortly")
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._run, time.perf_counter(), fn, *args)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self.submit(get_password_hash, password))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(self.submit(verify_password, plain_password, hashed_password))
+
+    def hash_sync(self, password: str) -> str:
+        return self.submit(get_password_hash, password).result()
+
+    def verify_sync(self, plain_password: str, hashed_password: str) -> bool:
+        return self.submit(verify_password, plain_password, hashed_password).result()
+
+    def stats(self):
+        with self._lock:
+            hash_ms = sorted(self._hash_ms)
+            total_ms = sorted(self._total_ms)
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "hash_ms_p50": round(_percentile(hash_ms, 50), 3),
+                "hash_ms_p95": round(_percentile(hash_ms, 95), 3),
+                "hash_ms_max": round(hash_ms[-1], 3) if hash_ms else 0.0,
+                "total_ms_p50": round(_percentile(total_ms, 50), 3),
+                "total_ms_p95": round(_percentile(total_ms, 95), 3),
+            }
+
+    def _run(self, submitted_at, fn, *args):
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._hash_ms.append((finished - started) * 1000)
+                self._total_ms.append((finished - submitted_at) * 1000)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+
+hash_pool = HashPool()
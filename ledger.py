@@ -0,0 +1,233 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+import pymysql
+
+from revenue import rollup_delta, apply_rollup_delta, rebuild_rollup
+from sqlclient import SqlClient
+
+# --- Configuration ---
+# Rows per multi-row upsert; each batch commits on its own, so a failed run
+# keeps everything before the failing batch and a re-run only rewrites it.
+LEDGER_BATCH_ROWS = int(os.environ.get("LEDGER_BATCH_ROWS", "2000"))
+# Rejected rows listed in a report; the count always covers all of them.
+LEDGER_MAX_REJECTS_REPORTED = int(os.environ.get("LEDGER_MAX_REJECTS_REPORTED", "100"))
+
+LEDGER_COLUMNS = (
+    "transaction_id",
+    "show_id",
+    "payment_date",
+    "amount_received",
+    "customer_name",
+    "advertiser_name",
+    "description",
+)
+
+_UPSERT_SQL = (
+    f"INSERT INTO ledger_transaction (id, {', '.join(LEDGER_COLUMNS)}) "
+    f"VALUES ({', '.join(['%s'] * (len(LEDGER_COLUMNS) + 1))}) AS new "
+    "ON DUPLICATE KEY UPDATE "
+    + ", ".join(f"{column} = new.{column}" for column in LEDGER_COLUMNS if column != "transaction_id")
+)
+
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y")
+
+
+class LedgerFormatError(ValueError):
+    """Raised when a CSV cannot be ingested at all, e.g. required columns are missing."""
+
+
+def _parse_date(value: str) -> date:
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognised payment_date '{value}'")
+
+
+def _parse_amount(value: str) -> Decimal:
+    # QuickBooks exports may use "$1,234.00" and "(12.00)" for negatives.
+    text = value.strip().replace(",", "").replace("$", "")
+    negative = text.startswith("(") and text.endswith(")")
+    if negative:
+        text = text[1:-1]
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount_received '{value}'")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount_received '{value}'")
+    return -amount if negative else amount
+
+
+def parse_ledger_row(row: dict, show_ids) -> tuple:
+    """Validate one CSV row and return its column values in `LEDGER_COLUMNS` order."""
+    def field(name):
+        value = row.get(name)
+        return value.strip() if value and value.strip() else None
+
+    transaction_id = field("transaction_id")
+    if transaction_id is None:
+        raise ValueError("Missing transaction_id")
+    if len(transaction_id) > 255:
+        raise ValueError("transaction_id longer than 255 characters")
+    show_id = field("show_id")
+    if show_id is not None and show_id not in show_ids:
+        raise ValueError(f"Unknown show_id '{show_id}'")
+    payment_date = field("payment_date")
+    amount = field("amount_received")
+    return (
+        transaction_id,
+        show_id,
+        _parse_date(payment_date) if payment_date else None,
+        _parse_amount(amount) if amount else None,
+        field("customer_name"),
+        field("advertiser_name"),
+        field("description"),
+    )
+
+
+def _load_show_ids(client: SqlClient) -> set:
+    rows, _, error = client._execute_query("SELECT id FROM shows", fetch='all')
+    if error:
+        raise error
+    return {row["id"] for row in rows}
+
+
+_ROLLUP_COLUMNS = "transaction_id, show_id, payment_date, amount_received, advertiser_name"
+
+
+def _select_for_rollup(tx, transaction_ids: list) -> list:
+    placeholders = ", ".join(["%s"] * len(transaction_ids))
+    rows, _ = tx.execute(
+        f"SELECT {_ROLLUP_COLUMNS} FROM ledger_transaction WHERE transaction_id IN ({placeholders}) FOR UPDATE",
+        transaction_ids,
+        fetch='all',
+    )
+    return rows
+
+
+def _write_batch(client: SqlClient, batch: list) -> int:
+    """Upsert one batch and move the revenue rollup by exactly what changed."""
+    # A transaction id repeated within the batch ends up with its last values.
+    batch = list({values[0]: values for values in batch}.values())
+    transaction_ids = [values[0] for values in batch]
+    with client.transaction() as tx:
+        # Old and new values are read back as stored, so rounding by the column type is accounted for.
+        old_rows = _select_for_rollup(tx, transaction_ids)
+        rows_affected = tx.executemany(_UPSERT_SQL, [(os.urandom(16).hex(),) + values for values in batch])
+        apply_rollup_delta(tx, rollup_delta(old_rows, _select_for_rollup(tx, transaction_ids)))
+    return rows_affected
+
+
+def rebuild_revenue_rollup(client: SqlClient = None) -> int:
+    """Recompute `show_revenue_rollup` from the full ledger; returns the number of rollup rows."""
+    client = client or SqlClient()
+    with client.transaction() as tx:
+        return rebuild_rollup(tx)
+
+
+def ingest_ledger_csv(stream, client: SqlClient = None, batch_size: int = LEDGER_BATCH_ROWS) -> dict:
+    """Stream ledger lines from a text CSV `stream` into `ledger_transaction`.
+
+    Rows are validated one at a time and upserted on `transaction_id` in
+    batches, so memory stays flat however large the file is and re-running
+    the same file is harmless. Invalid rows are skipped and reported.
+    Each batch also updates the revenue rollup in the same transaction.
+    Database errors propagate; batches committed before the error remain.
+    """
+    client = client or SqlClient()
+    reader = csv.DictReader(stream)
+    headers = {name.strip() for name in reader.fieldnames or ()}
+    missing = {"transaction_id", "amount_received"} - headers
+    if missing:
+        raise LedgerFormatError(f"Missing required columns: {', '.join(sorted(missing))}")
+    reader.fieldnames = [name.strip() for name in reader.fieldnames]
+
+    show_ids = _load_show_ids(client)
+    started = time.perf_counter()
+    rows = accepted = rows_affected = batches = 0
+    rejects, rejected = [], 0
+    batch = []
+    for row in reader:
+        rows += 1
+        try:
+            batch.append(parse_ledger_row(row, show_ids))
+        except ValueError as e:
+            rejected += 1
+            if len(rejects) < LEDGER_MAX_REJECTS_REPORTED:
+                # Line numbers count the header, matching what a spreadsheet shows.
+                rejects.append({"line": reader.line_num, "transaction_id": row.get("transaction_id"), "error": str(e)})
+            continue
+        if len(batch) >= batch_size:
+            rows_affected += _write_batch(client, batch)
+            accepted += len(batch)
+            batches += 1
+            batch = []
+    if batch:
+        rows_affected += _write_batch(client, batch)
+        accepted += len(batch)
+        batches += 1
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "upserted": accepted,
+        # MySQL counts 1 per inserted row, 2 per changed row and 0 per unchanged row.
+        "rows_affected": rows_affected,
+        "batches": batches,
+        "rejected": rejected,
+        "rejects": rejects,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upsert a QuickBooks ledger CSV into ledger_transaction.")
+    parser.add_argument("path", nargs="?", help="CSV file, or - for stdin")
+    parser.add_argument("--batch-size", type=int, default=LEDGER_BATCH_ROWS)
+    parser.add_argument("--rebuild-rollup", action="store_true",
+                        help="recompute the revenue rollup from the whole ledger (after loading PATH, if given)")
+    args = parser.parse_args(argv)
+    if args.path is None and not args.rebuild_rollup:
+        parser.error("PATH is required unless --rebuild-rollup is given")
+
+    if args.path is None:
+        return _rebuild_cli()
+
+    if args.path == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+    else:
+        stream = open(args.path, encoding="utf-8-sig", newline="")
+    try:
+        report = ingest_ledger_csv(stream, batch_size=args.batch_size)
+    except (LedgerFormatError, pymysql.Error) as e:
+        print(f"Ledger ingest failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        stream.close()
+    print(json.dumps(report, indent=2))
+    return _rebuild_cli() if args.rebuild_rollup else 0
+
+
+def _rebuild_cli():
+    try:
+        rows = rebuild_revenue_rollup()
+    except pymysql.Error as e:
+        print(f"Rollup rebuild failed: {e}", file=sys.stderr)
+        return 1
+    print(f"Rebuilt revenue rollup: {rows} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
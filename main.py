@@ -1,12 +1,33 @@
+import csv
+import hmac
+import io
+import itertools
+import pymysql
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, UploadFile, File, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from typing import Optional
-from models import Show, User, Token, TokenData, PartnerCreate, PasswordUpdate, ShowUpdate, ShowCreate, MediaType, RelationshipLevel, ShowType
-from sqlclient import SqlClient
-from auth import create_access_token, verify_password, SECRET_KEY, ALGORITHM
+from datetime import date
+from models import Show, User, Token, TokenData, RefreshTokenRequest, PartnerCreate, PasswordUpdate, ShowUpdate, ShowCreate, MediaType, RelationshipLevel, ShowType, ExportFormat, ShowBulkRequest, ShowBulkUpdate, BulkMode, ShowPartnerBatch, RevenuePoint, RevenueGranularity, RevenueGroupBy, PayoutReport
+from sqlclient import SqlClient, get_pool, close_pool, replicas, show_index, show_search, BULK_MAX_ITEMS
+from asyncsqlclient import AsyncSqlClient, close_async_pool
+from usercache import user_cache
+from pagination import Keyset, InvalidPageRequest, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, encode_cursor, decode_cursor
+from projection import parse_fields, InvalidFields
+from querycache import query_cache
+from export import SERIALIZERS, MEDIA_TYPES
+from fastjson import encode_shows
+from etags import show_etag, shows_etag, etag_matches
+from auth import create_access_token, create_refresh_token, hash_refresh_token, SECRET_KEY, ALGORITHM
+from hashpool import hash_pool, HashPoolBusy
+from ledger import ingest_ledger_csv, rebuild_revenue_rollup, LedgerFormatError
+from payouts import compute_payouts
+import metrics
+from profiling import PROFILING_ENABLED, ProfilingMiddleware, profile_store, folded
+from replicas import ReadYourWritesMiddleware, is_unavailable
 from fastapi.middleware.cors import CORSMiddleware
 
 # --- FastAPI App Initialization ---
@@ -29,31 +50,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Profile-Id"],
 )
+app.add_middleware(metrics.RequestMetricsMiddleware)
+if replicas is not None:
+    app.add_middleware(ReadYourWritesMiddleware)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+@app.exception_handler(HashPoolBusy)
+async def hash_pool_busy_handler(request: Request, exc: HashPoolBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.on_event("shutdown")
+async def close_db_pools():
+    close_pool()
+    await close_async_pool()
+
 # --- Authentication & Authorization ---
 
+async def user_for_token(token: str):
+    """Resolve a bearer token to its user, or None if the token is not valid."""
+    payload = user_cache.get_claims(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        if payload.get("sub") is None:
+            return None
+        user_cache.set_claims(token, payload)
+    token_data = TokenData(email=payload.get("sub"))
+
+    user = user_cache.get_user(token_data.email)
+    if user is None:
+        client = AsyncSqlClient()
+        user, _ = await client.get_user_by_email(email=token_data.email)
+        if user is None:
+            return None
+        user_cache.set_user(user, expires_at=payload.get("exp"))
+    return user
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    
-    client = SqlClient()
-    user, _ = client.get_user_by_email(email=token_data.email)
+    user = await user_for_token(token)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
@@ -65,20 +110,49 @@ async def get_admin_user(current_user: User = Depends(get_current_active_user)):
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return current_user
 
+async def is_admin_token(token: str) -> bool:
+    user = await user_for_token(token)
+    return user is not None and user.get('role') == 'admin'
+
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, authorize=is_admin_token)
+
 # --- API Endpoints ---
 
 @app.post("/login", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    client = SqlClient()
-    user, _ = client.get_user_by_email(email=form_data.username)
-    if not user or not verify_password(form_data.password, user.get('password_hash')):
+    client = AsyncSqlClient()
+    user, _ = await client.get_user_by_email(email=form_data.username)
+    if not user or not await hash_pool.verify(form_data.password, user.get('password_hash')):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token = create_access_token(data={"sub": user.get('email')})
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token, token_hash, expires_at = create_refresh_token()
+    stored, _ = await client.store_refresh_token(user.get('id'), token_hash, expires_at)
+    # Refresh tokens are optional for clients: a failure to store one still lets the login through.
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token if stored else None}
+
+@app.post("/token/refresh", response_model=Token)
+async def refresh_access_token(body: RefreshTokenRequest):
+    """Exchange a refresh token for a new access token and a new refresh token.
+
+    No password check is involved, so this skips bcrypt entirely. Each
+    refresh token works once; the one returned replaces it.
+    """
+    client = AsyncSqlClient()
+    refresh_token, token_hash, expires_at = create_refresh_token()
+    user, error = await client.rotate_refresh_token(hash_refresh_token(body.refresh_token), token_hash, expires_at)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=error or "Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    access_token = create_access_token(data={"sub": user.get('email')})
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
 @app.get("/users/me", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
@@ -86,6 +160,48 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
 
 # --- Admin Endpoints ---
 
+@app.get("/admin/stats")
+def get_stats(admin: User = Depends(get_admin_user)):
+    """(Admin Only) Runtime statistics for the connection pools and caches."""
+    return {
+        "db_pool": get_pool().stats(),
+        "user_cache": user_cache.stats(),
+        "hash_pool": hash_pool.stats(),
+        "show_index": show_index.stats() if show_index else None,
+        "show_search": show_search.stats(),
+        "query_cache": query_cache.stats(),
+        "replicas": replicas.stats() if replicas is not None else None,
+    }
+
+@app.get("/admin/profiles")
+def list_profiles(admin: User = Depends(get_admin_user)):
+    """(Admin Only) Recently captured request profiles, newest first."""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    return profile_store.list()
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: int, admin: User = Depends(get_admin_user)):
+    """(Admin Only) One profile as folded stacks, ready for flamegraph.pl or speedscope."""
+    profile = profile_store.get(profile_id) if PROFILING_ENABLED else None
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(folded(profile), headers={"Content-Disposition": f'inline; filename="profile-{profile_id}.folded"'})
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus metrics for this worker process."""
+    if metrics.METRICS_TOKEN and not hmac.compare_digest(
+        (authorization or "").encode(), f"Bearer {metrics.METRICS_TOKEN}".encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    metrics.observe_pool(get_pool().stats())
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.post("/podcasts", response_model=Show, status_code=status.HTTP_201_CREATED)
 def create_podcast(show_data: ShowCreate, admin: User = Depends(get_admin_user)):
     client = SqlClient()
@@ -94,10 +210,144 @@ def create_podcast(show_data: ShowCreate, admin: User = Depends(get_admin_user))
         raise HTTPException(status_code=400, detail=str(error))
     return new_show
 
+def validate_bulk_items(items: list, model):
+    """Validate each raw item against `model`; return `(valid, invalid)` keyed by index."""
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+    valid, invalid = {}, {}
+    for index, item in enumerate(items):
+        try:
+            valid[index] = model.model_validate(item)
+        except ValidationError as e:
+            invalid[index] = [{"loc": list(err["loc"]), "msg": err["msg"]} for err in e.errors()]
+    return valid, invalid
+
+def bulk_response(request: ShowBulkRequest, valid: dict, invalid: dict, results, error, done_status: str):
+    """Merge validation failures and write outcomes into one per-item report.
+
+    In atomic mode a rejected batch raises 422 (invalid items) or 409 (write
+    failure) with the report as the detail; nothing has been written then.
+    """
+    report = [None] * len(request.items)
+    for index, errors in invalid.items():
+        report[index] = {"index": index, "status": "invalid", "errors": errors}
+    for index, result in zip(valid, results or ()):
+        status_ = done_status if result["status"] == "ok" else result["status"]
+        report[index] = {"index": index, "status": status_, "id": result["id"]}
+        if result["error"]:
+            report[index]["error"] = result["error"]
+    if request.mode == BulkMode.atomic:
+        for index in valid:
+            if report[index] is None:
+                report[index] = {"index": index, "status": "rolled_back"}
+    succeeded = sum(1 for item in report if item and item["status"] == done_status)
+    body = {"mode": request.mode.value, "succeeded": succeeded, "failed": len(report) - succeeded, "results": report}
+    if request.mode == BulkMode.atomic and invalid:
+        raise HTTPException(status_code=422, detail=body)
+    if results is None:
+        raise HTTPException(status_code=400, detail=str(error))
+    if request.mode == BulkMode.atomic and error:
+        body["error"] = str(error)
+        raise HTTPException(status_code=409, detail=body)
+    return body
+
+@app.post("/podcasts/bulk", status_code=status.HTTP_201_CREATED)
+def bulk_create_podcasts(request: ShowBulkRequest, admin: User = Depends(get_admin_user)):
+    """(Admin Only) Create many shows in one transaction.
+
+    `atomic` mode writes all items or none; `partial` mode writes every item
+    that validates and inserts cleanly and reports the rest.
+    """
+    valid, invalid = validate_bulk_items(request.items, ShowCreate)
+    results, error = [], None
+    if valid and not (invalid and request.mode == BulkMode.atomic):
+        client = SqlClient()
+        results, error = client.bulk_create_podcasts(list(valid.values()), request.mode == BulkMode.atomic)
+    return bulk_response(request, valid, invalid, results, error, "created")
+
+@app.patch("/podcasts/bulk")
+def bulk_update_podcasts(request: ShowBulkRequest, admin: User = Depends(get_admin_user)):
+    """(Admin Only) Apply many partial show updates, each item carrying its `id`."""
+    valid, invalid = validate_bulk_items(request.items, ShowBulkUpdate)
+    for index, item in list(valid.items()):
+        if not item.model_fields_set - {"id"}:
+            del valid[index]
+            invalid[index] = [{"loc": [], "msg": "No update data provided"}]
+    results, error = [], None
+    if valid and not (invalid and request.mode == BulkMode.atomic):
+        client = SqlClient()
+        updates = [(item.id, ShowUpdate(**item.model_dump(include=item.model_fields_set - {"id"})))
+                   for item in valid.values()]
+        results, error = client.bulk_update_podcasts(updates, request.mode == BulkMode.atomic)
+    return bulk_response(request, valid, invalid, results, error, "updated")
+
+class PageParams:
+    def __init__(
+        self,
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1),
+        cursor: Optional[str] = None,
+        sort: str = "id",
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+
+    def keyset(self) -> Keyset:
+        try:
+            return Keyset(limit=self.limit, cursor=self.cursor, sort=self.sort)
+        except InvalidPageRequest as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set the ETag and return a 304 if the client already holds this representation."""
+    response.headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+def show_columns(fields: Optional[str] = None) -> Optional[tuple]:
+    """Dependency parsing the `fields=` projection shared by the show endpoints."""
+    try:
+        return parse_fields(fields)
+    except InvalidFields as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def render_shows(shows, columns: Optional[tuple], response: Response = None):
+    """Serialize raw show rows (full, or projected to `columns`) straight to JSON.
+
+    Rows skip `response_model` validation, which is the bulk of the cost on
+    large lists; `fastjson` applies the same coercions. Headers already set on
+    the endpoint's `response` are carried over by hand.
+    """
+    rendered = Response(content=encode_shows(shows, columns), media_type="application/json")
+    if response is not None:
+        for name, value in response.headers.items():
+            if name not in ("content-length", "content-type"):
+                rendered.headers[name] = value
+    return rendered
+
 @app.get("/podcasts", response_model=list[Show])
-def get_all_podcasts(admin: User = Depends(get_admin_user)):
+def get_all_podcasts(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    columns: Optional[tuple] = Depends(show_columns),
+    admin: User = Depends(get_admin_user),
+):
+    """(Admin Only) List shows one page at a time; follow `X-Next-Cursor` for the next page."""
     client = SqlClient()
-    return client.get_all_podcasts()
+    keyset = page.keyset()
+    shows, next_cursor = keyset.page(client.get_all_podcasts(keyset, columns))
+    set_next_cursor(response, next_cursor)
+    unchanged = not_modified(request, response, shows_etag(shows, columns, next_cursor))
+    if unchanged:
+        return unchanged
+    return render_shows(shows, columns, response)
 
 class ShowFilterParams:
     def __init__(
@@ -131,22 +381,103 @@ class ShowFilterParams:
 
 @app.get("/podcasts/filter", response_model=list[Show])
 def filter_podcasts(
-    filters: ShowFilterParams = Depends(), admin: User = Depends(get_admin_user)
+    request: Request,
+    response: Response,
+    filters: ShowFilterParams = Depends(),
+    page: PageParams = Depends(),
+    columns: Optional[tuple] = Depends(show_columns),
+    admin: User = Depends(get_admin_user),
 ):
     client = SqlClient()
+    keyset = page.keyset()
     filter_dict = {k: v for k, v in vars(filters).items() if v is not None}
-    podcasts, error = client.filter_podcasts(filter_dict)
+    podcasts, error = client.filter_podcasts(filter_dict, keyset, columns)
     if error:
         raise HTTPException(status_code=400, detail=str(error))
-    return podcasts
+    podcasts, next_cursor = keyset.page(podcasts)
+    set_next_cursor(response, next_cursor)
+    unchanged = not_modified(request, response, shows_etag(podcasts, columns, next_cursor))
+    if unchanged:
+        return unchanged
+    return render_shows(podcasts, columns, response)
+
+@app.get("/podcasts/export")
+def export_podcasts(
+    format: ExportFormat = ExportFormat.ndjson,
+    filters: ShowFilterParams = Depends(),
+    columns: Optional[tuple] = Depends(show_columns),
+    admin: User = Depends(get_admin_user),
+):
+    """(Admin Only) Stream every show matching the filters as NDJSON or CSV."""
+    client = SqlClient()
+    filter_dict = {k: v for k, v in vars(filters).items() if v is not None}
+    rows = client.iter_podcasts(filter_dict, columns)
+    # Pull the first row now so query errors become a 400 (or a 503 when the
+    # database cannot be reached) rather than a broken stream.
+    try:
+        first = list(itertools.islice(rows, 1))
+    except pymysql.Error as e:
+        if is_unavailable(e):
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        raise HTTPException(status_code=400, detail=str(e))
+    serialize = SERIALIZERS[format.value]
+    return StreamingResponse(
+        serialize(itertools.chain(first, rows), columns),
+        media_type=MEDIA_TYPES[format.value],
+        headers={"Content-Disposition": f'attachment; filename="shows.{format.value}"'},
+    )
+
+@app.get("/podcasts/search", response_model=list[Show])
+def search_podcasts(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1),
+    cursor: Optional[str] = None,
+    columns: Optional[tuple] = Depends(show_columns),
+    admin: User = Depends(get_admin_user),
+):
+    """(Admin Only) Ranked, typo-tolerant search over show titles, QBO names and contacts."""
+    limit = min(limit, PAGE_SIZE_MAX)
+    offset = 0
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidPageRequest as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if after.get("q") != q or not isinstance(after.get("o"), int):
+            raise HTTPException(status_code=400, detail="Cursor does not belong to this search")
+        offset = after["o"]
+    client = SqlClient()
+    shows, error = client.search_podcasts(q, limit, offset, columns)
+    if error:
+        raise HTTPException(status_code=400, detail=str(error))
+    next_cursor = None
+    if len(shows) > limit:
+        shows = shows[:limit]
+        next_cursor = encode_cursor({"q": q, "o": offset + limit})
+    set_next_cursor(response, next_cursor)
+    unchanged = not_modified(request, response, shows_etag(shows, columns, next_cursor))
+    if unchanged:
+        return unchanged
+    return render_shows(shows, columns, response)
 
 @app.get("/podcasts/{show_id}", response_model=Show)
-def get_podcast(show_id: str, admin: User = Depends(get_admin_user)):
+def get_podcast(
+    show_id: str,
+    request: Request,
+    response: Response,
+    columns: Optional[tuple] = Depends(show_columns),
+    admin: User = Depends(get_admin_user),
+):
     client = SqlClient()
-    show, error = client.get_podcast_by_id(show_id)
+    show, error = client.get_podcast_by_id(show_id, columns)
     if error or not show:
         raise HTTPException(status_code=404, detail="Podcast not found")
-    return show
+    unchanged = not_modified(request, response, show_etag(show, columns))
+    if unchanged:
+        return unchanged
+    return render_shows(show, columns, response)
 
 
 @app.put("/podcasts/{show_id}", response_model=Show)
@@ -189,6 +520,20 @@ def associate_partner_with_show(show_id: str, partner_id: str, admin: User = Dep
         raise HTTPException(status_code=404, detail=error)
     return result
 
+@app.post("/partners/associations")
+def update_partner_associations(batch: ShowPartnerBatch, admin: User = Depends(get_admin_user)):
+    """(Admin Only) Add and remove many show/partner associations in one transaction."""
+    if len(batch.add) + len(batch.remove) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} associations per request")
+    client = SqlClient()
+    result, error = client.update_partner_associations(
+        [(link.show_id, link.partner_id) for link in batch.add],
+        [(link.show_id, link.partner_id) for link in batch.remove],
+    )
+    if error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return result
+
 @app.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(user_id: str, admin: User = Depends(get_admin_user)):
     """(Admin Only) Delete a user and all their associations."""
@@ -205,26 +550,111 @@ def unassociate_partner_from_show(show_id: str, partner_id: str, admin: User = D
     if not success:
         raise HTTPException(status_code=404, detail=error)
 
+@app.post("/ledger/upload")
+def upload_ledger(file: UploadFile = File(...), admin: User = Depends(get_admin_user)):
+    """(Admin Only) Upsert a QuickBooks ledger CSV, keyed on `transaction_id`.
+
+    The file is parsed and written in batches as it is read; invalid rows are
+    skipped and listed in the report, so re-uploading a fixed file is safe.
+    """
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return ingest_ledger_csv(stream)
+    except (LedgerFormatError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable ledger file: {e}")
+    except pymysql.Error as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        stream.detach()
+
+@app.post("/admin/revenue/rebuild")
+def rebuild_revenue(admin: User = Depends(get_admin_user)):
+    """(Admin Only) Recompute the revenue rollup from the full ledger."""
+    try:
+        rows = rebuild_revenue_rollup()
+    except pymysql.Error as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"rollup_rows": rows}
+
+@app.get("/podcasts/{show_id}/revenue", response_model=list[RevenuePoint])
+def get_show_revenue(
+    show_id: str,
+    granularity: RevenueGranularity = RevenueGranularity.month,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    by_advertiser: bool = False,
+    admin: User = Depends(get_admin_user),
+):
+    """(Admin Only) Ledger revenue for one show per month, quarter or year."""
+    client = SqlClient()
+    group_by = RevenueGroupBy.advertiser.value if by_advertiser else None
+    points, error = client.get_revenue(granularity.value, show_id, start, end, group_by)
+    if error:
+        raise HTTPException(status_code=400, detail=str(error))
+    if not points:
+        show, _ = client.get_podcast_by_id(show_id, ("id",))
+        if not show:
+            raise HTTPException(status_code=404, detail="Podcast not found")
+    return points
+
+@app.get("/revenue", response_model=list[RevenuePoint])
+def get_portfolio_revenue(
+    granularity: RevenueGranularity = RevenueGranularity.month,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    group_by: Optional[RevenueGroupBy] = None,
+    admin: User = Depends(get_admin_user),
+):
+    """(Admin Only) Ledger revenue across every show, optionally split by show or advertiser."""
+    client = SqlClient()
+    points, error = client.get_revenue(granularity.value, None, start, end, group_by.value if group_by else None)
+    if error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return points
+
+@app.get("/payouts", response_model=PayoutReport)
+def get_payouts(
+    granularity: RevenueGranularity = RevenueGranularity.month,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    partner_id: Optional[str] = None,
+    admin: User = Depends(get_admin_user),
+):
+    """(Admin Only) Partner and Evergreen shares of ledger revenue per partner and period.
+
+    Each ledger line takes the revenue split rule in force for its advertiser
+    on its payment date; the partner share is divided evenly between the
+    show's partners.
+    """
+    client = SqlClient()
+    inputs, error = client.get_payout_inputs(start, end, partner_id)
+    if error:
+        raise HTTPException(status_code=400, detail=str(error))
+    report = compute_payouts(inputs["lines"], inputs["rules"], inputs["show_partners"], granularity.value)
+    if partner_id is not None:
+        report["payouts"] = [line for line in report["payouts"] if line["partner_id"] == partner_id]
+    return report
+
 # --- Partner & Admin Endpoints ---
 
 @app.get("/partners/me/podcasts", response_model=list[Show])
-def get_my_podcasts(current_user: User = Depends(get_current_active_user)):
+def get_my_podcasts(columns: Optional[tuple] = Depends(show_columns), current_user: User = Depends(get_current_active_user)):
     """Retrieve all podcasts associated with the currently authenticated partner."""
     client = SqlClient()
     partner_id = current_user.get('id')
-    podcasts, error = client.get_podcasts_for_partner(partner_id)
+    podcasts, error = client.get_podcasts_for_partner(partner_id, columns)
     if error:
         raise HTTPException(status_code=500, detail=str(error))
-    return podcasts
+    return render_shows(podcasts, columns)
 
 @app.get("/partners/{partner_id}/podcasts", response_model=list[Show])
-def get_podcasts_for_partner(partner_id: str, admin: User = Depends(get_admin_user)):
+def get_podcasts_for_partner(partner_id: str, columns: Optional[tuple] = Depends(show_columns), admin: User = Depends(get_admin_user)):
     """(Admin Only) Retrieve all podcasts associated with a specific partner."""
     client = SqlClient()
-    podcasts, error = client.get_podcasts_for_partner(partner_id)
+    podcasts, error = client.get_podcasts_for_partner(partner_id, columns)
     if error:
         raise HTTPException(status_code=500, detail=str(error))
-    return podcasts
+    return render_shows(podcasts, columns)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,243 @@
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+# --- Configuration ---
+# Statements slower than this are logged with their normalized SQL; 0 disables the log.
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "500"))
+# When set, /metrics requires `Authorization: Bearer <METRICS_TOKEN>`.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+# Distinct normalized statements tracked; any beyond this are counted as "other".
+METRICS_MAX_STATEMENTS = int(os.environ.get("METRICS_MAX_STATEMENTS", "500"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+slow_query_log = logging.getLogger("slow_query")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.extend(self._samples(label_values, value))
+        return lines
+
+    def _samples(self, label_values, value) -> list:
+        return [f"{self.name}{_labels(self.label_names, label_values)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, label_values, value) -> list:
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = f'le="{_number(bound)}"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, label_values, le)} {cumulative}")
+        labels = _labels(self.label_names, label_values)
+        lines.append(f"{self.name}_sum{labels} {_number(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REGISTRY = []
+
+# --- Database ---
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "Statement execution time, by normalized statement.", ("statement",))
+DB_QUERY_ROWS = Histogram(
+    "db_query_rows", "Rows returned by reads, or affected by writes, by normalized statement.", ("statement",), ROW_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "Failed statements, by normalized statement and error class.", ("statement", "error"))
+DB_SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.", ("statement",))
+DB_POOL_ACQUIRE_SECONDS = Histogram("db_pool_acquire_seconds", "Time spent waiting for a pooled connection.", ("pool",))
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Connection checkouts that timed out.", ("pool",))
+DB_POOL_CONNECTIONS = Gauge("db_pool_connections", "Open connections in the sync pool, by state.", ("state",))
+DB_POOL_WAITING = Gauge("db_pool_waiting", "Callers queued for a connection from the sync pool.")
+DB_TRANSACTIONS = Counter("db_transactions_total", "Unit-of-work transactions, by outcome.", ("outcome",))
+DB_TRANSACTION_SECONDS = Histogram("db_transaction_duration_seconds", "Unit-of-work transaction time, by outcome.", ("outcome",))
+DB_QUERY_CACHE_LOOKUPS = Counter("db_query_cache_lookups_total", "Compiled statement lookups, by result (hit or miss).", ("result",))
+DB_PREPARED_STATEMENTS = Counter(
+    "db_prepared_statements_total", "Server-side prepared statement operations (prepare, execute, reprepare).", ("operation",)
+)
+DB_READS = Counter("db_reads_total", "Reads eligible for a replica, by where they ran.", ("target",))
+DB_REPLICA_LAG = Gauge("db_replica_lag_seconds", "Replication lag at the last check, or -1 if unknown.", ("replica",))
+DB_REPLICA_HEALTHY = Gauge("db_replica_healthy", "1 while a read replica takes reads, 0 while it is ejected.", ("replica",))
+DB_REPLICA_EJECTIONS = Counter("db_replica_ejections_total", "Times a read replica was taken out of rotation.", ("replica",))
+
+# --- HTTP ---
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency until the response body is sent, by route template.",
+    ("method", "route", "status"),
+)
+
+_SPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r"(?<![\w`])-?\d+(?:\.\d+)?")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"(VALUES \(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.IGNORECASE)
+_SELECT_LIST = re.compile(r"^SELECT (?!\.\.\. FROM).*? FROM ", re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(query: str) -> str:
+    """Reduce a statement to its shape: literals and placeholders become `?`,
+    placeholder lists and multi-row VALUES collapse, and the top-level select
+    list (which varies with `?fields=`) becomes `...`."""
+    sql = _SPACE.sub(" ", query).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    sql = _ROWS.sub(r"\1", sql)
+    return _SELECT_LIST.sub("SELECT ... FROM ", sql)
+
+
+_statements = set()
+_statements_lock = threading.Lock()
+
+
+def statement_label(query: str) -> str:
+    statement = normalize_sql(query)
+    if statement in _statements:
+        return statement
+    with _statements_lock:
+        if len(_statements) >= METRICS_MAX_STATEMENTS:
+            return "other"
+        _statements.add(statement)
+    return statement
+
+
+def observe_query(query: str, seconds: float, rows: int = None, error: Exception = None):
+    """Record one execution of `query`."""
+    statement = statement_label(query)
+    DB_QUERY_SECONDS.observe(seconds, statement)
+    if error is not None:
+        DB_QUERY_ERRORS.inc(statement, type(error).__name__)
+    elif rows is not None:
+        DB_QUERY_ROWS.observe(rows, statement)
+    if SLOW_QUERY_MS and seconds * 1000 >= SLOW_QUERY_MS:
+        DB_SLOW_QUERIES.inc(statement)
+        slow_query_log.warning("Slow query (%.1f ms, %s rows): %s", seconds * 1000, "?" if rows is None else rows, statement)
+
+
+def row_count(result, fetch: str, rows_affected: int) -> int:
+    if fetch == 'all':
+        return len(result)
+    if fetch == 'one':
+        return 1 if result else 0
+    return rows_affected
+
+
+def observe_transaction(outcome: str, seconds: float):
+    DB_TRANSACTIONS.inc(outcome)
+    DB_TRANSACTION_SECONDS.observe(seconds, outcome)
+
+
+def observe_pool(stats: dict):
+    DB_POOL_CONNECTIONS.set(stats["idle"], "idle")
+    DB_POOL_CONNECTIONS.set(stats["in_use"], "in_use")
+    DB_POOL_WAITING.set(stats["waiting"])
+
+
+def render() -> bytes:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class RequestMetricsMiddleware:
+    """Time every HTTP request under its route template (not the raw path),
+    so `/podcasts/{show_id}` is one series however many shows exist."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route on the shared scope.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, str(status))
@@ -0,0 +1,6 @@
+-- Version every show row so reads can carry strong ETags.
+-- `row_version` is bumped by every UPDATE issued through SqlClient;
+-- `updated_at` records when that happened.
+ALTER TABLE `shows`
+  ADD COLUMN `row_version` bigint unsigned NOT NULL DEFAULT '1',
+  ADD COLUMN `updated_at` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
@@ -0,0 +1,24 @@
+-- Ledger revenue pre-aggregated per show, calendar month and advertiser.
+-- Maintained incrementally by the ledger ingest (see revenue.py), so
+-- revenue reads never scan `ledger_transaction`. Ledger rows without a
+-- show or a payment date are not attributable and are left out.
+CREATE TABLE IF NOT EXISTS `show_revenue_rollup` (
+  `show_id` char(36) NOT NULL,
+  `month` date NOT NULL,
+  `advertiser_name` varchar(255) NOT NULL DEFAULT '',
+  `amount` decimal(18,2) NOT NULL DEFAULT '0.00',
+  `transactions` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`show_id`, `month`, `advertiser_name`),
+  KEY `month` (`month`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Backfill from whatever the ledger already holds.
+INSERT INTO `show_revenue_rollup` (`show_id`, `month`, `advertiser_name`, `amount`, `transactions`)
+SELECT `show_id`,
+       DATE_FORMAT(`payment_date`, '%Y-%m-01'),
+       LEFT(COALESCE(`advertiser_name`, ''), 255),
+       SUM(COALESCE(`amount_received`, 0)),
+       COUNT(*)
+FROM `ledger_transaction`
+WHERE `show_id` IS NOT NULL AND `payment_date` IS NOT NULL
+GROUP BY 1, 2, 3;
@@ -0,0 +1,17 @@
+-- Long-lived refresh tokens issued at login and rotated by /token/refresh.
+-- Only a SHA-256 of each token is stored; the unique index on it is the
+-- revocation check. A rotated token is kept (revoked, pointing at its
+-- successor) until it expires so that replaying it can be detected.
+CREATE TABLE IF NOT EXISTS `refresh_tokens` (
+  `id` char(32) NOT NULL,
+  `user_id` char(36) NOT NULL,
+  `token_hash` char(64) NOT NULL,
+  `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `expires_at` datetime NOT NULL,
+  `revoked_at` datetime DEFAULT NULL,
+  `replaced_by` char(32) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `token_hash` (`token_hash`),
+  KEY `user_id` (`user_id`),
+  CONSTRAINT `refresh_tokens_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
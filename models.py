@@ -27,6 +27,23 @@ class ShowType(str, Enum):
     Original = 'Original'
     Partner = 'Partner'
 
+class ExportFormat(str, Enum):
+    ndjson = 'ndjson'
+    csv = 'csv'
+
+class BulkMode(str, Enum):
+    atomic = 'atomic'
+    partial = 'partial'
+
+class RevenueGranularity(str, Enum):
+    month = 'month'
+    quarter = 'quarter'
+    year = 'year'
+
+class RevenueGroupBy(str, Enum):
+    show = 'show_id'
+    advertiser = 'advertiser_name'
+
 class Role(str, Enum):
     admin = 'admin'
     partner = 'partner'
@@ -79,6 +96,29 @@ class Partner(BaseModel):
     id: str
     user_id: Optional[str] = None
 
+class RevenuePoint(BaseModel):
+    period: str
+    show_id: Optional[str] = None
+    advertiser_name: Optional[str] = None
+    amount: float
+    transactions: int
+
+class PayoutLine(BaseModel):
+    period: str
+    partner_id: Optional[str] = None
+    lines: int
+    gross: float
+    partner_share: Optional[float] = None
+    evergreen_share: Optional[float] = None
+
+class PayoutReport(BaseModel):
+    payouts: List[PayoutLine]
+    # Revenue of shows without partners, and revenue no split rule applies to.
+    unassigned: List[PayoutLine]
+    unmatched: List[PayoutLine]
+    lines: int
+    seconds: float
+
 class RevenueSplit(BaseModel):
     id: str
     advertiser_name: Optional[str] = None
@@ -200,6 +240,22 @@ class ShowUpdate(BaseModel):
     minimum_guarantee: Optional[float] = None
     # Add other fields from Show model that can be updated
 
+class ShowBulkUpdate(ShowUpdate):
+    id: str
+
+class ShowBulkRequest(BaseModel):
+    # Items are validated one by one so a bad item can be reported by index.
+    items: List[dict]
+    mode: BulkMode = BulkMode.atomic
+
+class ShowPartnerLink(BaseModel):
+    show_id: str
+    partner_id: str
+
+class ShowPartnerBatch(BaseModel):
+    add: List[ShowPartnerLink] = []
+    remove: List[ShowPartnerLink] = []
+
 class PartnerCreate(BaseModel):
     name: str
     email: str
@@ -215,6 +271,10 @@ class UserLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
@@ -0,0 +1,113 @@
+import base64
+import bisect
+import binascii
+import json
+import os
+
+from models import Show
+
+# --- Configuration ---
+PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", "500"))
+
+# Columns a show listing may be ordered by. The primary key always breaks ties.
+SORTABLE_SHOW_COLUMNS = frozenset(name for name in Show.model_fields if name != "annual_usd")
+# ENUM columns in the schema. MySQL sorts these by declaration index but
+# compares them to a string as text, so they are sorted and sought as text.
+_ENUM_COLUMNS = frozenset({"media_type", "relationship_level", "show_type", "show_name_in_qbo"})
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for an unknown sort column or a cursor that cannot be decoded."""
+
+
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidPageRequest("Malformed cursor")
+    if not isinstance(data, dict):
+        raise InvalidPageRequest("Malformed cursor")
+    return data
+
+
+class Keyset:
+    """Keyset (seek) pagination over `shows` ordered by one column plus `id`.
+
+    `sort` names a column, prefixed with `-` for descending order. The cursor
+    records the sort column value and id of the last row on the previous page,
+    so each page is a bounded index range scan instead of an OFFSET.
+    """
+
+    def __init__(self, limit: int = None, cursor: str = None, sort: str = "id"):
+        self.sort = sort
+        self.descending = sort.startswith("-")
+        self.column = sort[1:] if self.descending else sort
+        if self.column not in SORTABLE_SHOW_COLUMNS:
+            raise InvalidPageRequest(f"Cannot sort by '{self.column}'")
+        # ORDER BY and the seek predicate must agree on the order, so both use this.
+        self._expr = f"CAST(`{self.column}` AS CHAR)" if self.column in _ENUM_COLUMNS else f"`{self.column}`"
+        self.limit = max(1, min(limit or PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX))
+
+        self.after = None
+        if cursor:
+            self.after = decode_cursor(cursor)
+            if self.after.get("s") != sort or "id" not in self.after:
+                raise InvalidPageRequest("Cursor does not belong to this sort order")
+
+    def where(self):
+        """Return the `(clause, params)` that skips rows up to the cursor, or `(None, ())`."""
+        if self.after is None:
+            return None, ()
+        last_id = self.after["id"]
+        if self.column == "id":
+            return ("`id` < %s" if self.descending else "`id` > %s"), (last_id,)
+
+        col = self._expr
+        value = self.after.get("v")
+        # MySQL sorts NULLs first ascending and last descending; the seek
+        # predicate has to follow the same order.
+        if self.descending:
+            if value is None:
+                return f"({col} IS NULL AND `id` < %s)", (last_id,)
+            return f"({col} < %s OR ({col} = %s AND `id` < %s) OR {col} IS NULL)", (value, value, last_id)
+        if value is None:
+            return f"(({col} IS NULL AND `id` > %s) OR {col} IS NOT NULL)", (last_id,)
+        return f"({col} > %s OR ({col} = %s AND `id` > %s))", (value, value, last_id)
+
+    def order_by(self) -> str:
+        direction = "DESC" if self.descending else "ASC"
+        if self.column == "id":
+            return f"ORDER BY `id` {direction}"
+        return f"ORDER BY {self._expr} {direction}, `id` {direction}"
+
+    def slice_ids(self, ids: list) -> list:
+        """Apply this page to an ascending list of ids when sorting by `id`."""
+        if self.after is not None:
+            last_id = self.after["id"]
+            if self.descending:
+                ids = ids[:bisect.bisect_left(ids, last_id)]
+            else:
+                ids = ids[bisect.bisect_right(ids, last_id):]
+        if self.descending:
+            return ids[::-1][:self.limit + 1]
+        return ids[:self.limit + 1]
+
+    def limit_clause(self):
+        """Return `(clause, params)`; the limit is bound so every page size shares one statement."""
+        # One extra row tells us whether another page follows.
+        return "LIMIT %s", (self.limit + 1,)
+
+    def page(self, rows):
+        """Trim the over-fetched row and return `(rows, next_cursor)`."""
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        last = rows[-1]
+        return rows, encode_cursor({"s": self.sort, "v": last.get(self.column), "id": last["id"]})
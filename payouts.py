@@ -0,0 +1,176 @@
+import time
+
+import numpy as np
+
+# Ledger amounts and split percentages are whole numbers in the schema;
+# shares are computed in float64 and rounded to cents on output.
+_CENTS = 2
+_EPOCH = np.datetime64("1970-01-01", "D")
+# Rule keys combine an advertiser code with a day number; days fit well below this.
+_DAY_SPAN = 1 << 20
+
+
+def _advertiser_key(name) -> str:
+    # Match QuickBooks customer names to split rules the way MySQL's
+    # case-insensitive collation would.
+    return (name or "").strip().casefold()
+
+
+def _days(dates) -> np.ndarray:
+    return (np.array(dates, dtype="datetime64[D]") - _EPOCH).astype(np.int64)
+
+
+def _period_labels(days: np.ndarray, granularity: str):
+    """Return `(codes, labels)`: a period code per day number and the label per code."""
+    months = np.array(days, dtype="datetime64[D]").astype("datetime64[M]").astype(np.int64)  # months since 1970-01
+    if granularity == "year":
+        keys = months // 12
+    elif granularity == "quarter":
+        keys = months // 3
+    else:
+        keys = months
+    unique, codes = np.unique(keys, return_inverse=True)
+    if granularity == "year":
+        labels = [str(1970 + int(k)) for k in unique]
+    elif granularity == "quarter":
+        labels = [f"{1970 + int(k) // 4}-Q{int(k) % 4 + 1}" for k in unique]
+    else:
+        labels = [f"{1970 + int(k) // 12}-{int(k) % 12 + 1:02d}" for k in unique]
+    return codes, labels
+
+
+def asof_join(line_keys: np.ndarray, line_days: np.ndarray, rule_keys: np.ndarray, rule_days: np.ndarray) -> np.ndarray:
+    """Index of the latest rule with the same key whose day is on or before each line's day, or -1.
+
+    Keys are non-negative integer codes. Rules are sorted on (key, day) once
+    and every line is located with one vectorized binary search.
+    """
+    if len(rule_keys) == 0:
+        return np.full(len(line_keys), -1, dtype=np.int64)
+    order = np.lexsort((rule_days, rule_keys))
+    combined = rule_keys[order] * _DAY_SPAN + rule_days[order]
+    probe = line_keys * _DAY_SPAN + line_days
+    pos = np.searchsorted(combined, probe, side="right") - 1
+    found = pos >= 0
+    pos = np.where(found, pos, 0)
+    found &= rule_keys[order][pos] == line_keys
+    return np.where(found, order[pos], -1)
+
+
+def compute_payouts(lines: list, rules: list, show_partners: dict, granularity: str = "month") -> dict:
+    """Split ledger revenue between partners and Evergreen.
+
+    `lines` are ledger rows (show_id, payment_date, amount_received,
+    advertiser_name); `rules` are revenue_split rows; `show_partners` maps a
+    show id to its partner ids. Each line takes the advertiser's rule in
+    force on its payment date, else the default rule (blank advertiser) in
+    force then. A line's partner share is divided evenly between the show's
+    partners. Lines with no applicable rule are reported as unmatched; shares
+    of shows without partners are reported as unassigned.
+    """
+    started = time.perf_counter()
+    lines = [line for line in lines if line.get("payment_date") is not None]
+    report = {"payouts": [], "unassigned": [], "unmatched": [], "lines": len(lines)}
+    if not lines:
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    # --- Columnar ledger ---
+    amounts = np.array([line.get("amount_received") or 0 for line in lines], dtype=np.float64)
+    days = _days([line["payment_date"] for line in lines])
+    # Normalize each distinct advertiser spelling once, not once per line.
+    raw_names, raw_codes = np.unique([line.get("advertiser_name") or "" for line in lines], return_inverse=True)
+    advertisers, name_codes = np.unique([_advertiser_key(name) for name in raw_names], return_inverse=True)
+    line_adv = name_codes[raw_codes]
+    show_ids, line_show = np.unique([line.get("show_id") or "" for line in lines], return_inverse=True)
+    period_codes, period_labels = _period_labels(days, granularity)
+
+    # --- As-of join against the split rules ---
+    rules = [rule for rule in rules if rule.get("effective_date") is not None]
+    adv_index = {name: i for i, name in enumerate(advertisers)}
+    specific = [rule for rule in rules if _advertiser_key(rule.get("advertiser_name")) in adv_index
+                and _advertiser_key(rule.get("advertiser_name"))]
+    defaults = [rule for rule in rules if not _advertiser_key(rule.get("advertiser_name"))]
+
+    def pct(rule_rows, field):
+        return np.array([float(rule.get(field) or 0) for rule in rule_rows])
+
+    match = asof_join(
+        line_adv.astype(np.int64), days,
+        np.array([adv_index[_advertiser_key(rule["advertiser_name"])] for rule in specific], dtype=np.int64),
+        _days([rule["effective_date"] for rule in specific]),
+    )
+    fallback = asof_join(
+        np.zeros(len(lines), dtype=np.int64), days,
+        np.zeros(len(defaults), dtype=np.int64), _days([rule["effective_date"] for rule in defaults]),
+    )
+    partner_pct = np.zeros(len(lines))
+    evergreen_pct = np.zeros(len(lines))
+    has_specific = match >= 0
+    use_default = ~has_specific & (fallback >= 0)
+    if specific:
+        partner_pct[has_specific] = pct(specific, "partner_pct")[match[has_specific]]
+        evergreen_pct[has_specific] = pct(specific, "evergreen_pct")[match[has_specific]]
+    if defaults:
+        partner_pct[use_default] = pct(defaults, "partner_pct")[fallback[use_default]]
+        evergreen_pct[use_default] = pct(defaults, "evergreen_pct")[fallback[use_default]]
+    matched = has_specific | use_default
+
+    partner_share = amounts * partner_pct / 100
+    evergreen_share = amounts * evergreen_pct / 100
+
+    n_periods = len(period_labels)
+    report["unmatched"] = _rows_by_period(
+        period_codes[~matched], n_periods, period_labels,
+        gross=amounts[~matched],
+    )
+
+    # --- Fan partner shares out over each show's partners ---
+    partner_lists = [sorted(show_partners.get(show_id, ())) if show_id else [] for show_id in show_ids]
+    partner_names, partner_flat = np.unique([p for plist in partner_lists for p in plist] or [""], return_inverse=True)
+    per_show = np.array([len(plist) for plist in partner_lists], dtype=np.int64)
+    show_offsets = np.concatenate(([0], np.cumsum(per_show)[:-1]))
+
+    line_partners = per_show[line_show]
+    assigned = matched & (line_partners > 0)
+    unassigned = matched & (line_partners == 0)
+    report["unassigned"] = _rows_by_period(
+        period_codes[unassigned], n_periods, period_labels,
+        gross=amounts[unassigned], partner_share=partner_share[unassigned], evergreen_share=evergreen_share[unassigned],
+    )
+
+    idx = np.flatnonzero(assigned)
+    counts = line_partners[idx]
+    rep = np.repeat(idx, counts)
+    within = np.arange(len(rep)) - np.repeat(np.cumsum(counts) - counts, counts)
+    partner_codes = partner_flat[show_offsets[line_show[rep]] + within]
+    split = line_partners[rep].astype(float)
+
+    keys = partner_codes * n_periods + period_codes[rep]
+    size = len(partner_names) * n_periods
+    sums = {
+        "gross": np.bincount(keys, weights=amounts[rep] / split, minlength=size),
+        "partner_share": np.bincount(keys, weights=partner_share[rep] / split, minlength=size),
+        "evergreen_share": np.bincount(keys, weights=evergreen_share[rep] / split, minlength=size),
+    }
+    line_counts = np.bincount(keys, minlength=size)
+    for key in np.flatnonzero(line_counts):
+        partner_code, period_code = divmod(int(key), n_periods)
+        report["payouts"].append({
+            "partner_id": str(partner_names[partner_code]),
+            "period": period_labels[period_code],
+            "lines": int(line_counts[key]),
+            **{name: round(float(values[key]), _CENTS) for name, values in sums.items()},
+        })
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def _rows_by_period(codes: np.ndarray, n_periods: int, labels: list, **columns) -> list:
+    counts = np.bincount(codes, minlength=n_periods)
+    sums = {name: np.bincount(codes, weights=values, minlength=n_periods) for name, values in columns.items()}
+    return [
+        {"period": labels[code], "lines": int(counts[code]),
+         **{name: round(float(values[code]), _CENTS) for name, values in sums.items()}}
+        for code in np.flatnonzero(counts)
+    ]
@@ -0,0 +1,229 @@
+import os
+import random
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+# --- Configuration ---
+# Off by default: the middleware is only installed when this is set, so
+# requests pay nothing for it otherwise.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Share of all requests profiled without being asked to, e.g. 0.001.
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+# Stack sampling period while a request is being profiled.
+PROFILING_INTERVAL_MS = float(os.environ.get("PROFILING_INTERVAL_MS", "5"))
+# Completed profiles kept in memory; the oldest are dropped first.
+PROFILING_RING_SIZE = int(os.environ.get("PROFILING_RING_SIZE", "50"))
+
+# Admins send this header (any value) to have their request profiled.
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Innermost "real" frames of threads that are merely waiting for work.
+_IDLE_FRAMES = {
+    ("thread.py", "_worker"),          # concurrent.futures workers (hash pool)
+    ("_asyncio.py", "run"),            # anyio worker threads (sync endpoints)
+    ("base_events.py", "_run_once"),   # event loop blocked in select()
+}
+_WAIT_MODULES = {"threading.py", "queue.py", "selectors.py"}
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+_SITE_PACKAGES = "site-packages" + os.sep
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if _SITE_PACKAGES in path:
+        path = path.split(_SITE_PACKAGES, 1)[1]
+    elif path.startswith(_STDLIB):
+        path = path[len(_STDLIB):]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path})".replace(";", ":")
+
+
+def _thread_label(name: str) -> str:
+    # "hashpool_3" and "AnyIO worker thread" collapse to one root per pool.
+    return name.rstrip("0123456789_-").replace(";", ":") or "thread"
+
+
+def _is_idle(frame) -> bool:
+    while frame is not None:
+        code = frame.f_code
+        module = os.path.basename(code.co_filename)
+        if module not in _WAIT_MODULES:
+            return (module, code.co_name) in _IDLE_FRAMES
+        frame = frame.f_back
+    return False
+
+
+def _fold(frame) -> list:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class _Sampler(threading.Thread):
+    """Samples the stacks of every busy thread until stopped.
+
+    Wall-clock sampling across threads is what attributes time to the right
+    place here: sync endpoints run on anyio worker threads, bcrypt on the hash
+    pool and pymysql blocks in socket reads, none of which a profiler hooked
+    to the event loop thread would see. Concurrent requests are sampled too,
+    so profiles are cleanest under light traffic.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopping = threading.Event()
+
+    def run(self):
+        names = {}
+        while not self._stopping.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident or _is_idle(frame):
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                root = _thread_label(names.get(thread_id, "thread"))
+                self.stacks[";".join([root] + _fold(frame))] += 1
+
+    def stop(self):
+        self._stopping.set()
+        self.join()
+
+
+class ProfileStore:
+    """Bounded ring of completed request profiles."""
+
+    def __init__(self, size: int = PROFILING_RING_SIZE):
+        self._profiles = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._active = False
+
+    def start(self):
+        """Return a new profile id, or None while another request is being profiled."""
+        with self._lock:
+            if self._active:
+                return None
+            self._active = True
+            profile_id = self._next_id
+            self._next_id += 1
+            return profile_id
+
+    def finish(self, profile: dict):
+        with self._lock:
+            self._active = False
+            if profile is not None:
+                self._profiles.append(profile)
+
+    def list(self) -> list:
+        with self._lock:
+            profiles = list(self._profiles)
+        return [{key: value for key, value in profile.items() if key != "stacks"} for profile in reversed(profiles)]
+
+    def get(self, profile_id: int):
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        return None
+
+
+profile_store = ProfileStore()
+
+
+def folded(profile: dict) -> str:
+    """Render a profile as folded stacks (`frame;frame;frame count` per line), the
+    input format of flamegraph.pl, inferno and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].most_common())
+
+
+def _bearer_token(headers) -> str:
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token.strip() if scheme.lower() == "bearer" else None
+    return None
+
+
+class ProfilingMiddleware:
+    """Profile a request when an admin asks for it with `X-Profile` or when it
+    is drawn at `PROFILING_SAMPLE_RATE`.
+
+    `authorize` is an async callable taking a bearer token and returning
+    whether it belongs to an admin. Profiled responses carry `X-Profile-Id`.
+    """
+
+    def __init__(self, app, authorize, store: ProfileStore = profile_store,
+                 sample_rate: float = PROFILING_SAMPLE_RATE, interval_ms: float = PROFILING_INTERVAL_MS):
+        self.app = app
+        self.authorize = authorize
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+
+    async def _trigger(self, scope):
+        headers = scope["headers"]
+        if any(name == PROFILE_HEADER for name, _ in headers):
+            token = _bearer_token(headers)
+            if token and await self.authorize(token):
+                return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = await self._trigger(scope)
+        profile_id = self.store.start() if trigger else None
+        if profile_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER, str(profile_id).encode()),
+                ])
+            await send(message)
+
+        sampler = _Sampler(self.interval)
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            route = getattr(scope.get("route"), "path", None)
+            profile = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status,
+                "trigger": trigger,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "interval_ms": self.interval * 1000,
+                "samples": sampler.samples,
+                "stacks": sampler.stacks,
+            }
+            self.store.finish(profile)
@@ -0,0 +1,53 @@
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import create_model
+
+from models import Show
+
+# Every column of `shows`, in table order.
+SHOW_COLUMNS = tuple(Show.model_fields)
+
+# Bumped on every write; selected alongside any projection so ETags can be computed.
+VERSION_COLUMN = "row_version"
+
+
+class InvalidFields(ValueError):
+    """Raised when a requested field is not a column of the Show model."""
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple]:
+    """Turn a `fields=a,b,c` query value into a validated column tuple.
+
+    `id` is always included and the result is in table order, so equivalent
+    requests share one cached partial model. Returns None for "all columns".
+    """
+    if not fields:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(names - set(SHOW_COLUMNS))
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(column for column in SHOW_COLUMNS if column == "id" or column in names)
+
+
+def show_select_list(columns: Optional[tuple], alias: str = None, extra: tuple = ()) -> str:
+    """Render the SELECT list for `columns` (plus any `extra` columns the query needs)."""
+    prefix = f"{alias}." if alias else ""
+    if columns is None:
+        return f"{prefix}*"
+    wanted = set(columns) | set(extra)
+    unknown = wanted - set(SHOW_COLUMNS)
+    if unknown:
+        # Column names are interpolated into SQL, so never trust the caller here.
+        raise InvalidFields(f"Unknown fields: {', '.join(sorted(unknown))}")
+    selected = [f"{prefix}`{column}`" for column in SHOW_COLUMNS if column in wanted]
+    selected.append(f"{prefix}`{VERSION_COLUMN}`")
+    return ", ".join(selected)
+
+
+@lru_cache(maxsize=256)
+def partial_show_model(columns: tuple):
+    """A Show model restricted to `columns`, keeping each field's type and default."""
+    definitions = {name: (Show.model_fields[name].annotation, Show.model_fields[name]) for name in columns}
+    return create_model("ShowPartial", **definitions)
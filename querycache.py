@@ -0,0 +1,214 @@
+import os
+import threading
+from collections import OrderedDict
+from enum import Enum
+
+import metrics
+from projection import SHOW_COLUMNS, InvalidFields, show_select_list
+
+# --- Configuration ---
+# Distinct statement shapes kept compiled; the least recently used is dropped.
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", "512"))
+# Run compiled statements as server-side prepared statements. Off by default:
+# pymysql and aiomysql only speak the text protocol, so this goes through SQL
+# PREPARE / SET / EXECUTE, an extra round trip per call that only pays off
+# when parsing and planning cost more than a round trip to the database.
+DB_SERVER_PREPARE = os.environ.get("DB_SERVER_PREPARE", "false").lower() in ("1", "true", "yes")
+# Prepared statements kept per pooled connection; the least recently used is deallocated.
+DB_PREPARED_PER_CONNECTION = int(os.environ.get("DB_PREPARED_PER_CONNECTION", "64"))
+
+# MySQL error for EXECUTE of a statement the session no longer has.
+ER_UNKNOWN_STMT_HANDLER = 1243
+
+_POSITION = {column: i for i, column in enumerate(SHOW_COLUMNS)}
+
+
+class CompiledQuery:
+    """SQL generated once for one statement shape."""
+
+    def __init__(self, number: int, label: str, sql: str):
+        self.name = f"evg_q{number}"
+        self.label = label
+        self.sql = sql
+        # The same statement with `?` markers, as PREPARE wants it.
+        self.prepared_sql = sql.replace("%s", "?")
+        self.uses = 0
+
+
+class QueryCache:
+    """LRU of compiled statements keyed by their normalized shape."""
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._by_sql = {}
+        self._compiled = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, label: str, build) -> CompiledQuery:
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                compiled.uses += 1
+                metrics.DB_QUERY_CACHE_LOOKUPS.inc("hit")
+                return compiled
+        sql = build()
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is None:
+                self._compiled += 1
+                compiled = CompiledQuery(self._compiled, label, sql)
+                self._entries[key] = compiled
+                self._by_sql[sql] = compiled
+                while len(self._entries) > self.maxsize:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._by_sql.pop(evicted.sql, None)
+            self.misses += 1
+            compiled.uses += 1
+        metrics.DB_QUERY_CACHE_LOOKUPS.inc("miss")
+        return compiled
+
+    def for_sql(self, sql: str):
+        """The compiled statement whose SQL is exactly `sql`, if it is cached."""
+        return self._by_sql.get(sql)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_sql.clear()
+
+    def stats(self, top: int = 10):
+        with self._lock:
+            lookups = self.hits + self.misses
+            shapes = sorted(self._entries.values(), key=lambda compiled: -compiled.uses)[:top]
+            return {
+                "size": len(self._entries),
+                "max_size": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "server_prepare": DB_SERVER_PREPARE,
+                "top_shapes": [{"shape": compiled.label, "uses": compiled.uses} for compiled in shapes],
+            }
+
+
+query_cache = QueryCache()
+
+
+def _canonical(keys, allowed) -> tuple:
+    """Validate column names and put them in table order, so equivalent calls share one entry."""
+    unknown = [key for key in keys if key not in allowed]
+    if unknown:
+        # Column names are interpolated into SQL, so never trust the caller here.
+        raise InvalidFields(f"Unknown fields: {', '.join(sorted(map(str, unknown)))}")
+    return tuple(sorted(keys, key=_POSITION.__getitem__))
+
+
+def _slots(count: int) -> int:
+    # IN lists are padded to a power of two so their lengths make few shapes.
+    return 1 << (count - 1).bit_length() if count else 0
+
+
+def _bind(value):
+    if isinstance(value, bool):
+        return 1 if value else 0
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def compile_show_select(filters: dict, keyset=None, columns: tuple = None, ids: list = None):
+    """Return `(compiled, values)` for a show listing with equality filters,
+    optional keyset paging, an optional column projection and an optional
+    primary-key list. `None` filter values are ignored."""
+    present = {key: value for key, value in filters.items() if value is not None}
+    keys = _canonical(present, _POSITION)
+    slots = _slots(len(ids)) if ids is not None else None
+    seek, seek_params = keyset.where() if keyset is not None else (None, ())
+    order_by = keyset.order_by() if keyset is not None else None
+    limit, limit_params = keyset.limit_clause() if keyset is not None else (None, ())
+
+    def build():
+        # The keyset needs its sort column back to build the next cursor.
+        extra = ("id", keyset.column) if keyset is not None else ("id",)
+        query = f"SELECT {show_select_list(columns, extra=extra)} FROM shows"
+        where_clauses = [f"`{key}` = %s" for key in keys]
+        if slots is not None:
+            where_clauses.append(f"`id` IN ({', '.join(['%s'] * slots)})")
+        if seek:
+            where_clauses.append(seek)
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
+        if keyset is not None:
+            query += f" {order_by} {limit}"
+        return query
+
+    label = f"select filters={','.join(keys) or '-'} fields={len(columns) if columns else '*'}"
+    if slots is not None:
+        label += f" ids={slots}"
+    if keyset is not None:
+        label += f" sort={keyset.sort}{' seek' if seek else ''}"
+    compiled = query_cache.get(("select", keys, columns, slots, seek, order_by, limit), label, build)
+
+    values = [_bind(present[key]) for key in keys]
+    if ids:
+        values.extend(ids)
+        values.extend([ids[-1]] * (slots - len(ids)))
+    values.extend(seek_params)
+    values.extend(limit_params)
+    return compiled, tuple(values)
+
+
+_UPDATABLE = {column for column in SHOW_COLUMNS if column != "id"}
+
+
+def compile_show_update(data: dict):
+    """Return `(compiled, values)` for an UPDATE of `data`'s columns of one show
+    (its id is the last value) that also bumps the row version."""
+    keys = _canonical(data, _UPDATABLE)
+
+    def build():
+        set_clause = ", ".join(f"`{key}` = %s" for key in keys)
+        return f"UPDATE shows SET {set_clause}, row_version = row_version + 1 WHERE id = %s"
+
+    compiled = query_cache.get(("update", keys), f"update {','.join(keys)}", build)
+    return compiled, tuple(data[key] for key in keys)
+
+
+def prepared_registry(connection) -> OrderedDict:
+    """Names of the statements prepared in `connection`'s session, least recently used first."""
+    registry = getattr(connection, "_evergreen_prepared", None)
+    if registry is None:
+        registry = OrderedDict()
+        connection._evergreen_prepared = registry
+    return registry
+
+
+def prepared_steps(registry: OrderedDict, compiled: CompiledQuery, params) -> list:
+    """The `(sql, args)` statements that run `compiled` with `params` as a prepared
+    statement; the last one produces the result. Updates `registry`."""
+    steps = []
+    name = compiled.name
+    if name in registry:
+        registry.move_to_end(name)
+    else:
+        while len(registry) >= DB_PREPARED_PER_CONNECTION:
+            evicted, _ = registry.popitem(last=False)
+            steps.append((f"DEALLOCATE PREPARE {evicted}", None))
+        # Re-preparing a name replaces the old statement, so this is safe
+        # even if the registry lost track of one.
+        steps.append((f"PREPARE {name} FROM %s", (compiled.prepared_sql,)))
+        registry[name] = True
+        metrics.DB_PREPARED_STATEMENTS.inc("prepare")
+    if params:
+        variables = [f"@{name}_{i}" for i in range(len(params))]
+        steps.append(("SET " + ", ".join(f"{variable} = %s" for variable in variables), tuple(params)))
+        steps.append((f"EXECUTE {name} USING {', '.join(variables)}", None))
+    else:
+        steps.append((f"EXECUTE {name}", None))
+    metrics.DB_PREPARED_STATEMENTS.inc("execute")
+    return steps
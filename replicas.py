@@ -0,0 +1,292 @@
+import contextvars
+import itertools
+import math
+import os
+import re
+import threading
+import time
+
+import pymysql
+
+import metrics
+from dbpool import ConnectionPool, PoolTimeoutError
+
+# --- Configuration ---
+# Comma-separated read replicas, each `host` or `host:port`. Empty (the
+# default) sends every statement to DB_HOST.
+DB_REPLICA_HOSTS = [host.strip() for host in os.environ.get("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+# A replica further behind the primary than this many seconds stops taking
+# reads, and rejoins once it is back under half of it.
+DB_REPLICA_MAX_LAG = float(os.environ.get("DB_REPLICA_MAX_LAG", "5"))
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", "2"))
+# Seconds before an unreachable replica counts as failed instead of hanging the
+# caller: opening a connection, waiting on a read (which should cover the
+# slowest legitimate query) and the whole lag check.
+DB_REPLICA_CONNECT_TIMEOUT = float(os.environ.get("DB_REPLICA_CONNECT_TIMEOUT", "2"))
+DB_REPLICA_READ_TIMEOUT = float(os.environ.get("DB_REPLICA_READ_TIMEOUT", "30"))
+DB_REPLICA_CHECK_TIMEOUT = float(os.environ.get("DB_REPLICA_CHECK_TIMEOUT", "2"))
+# After a client writes, its reads go to the primary for this many seconds so
+# it sees its own writes; it should comfortably exceed normal replica lag.
+DB_STICKY_PRIMARY_SECONDS = float(os.environ.get("DB_STICKY_PRIMARY_SECONDS", "5"))
+
+STICKY_COOKIE = "db_primary_until"
+
+_LOCKING_READ = re.compile(r"\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b", re.IGNORECASE)
+# Server errors that say the replica itself is unusable: too many connections,
+# shutting down, access denied. Client errors (2000-2999) are lost or refused connections.
+_UNAVAILABLE = {1040, 1045, 1053}
+
+
+def is_read_query(query: str) -> bool:
+    """Whether `query` is a plain SELECT that a replica can answer."""
+    return query.lstrip()[:6].upper() == "SELECT" and not _LOCKING_READ.search(query)
+
+
+def is_write_query(query: str) -> bool:
+    """Whether `query` may change data; locking reads do not."""
+    return query.lstrip()[:6].upper() != "SELECT"
+
+
+def is_unavailable(error: pymysql.Error) -> bool:
+    """Whether `error` means the server could not be used, rather than the statement failed."""
+    if isinstance(error, pymysql.err.InterfaceError):
+        return True
+    code = error.args[0] if error.args else None
+    return isinstance(code, int) and (2000 <= code < 3000 or code in _UNAVAILABLE)
+
+
+# --- Read-your-writes ---
+
+class _Routing:
+    __slots__ = ("primary_until", "wrote")
+
+    def __init__(self, primary_until: float = 0.0):
+        self.primary_until = primary_until
+        self.wrote = False
+
+
+# One per request, set by ReadYourWritesMiddleware. It is mutated rather than
+# replaced so that writes made on threadpool threads are seen by the request.
+_routing = contextvars.ContextVar("db_routing", default=None)
+
+
+def note_write(window: float = DB_STICKY_PRIMARY_SECONDS):
+    """Keep the current request's (and its client's) reads on the primary for `window` seconds."""
+    state = _routing.get()
+    if state is not None:
+        state.primary_until = max(state.primary_until, time.time() + window)
+        state.wrote = True
+
+
+def reads_from_primary() -> bool:
+    state = _routing.get()
+    return state is not None and state.primary_until > time.time()
+
+
+def _cookie_until(headers, window: float) -> float:
+    for name, value in headers:
+        if name != b"cookie":
+            continue
+        for pair in value.decode("latin-1").split(";"):
+            key, _, raw = pair.strip().partition("=")
+            if key == STICKY_COOKIE:
+                try:
+                    until = float(raw)
+                except ValueError:
+                    return 0.0
+                # Never trust a client to pin itself to the primary for longer than one window.
+                return min(until, time.time() + window)
+    return 0.0
+
+
+class ReadYourWritesMiddleware:
+    """Route a client's reads to the primary for `window` seconds after it writes.
+
+    Within a request the window starts at the write. Across requests it is
+    carried in a short-lived cookie, so it holds whichever worker process
+    serves the next request.
+    """
+
+    def __init__(self, app, window: float = DB_STICKY_PRIMARY_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = _Routing(_cookie_until(scope["headers"], self.window))
+        token = _routing.set(state)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                cookie = (f"{STICKY_COOKIE}={state.primary_until:.3f}; Max-Age={math.ceil(self.window)}; "
+                          f"Path=/; HttpOnly; SameSite=Lax")
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _routing.reset(token)
+
+
+# --- Replicas ---
+
+class Replica:
+    """One read replica: its connection pool and its last health check."""
+
+    def __init__(self, address: str, host: str, port: int, connect, pool_options: dict):
+        self.address = address
+        self.host = host
+        self.port = port
+        self._connect = connect
+        self.pool = ConnectionPool(
+            lambda: connect(host, port, connect_timeout=DB_REPLICA_CONNECT_TIMEOUT, read_timeout=DB_REPLICA_READ_TIMEOUT),
+            **pool_options,
+        )
+        # Out of rotation until the first check has measured its lag.
+        self.healthy = False
+        self.lag = None
+        self.reason = "not checked yet"
+        self.checked_at = None
+        self.ejections = 0
+        self._probe = None
+
+    def _measure_lag(self):
+        if self._probe is None:
+            self._probe = self._connect(self.host, self.port, connect_timeout=DB_REPLICA_CHECK_TIMEOUT,
+                                        read_timeout=DB_REPLICA_CHECK_TIMEOUT, write_timeout=DB_REPLICA_CHECK_TIMEOUT)
+        with self._probe.cursor() as cursor:
+            for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                                      ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+                try:
+                    cursor.execute(statement)
+                except pymysql.err.ProgrammingError:
+                    # MySQL before 8.0.22 and MariaDB only know the older name.
+                    continue
+                row = cursor.fetchone()
+                if row is None:
+                    return None, "not configured as a replica"
+                if row.get(column) is None:
+                    return None, "replication is not running"
+                return float(row[column]), None
+        return None, "replication status is unavailable"
+
+    def check(self, max_lag: float):
+        """Measure replication lag and take the replica in or out of rotation."""
+        try:
+            lag, reason = self._measure_lag()
+        except pymysql.Error as e:
+            self.close_probe()
+            lag, reason = None, f"unreachable: {e}"
+        if reason is None:
+            # Hysteresis: an ejected replica must catch up well below the limit to rejoin.
+            limit = max_lag if self.healthy else max_lag / 2
+            if lag > limit:
+                reason = f"{lag:.0f}s behind the primary"
+        self.lag = lag
+        self.checked_at = time.time()
+        if reason is None:
+            self.healthy, self.reason = True, None
+            metrics.DB_REPLICA_HEALTHY.set(1, self.address)
+        else:
+            self.eject(reason)
+        metrics.DB_REPLICA_LAG.set(lag if lag is not None else -1, self.address)
+
+    def eject(self, reason: str):
+        if self.healthy:
+            self.ejections += 1
+            metrics.DB_REPLICA_EJECTIONS.inc(self.address)
+            print(f"Replica {self.address} out of rotation: {reason}")
+        self.healthy = False
+        self.reason = reason
+        metrics.DB_REPLICA_HEALTHY.set(0, self.address)
+
+    def close_probe(self):
+        if self._probe is not None:
+            try:
+                self._probe.close()
+            except Exception:
+                pass
+            self._probe = None
+
+    def stats(self):
+        return {
+            "address": self.address,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "reason": self.reason,
+            "checked_at": self.checked_at,
+            "ejections": self.ejections,
+            "pool": self.pool.stats(),
+        }
+
+
+class ReplicaSet:
+    """Read replicas, load-balanced round robin over the healthy ones.
+
+    `connect(host, port, **options)` opens one connection, passing pymysql
+    timeout options through. A background thread, started on first use,
+    checks every replica's lag every `check_interval` seconds.
+    """
+
+    def __init__(self, addresses: list, default_port: int, connect, pool_options: dict,
+                 max_lag: float = DB_REPLICA_MAX_LAG, check_interval: float = DB_REPLICA_CHECK_INTERVAL):
+        self.replicas = []
+        for address in addresses:
+            host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+            self.replicas.append(Replica(address, host, int(port or default_port), connect, pool_options))
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._next = itertools.count()
+        self._checker = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def _ensure_checker(self):
+        if self._checker is None:
+            with self._lock:
+                if self._checker is None:
+                    self._checker = threading.Thread(target=self._check_loop, name="replica-check", daemon=True)
+                    self._checker.start()
+
+    def _check_loop(self):
+        while True:
+            for replica in self.replicas:
+                replica.check(self.max_lag)
+            if self._stopping.wait(self.check_interval):
+                return
+
+    def choose(self):
+        """The replica the next read should use, or None to read from the primary."""
+        self._ensure_checker()
+        if reads_from_primary():
+            metrics.DB_READS.inc("primary_sticky")
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            metrics.DB_READS.inc("primary_no_replica")
+            return None
+        metrics.DB_READS.inc("replica")
+        return healthy[next(self._next) % len(healthy)]
+
+    def failed(self, replica: Replica, error: pymysql.Error):
+        """Record a read that could not run on `replica`; the caller retries it on the primary."""
+        metrics.DB_READS.inc("primary_fallback")
+        # A busy pool is not a sick replica.
+        if not isinstance(error, PoolTimeoutError):
+            replica.eject(f"read failed: {error}")
+
+    def close(self):
+        self._stopping.set()
+        for replica in self.replicas:
+            replica.pool.close()
+            replica.close_probe()
+
+    def stats(self):
+        return {
+            "max_lag_seconds": self.max_lag,
+            "sticky_primary_seconds": DB_STICKY_PRIMARY_SECONDS,
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
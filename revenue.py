@@ -0,0 +1,103 @@
+from collections import defaultdict
+from decimal import Decimal
+
+ROLLUP_TABLE = "show_revenue_rollup"
+
+# SQL for the reporting period of a rollup row, keyed by granularity.
+PERIOD_EXPRESSIONS = {
+    "month": "DATE_FORMAT(`month`, '%%Y-%%m')",
+    "quarter": "CONCAT(YEAR(`month`), '-Q', QUARTER(`month`))",
+    "year": "CAST(YEAR(`month`) AS CHAR)",
+}
+
+# Portfolio results can additionally be split by one of these rollup columns.
+GROUP_COLUMNS = ("show_id", "advertiser_name")
+
+_ADVERTISER_MAX = 255
+
+_APPLY_SQL = (
+    f"INSERT INTO {ROLLUP_TABLE} (show_id, month, advertiser_name, amount, transactions) "
+    "VALUES (%s, %s, %s, %s, %s) AS delta "
+    "ON DUPLICATE KEY UPDATE amount = amount + delta.amount, transactions = transactions + delta.transactions"
+)
+
+_REBUILD_SQL = (
+    f"INSERT INTO {ROLLUP_TABLE} (show_id, month, advertiser_name, amount, transactions) "
+    "SELECT show_id, DATE_FORMAT(payment_date, '%Y-%m-01'), LEFT(COALESCE(advertiser_name, ''), 255), "
+    "SUM(COALESCE(amount_received, 0)), COUNT(*) "
+    "FROM ledger_transaction WHERE show_id IS NOT NULL AND payment_date IS NOT NULL "
+    "GROUP BY 1, 2, 3"
+)
+
+
+def _rollup_key(row: dict):
+    """The rollup cell a ledger row counts towards, or None when it is not attributable."""
+    if row.get("show_id") is None or row.get("payment_date") is None:
+        return None
+    month = row["payment_date"].replace(day=1)
+    return row["show_id"], month, (row.get("advertiser_name") or "")[:_ADVERTISER_MAX]
+
+
+def rollup_delta(old_rows, new_rows) -> list:
+    """Net change to the rollup when ledger rows `old_rows` are replaced by `new_rows`.
+
+    Rows are dicts of stored ledger values; returns
+    `[(show_id, month, advertiser_name, amount, transactions), ...]` without no-op cells.
+    """
+    cells = defaultdict(lambda: [Decimal(0), 0])
+    for rows, sign in ((old_rows, -1), (new_rows, 1)):
+        for row in rows:
+            key = _rollup_key(row)
+            if key is None:
+                continue
+            cell = cells[key]
+            cell[0] += sign * (row.get("amount_received") or Decimal(0))
+            cell[1] += sign
+    return [key + (amount, count) for key, (amount, count) in cells.items() if amount or count]
+
+
+def apply_rollup_delta(tx, delta: list):
+    """Add `delta` to the rollup inside the caller's transaction."""
+    if delta:
+        tx.executemany(_APPLY_SQL, delta)
+
+
+def rebuild_rollup(tx):
+    """Recompute the whole rollup from the ledger inside the caller's transaction."""
+    tx.execute(f"DELETE FROM {ROLLUP_TABLE}")
+    _, rows_affected = tx.execute(_REBUILD_SQL)
+    return rows_affected
+
+
+def revenue_query(granularity: str, show_id: str = None, start=None, end=None, group_by: str = None):
+    """Build the rollup SELECT for one show (or the whole portfolio) per period.
+
+    Reads touch one rollup row per show, month and advertiser in range, so
+    their cost does not depend on the size of the ledger.
+    """
+    period = PERIOD_EXPRESSIONS[granularity]
+    select = [f"{period} AS period"]
+    group = ["period"]
+    if group_by is not None:
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group revenue by '{group_by}'")
+        select.append(f"`{group_by}`")
+        group.append(f"`{group_by}`")
+    select += ["SUM(amount) AS amount", "SUM(transactions) AS transactions"]
+
+    where, values = [], []
+    if show_id is not None:
+        where.append("show_id = %s")
+        values.append(show_id)
+    if start is not None:
+        where.append("`month` >= %s")
+        values.append(start.replace(day=1))
+    if end is not None:
+        where.append("`month` <= %s")
+        values.append(end)
+
+    query = f"SELECT {', '.join(select)} FROM {ROLLUP_TABLE}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += f" GROUP BY {', '.join(group)} HAVING SUM(transactions) <> 0 ORDER BY {', '.join(group)}"
+    return query, tuple(values)
@@ -0,0 +1,54 @@
+#!/bin/sh
+# Start replication from `db` to `db_replica` (see docker-compose.replica.yml).
+# Run once, after both containers have finished loading the dump.
+set -eu
+
+COMPOSE="docker compose -f docker-compose.yml -f docker-compose.replica.yml"
+ROOT_PASSWORD="${MYSQL_ROOT_PASSWORD:-rootpassword}"
+REPL_PASSWORD="${REPL_PASSWORD:-replpassword}"
+
+sql() {
+    $COMPOSE exec -T "$1" mysql -h127.0.0.1 -uroot -p"$ROOT_PASSWORD" -e "$2"
+}
+
+wait_ready() {
+    # The entrypoint's init server does not listen on TCP, so this only
+    # succeeds once the dump and every migration have been applied.
+    printf "Waiting for %s" "$1"
+    until sql "$1" "SELECT 1 FROM evergreen.refresh_tokens LIMIT 1" >/dev/null 2>&1; do
+        printf "."
+        sleep 2
+    done
+    echo
+}
+
+wait_ready db
+wait_ready db_replica
+
+# Both servers loaded the same data on their own, so the replica needs none of
+# the primary's history: clear both binlogs and replicate from here on.
+sql db "
+CREATE USER IF NOT EXISTS 'repl'@'%' IDENTIFIED WITH mysql_native_password BY '$REPL_PASSWORD';
+GRANT REPLICATION SLAVE ON *.* TO 'repl'@'%';
+RESET MASTER;"
+
+# The app user needs REPLICATION CLIENT for the lag check (SHOW REPLICA STATUS).
+sql db_replica "
+STOP REPLICA;
+GRANT REPLICATION CLIENT ON *.* TO 'user'@'%';
+RESET MASTER;
+CHANGE REPLICATION SOURCE TO SOURCE_HOST='db', SOURCE_USER='repl', SOURCE_PASSWORD='$REPL_PASSWORD', SOURCE_AUTO_POSITION=1;
+START REPLICA;
+SET GLOBAL super_read_only = ON;"
+
+sql db_replica "SHOW REPLICA STATUS\G" | grep -E "Replica_(IO|SQL)_Running:|Seconds_Behind_Source:"
+
+cat <<EOF
+
+Replication is running. To watch the app eject a lagging replica (see
+"replicas" in GET /admin/stats):
+
+  $COMPOSE exec db_replica mysql -uroot -p$ROOT_PASSWORD -e "STOP REPLICA; CHANGE REPLICATION SOURCE TO SOURCE_DELAY=30; START REPLICA;"
+
+and write something through the API. SOURCE_DELAY=0 brings it back.
+EOF
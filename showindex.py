@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from enum import Enum
+
+# --- Configuration ---
+SHOW_INDEX_ENABLED = os.environ.get("SHOW_INDEX_ENABLED", "0").lower() in ("1", "true", "yes")
+# Full reload interval in seconds; catches writes made by other worker processes.
+SHOW_INDEX_MAX_AGE = float(os.environ.get("SHOW_INDEX_MAX_AGE", "300"))
+# Largest id list a match is handed to MySQL as; bigger matches are left to
+# the query itself, which keeps statements well under the placeholder limit.
+SHOW_INDEX_MAX_IDS = int(os.environ.get("SHOW_INDEX_MAX_IDS", "1000"))
+
+# Boolean and enum columns of `shows` answered from bitmaps.
+INDEXED_COLUMNS = (
+    "media_type",
+    "tentpole",
+    "relationship_level",
+    "show_type",
+    "has_sponsorship_revenue",
+    "has_non_evergreen_revenue",
+    "requires_partner_access",
+    "has_branded_revenue",
+    "has_marketing_revenue",
+    "has_web_mgmt_revenue",
+    "is_original",
+)
+
+
+def _normalize(value):
+    """Map filter values and raw column values onto the same key space."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _bit_positions(bitmap: int):
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+class _Snapshot:
+    __slots__ = ("slots", "ids", "free", "values", "bitmaps")
+
+    def __init__(self):
+        self.slots = {}      # show id -> slot
+        self.ids = []        # slot -> show id (None when free)
+        self.free = []       # reusable slots
+        self.values = []     # slot -> indexed values, so an update can clear its old bits
+        self.bitmaps = {}    # (column, value) -> int bitmap of slots
+
+    def upsert(self, row):
+        show_id = row["id"]
+        slot = self.slots.get(show_id)
+        if slot is None:
+            slot = self.free.pop() if self.free else len(self.ids)
+            if slot == len(self.ids):
+                self.ids.append(None)
+                self.values.append(None)
+            self.slots[show_id] = slot
+            self.ids[slot] = show_id
+        else:
+            self._clear(slot)
+        bit = 1 << slot
+        values = tuple(_normalize(row.get(column)) for column in INDEXED_COLUMNS)
+        for column, value in zip(INDEXED_COLUMNS, values):
+            key = (column, value)
+            self.bitmaps[key] = self.bitmaps.get(key, 0) | bit
+        self.values[slot] = values
+
+    def remove(self, show_id):
+        slot = self.slots.pop(show_id, None)
+        if slot is None:
+            return
+        self._clear(slot)
+        self.ids[slot] = None
+        self.values[slot] = None
+        self.free.append(slot)
+
+    def _clear(self, slot):
+        mask = ~(1 << slot)
+        for column, value in zip(INDEXED_COLUMNS, self.values[slot]):
+            key = (column, value)
+            self.bitmaps[key] &= mask
+
+
+class ReloadingIndex:
+    """Base for in-process indexes derived from `shows`.
+
+    Subclasses provide `_new_snapshot()`, returning an object with
+    `upsert(row)` and `remove(show_id)`. The snapshot is built from `loader()`
+    on first use, kept current by the SqlClient show observers, and rebuilt
+    from scratch once it is older than `max_age` seconds, which also picks up
+    writes made by other worker processes.
+    """
+
+    def __init__(self, loader, max_age: float):
+        self._loader = loader
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._loading = False
+        self._replay = []
+        self._queries = 0
+        self._loads = 0
+        self._upserts = 0
+        self._removes = 0
+
+    def _new_snapshot(self):
+        raise NotImplementedError
+
+    def load(self):
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+            self._replay = []
+        try:
+            rows = self._loader()
+            snapshot = self._new_snapshot()
+            for row in rows:
+                snapshot.upsert(row)
+            with self._lock:
+                # Writes that landed while the loader was reading may be missing from it.
+                for op, arg in self._replay:
+                    getattr(snapshot, op)(arg)
+                self._snapshot = snapshot
+                self._loaded_at = time.monotonic()
+                self._loads += 1
+        finally:
+            with self._lock:
+                self._loading = False
+                self._replay = []
+
+    def upsert(self, row: dict):
+        self._apply("upsert", row)
+
+    def remove(self, show_id: str):
+        self._apply("remove", show_id)
+
+    def _current(self):
+        """Return the live snapshot, (re)loading it first when missing or stale.
+
+        Returns None while no snapshot is available yet (another thread is
+        still loading the first one); callers should fall back to SQL.
+        Call without holding the lock, then read the snapshot under it.
+        """
+        if self._snapshot is None or time.monotonic() - self._loaded_at > self.max_age:
+            self.load()
+        return self._snapshot
+
+    def stats(self):
+        with self._lock:
+            return {
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._snapshot else None,
+                "loads": self._loads,
+                "queries": self._queries,
+                "upserts": self._upserts,
+                "removes": self._removes,
+            }
+
+    def _apply(self, op, arg):
+        with self._lock:
+            if op == "upsert":
+                self._upserts += 1
+            else:
+                self._removes += 1
+            if self._loading:
+                self._replay.append((op, arg))
+            if self._snapshot is not None:
+                getattr(self._snapshot, op)(arg)
+
+
+class ShowIndex(ReloadingIndex):
+    """In-process columnar snapshot of the flag and enum columns of `shows`.
+
+    Each (column, value) pair owns a bitmap over row slots, so an equality
+    filter on several columns is a handful of integer ANDs instead of a table
+    scan. `match` returns the matching show ids; the caller fetches the rows
+    by primary key.
+    """
+
+    def __init__(self, loader, max_age: float = SHOW_INDEX_MAX_AGE):
+        super().__init__(loader, max_age)
+
+    def _new_snapshot(self):
+        return _Snapshot()
+
+    def match(self, filters: dict):
+        """Return the sorted ids of shows matching every equality filter in `filters`,
+        or None when no snapshot is available yet."""
+        if self._current() is None:
+            return None
+        with self._lock:
+            snapshot = self._snapshot
+            self._queries += 1
+            bitmap = None
+            for column, value in filters.items():
+                current = snapshot.bitmaps.get((column, _normalize(value)), 0)
+                bitmap = current if bitmap is None else bitmap & current
+                if not bitmap:
+                    return []
+            if bitmap is None:
+                return sorted(snapshot.slots)
+            return sorted(snapshot.ids[slot] for slot in _bit_positions(bitmap))
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            snapshot = self._snapshot
+            stats["shows"] = len(snapshot.slots) if snapshot else 0
+            stats["bitmaps"] = len(snapshot.bitmaps) if snapshot else 0
+        return stats
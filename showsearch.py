@@ -0,0 +1,191 @@
+import math
+import os
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+from showindex import ReloadingIndex
+
+# --- Configuration ---
+SHOW_SEARCH_MAX_AGE = float(os.environ.get("SHOW_SEARCH_MAX_AGE", "300"))
+# Trigram similarity (0-1) a query word needs with a word of a field to count
+# as a typo match, and the average word score a field needs to match at all.
+SHOW_SEARCH_MIN_OVERLAP = float(os.environ.get("SHOW_SEARCH_MIN_OVERLAP", "0.5"))
+
+# Searchable columns of `shows` and how much a match in each is worth.
+SEARCH_FIELDS = (
+    ("title", 1.0),
+    ("show_name_in_qbo", 0.8),
+    ("show_host_contact", 0.5),
+    ("show_primary_contact", 0.5),
+    ("evergreen_production_staff_name", 0.4),
+)
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation to single spaces."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(_WORD.findall(text))
+
+
+def trigrams(text: str) -> set:
+    """Word trigrams padded like pg_trgm, so short prefixes still produce grams."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@lru_cache(maxsize=65536)
+def _word_grams(word: str) -> frozenset:
+    return frozenset(trigrams(word))
+
+
+def _word_score(word: str, grams: frozenset, text_words: list) -> float:
+    """How well the best word of a field matches one query word."""
+    best = 0.0
+    for candidate in text_words:
+        if candidate == word:
+            return 1.0
+        if candidate.startswith(word):
+            score = 0.9
+        elif word in candidate:
+            score = 0.8
+        else:
+            candidate_grams = _word_grams(candidate)
+            score = 2 * len(grams & candidate_grams) / (len(grams) + len(candidate_grams))
+            if score < SHOW_SEARCH_MIN_OVERLAP:
+                continue
+        best = max(best, score)
+    return best
+
+
+def _match_score(query: str, words: list, word_grams: list, text: str) -> float:
+    """Score a field against the query: whole-query exact, prefix, word-start
+    and substring hits rank first, then a per-word match normalized by the
+    number of query words (typo-tolerant, any word order)."""
+    if text == query:
+        return 1.0
+    if text.startswith(query):
+        return 0.9
+    if f" {query}" in f" {text}":
+        return 0.8  # some word starts with the query
+    if query in text:
+        return 0.7
+    text_words = text.split()
+    coverage = sum(_word_score(word, grams, text_words) for word, grams in zip(words, word_grams)) / len(words)
+    return 0.65 * coverage if coverage >= SHOW_SEARCH_MIN_OVERLAP else 0.0
+
+
+class _SearchSnapshot:
+    """Trigram inverted index over the searchable fields of every show.
+
+    Each (show, field) pair is a document with an integer id. Postings are
+    compact arrays of document ids; a changed show gets fresh documents and its
+    old ones are tombstoned, and tombstones are dropped on the next full load.
+    """
+
+    def __init__(self):
+        self.postings = {}            # trigram -> array of doc ids
+        self.doc_show = []            # doc id -> show id
+        self.doc_field = array("B")   # doc id -> index into SEARCH_FIELDS
+        self.doc_text = []            # doc id -> normalized text
+        self.alive = bytearray()      # doc id -> 1 while current
+        self.show_docs = {}           # show id -> doc ids
+        self.titles = {}              # show id -> normalized title, for tie-breaking
+
+    def upsert(self, row):
+        show_id = row["id"]
+        self.remove(show_id)
+        docs = []
+        for field_index, (field, _) in enumerate(SEARCH_FIELDS):
+            value = row.get(field)
+            if not value:
+                continue
+            text = normalize(str(value))
+            grams = trigrams(text)
+            if not grams:
+                continue
+            doc = len(self.doc_show)
+            self.doc_show.append(show_id)
+            self.doc_field.append(field_index)
+            self.doc_text.append(text)
+            self.alive.append(1)
+            for gram in grams:
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array("I")
+                posting.append(doc)
+            docs.append(doc)
+        self.show_docs[show_id] = docs
+        self.titles[show_id] = normalize(str(row.get("title") or ""))
+
+    def remove(self, show_id):
+        for doc in self.show_docs.pop(show_id, ()):
+            self.alive[doc] = 0
+        self.titles.pop(show_id, None)
+
+    def search(self, query: str):
+        """Return `[(score, show_id), ...]` best first."""
+        words = query.split()
+        if not words:
+            return []
+        word_grams = [_word_grams(word) for word in words]
+
+        # Candidates share enough trigrams with at least one query word to
+        # reach the typo threshold, or every interior trigram of it (which any
+        # field containing the word mid-word has).
+        candidates = set()
+        for word, grams in zip(words, word_grams):
+            counts = Counter()
+            for gram in grams:
+                posting = self.postings.get(gram)
+                if posting is not None:
+                    counts.update(posting)
+            needed = max(1, min(math.ceil(SHOW_SEARCH_MIN_OVERLAP * len(grams) / 2), len(word) - 2))
+            candidates.update(doc for doc, shared in counts.items() if shared >= needed)
+
+        best = {}
+        for doc in candidates:
+            if not self.alive[doc]:
+                continue
+            field, weight = SEARCH_FIELDS[self.doc_field[doc]]
+            score = weight * _match_score(query, words, word_grams, self.doc_text[doc])
+            show_id = self.doc_show[doc]
+            if score > best.get(show_id, 0.0):
+                best[show_id] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], self.titles.get(item[0], ""), item[0]))
+        return [(round(score, 4), show_id) for show_id, score in ranked]
+
+
+class ShowSearchIndex(ReloadingIndex):
+    """Ranked prefix, substring and typo-tolerant search over show names and contacts."""
+
+    def __init__(self, loader, max_age: float = SHOW_SEARCH_MAX_AGE):
+        super().__init__(loader, max_age)
+
+    def _new_snapshot(self):
+        return _SearchSnapshot()
+
+    def search(self, query: str):
+        """Return `[(score, show_id), ...]` best first, or None when no snapshot is available yet."""
+        query = normalize(query)
+        if self._current() is None:
+            return None
+        with self._lock:
+            self._queries += 1
+            return self._snapshot.search(query)
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            snapshot = self._snapshot
+            stats["shows"] = len(snapshot.show_docs) if snapshot else 0
+            stats["trigrams"] = len(snapshot.postings) if snapshot else 0
+        return stats
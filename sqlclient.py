@@ -1,7 +1,24 @@
 import pymysql
 import os
 import json
-from auth import get_password_hash
+import threading
+import time
+from enum import Enum
+import metrics
+from hashpool import hash_pool
+from usercache import user_cache
+from dbpool import ConnectionPool, PoolTimeoutError
+from fastjson import decode_json_columns
+from pagination import Keyset
+from projection import show_select_list
+from querycache import (
+    DB_SERVER_PREPARE, ER_UNKNOWN_STMT_HANDLER, compile_show_select, compile_show_update,
+    prepared_registry, prepared_steps, query_cache,
+)
+from replicas import DB_REPLICA_HOSTS, ReplicaSet, is_read_query, is_unavailable, is_write_query, note_write
+from revenue import revenue_query
+from showindex import ShowIndex, INDEXED_COLUMNS, SHOW_INDEX_ENABLED, SHOW_INDEX_MAX_IDS
+from showsearch import ShowSearchIndex, SEARCH_FIELDS
 from contextlib import contextmanager
 from pydantic import BaseModel
 from fastapi import Request
@@ -9,103 +26,577 @@ from fastapi.exceptions import RequestValidationError
 
 # --- Configuration ---
 DB_HOST = os.environ.get("DB_HOST", "127.0.0.1")
+DB_PORT = int(os.environ.get("DB_PORT", "3306"))
 DB_USER = os.environ.get("DB_USER", "root")
 DB_PASSWORD = os.environ.get("DB_PASSWORD", "rootpassword")
 DB_NAME = os.environ.get("DB_NAME", "evergreen")
 
+# Connection pool sizing; timeouts and ages are in seconds.
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "5"))
+DB_POOL_MAX_AGE = float(os.environ.get("DB_POOL_MAX_AGE", "1800"))
+DB_POOL_PING_AFTER = float(os.environ.get("DB_POOL_PING_AFTER", "5"))
+
+# Bulk show writes: most items accepted per request, and rows per executemany batch.
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", "1000"))
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", "200"))
+
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     print("Validation error:", exc.errors())
     return JSONResponse(status_code=422, content={"detail": exc.errors()})
 
-@contextmanager
-def get_db_connection():
-    connection = pymysql.connect(
-        host=DB_HOST,
+def _connect(host: str = DB_HOST, port: int = DB_PORT, **options):
+    # Pooled connections run in autocommit mode; multi-statement writes open
+    # their own transaction with `begin()` and the pool rolls back anything
+    # left open when a connection is returned. `options` (timeouts) go to pymysql.
+    return pymysql.connect(
+        host=host,
+        port=port,
         user=DB_USER,
         password=DB_PASSWORD,
         database=DB_NAME,
-        cursorclass=pymysql.cursors.DictCursor
+        autocommit=True,
+        cursorclass=pymysql.cursors.DictCursor,
+        **options
     )
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(
+                    _connect,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    max_age=DB_POOL_MAX_AGE,
+                    ping_after=DB_POOL_PING_AFTER,
+                )
+                try:
+                    pool.prefill()
+                except pymysql.Error as e:
+                    # The database may not be up yet; connections are opened lazily instead.
+                    print(f"Could not prefill connection pool: {e}")
+                _pool = pool
+    return _pool
+
+# Read replicas (see `replicas`); None when DB_REPLICA_HOSTS is empty.
+replicas = None
+if DB_REPLICA_HOSTS:
+    replicas = ReplicaSet(DB_REPLICA_HOSTS, DB_PORT, _connect, {
+        "min_size": 0,
+        "max_size": DB_POOL_MAX_SIZE,
+        "timeout": DB_POOL_TIMEOUT,
+        "max_age": DB_POOL_MAX_AGE,
+        "ping_after": DB_POOL_PING_AFTER,
+    })
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+    if replicas is not None:
+        replicas.close()
+
+@contextmanager
+def get_db_connection(replica=None):
+    """Check out a connection to the primary, or to `replica` if one is given."""
+    pool, label = (replica.pool, "replica") if replica is not None else (get_pool(), "sync")
+    started = time.perf_counter()
+    acquired = False
     try:
-        yield connection
-    finally:
-        connection.close()
+        with pool.connection() as connection:
+            acquired = True
+            metrics.DB_POOL_ACQUIRE_SECONDS.observe(time.perf_counter() - started, label)
+            yield connection
+    except PoolTimeoutError:
+        if not acquired:
+            metrics.DB_POOL_TIMEOUTS.inc(label)
+        raise
+
+def _execute_steps(cursor, steps) -> int:
+    for sql, args in steps:
+        rows_affected = cursor.execute(sql, args)
+    return rows_affected
+
+def _execute(cursor, query: str, params=None) -> int:
+    """`cursor.execute`, through a server-side prepared statement when `query`
+    is a compiled statement and DB_SERVER_PREPARE is on."""
+    compiled = query_cache.for_sql(query) if DB_SERVER_PREPARE else None
+    if compiled is None:
+        return cursor.execute(query, params)
+    registry = prepared_registry(cursor.connection)
+    try:
+        return _execute_steps(cursor, prepared_steps(registry, compiled, params))
+    except pymysql.Error as e:
+        # Prepare again next time rather than trust a statement that may not exist.
+        registry.pop(compiled.name, None)
+        if e.args[0] != ER_UNKNOWN_STMT_HANDLER:
+            raise
+    # The session lost its statements (e.g. the server restarted it); start over once.
+    registry.clear()
+    metrics.DB_PREPARED_STATEMENTS.inc("reprepare")
+    return _execute_steps(cursor, prepared_steps(registry, compiled, params))
+
+def _run(cursor, query: str, params=None, fetch: str = None):
+    """Execute one statement and fetch its result, recording it in `metrics`."""
+    started = time.perf_counter()
+    try:
+        rows_affected = _execute(cursor, query, params)
+        if fetch == 'one':
+            result = cursor.fetchone()
+        elif fetch == 'all':
+            result = cursor.fetchall()
+        else:
+            result = None
+    except pymysql.Error as e:
+        metrics.observe_query(query, time.perf_counter() - started, error=e)
+        raise
+    metrics.observe_query(query, time.perf_counter() - started, metrics.row_count(result, fetch, rows_affected))
+    return result, rows_affected
+
+def _run_many(cursor, query: str, rows) -> int:
+    started = time.perf_counter()
+    try:
+        rows_affected = cursor.executemany(query, rows)
+    except pymysql.Error as e:
+        metrics.observe_query(query, time.perf_counter() - started, error=e)
+        raise
+    metrics.observe_query(query, time.perf_counter() - started, rows_affected)
+    return rows_affected
+
+def build_show_query(filters: dict, keyset: Keyset = None, columns: tuple = None, ids: list = None):
+    """Build the SELECT for a show listing with equality filters, optional keyset
+    paging, an optional column projection and an optional primary-key list.
+
+    The SQL comes from `querycache`, so repeated shapes are not regenerated and
+    can run as server-side prepared statements.
+    """
+    compiled, values = compile_show_select(filters, keyset, columns, ids)
+    return compiled.sql, values
+
+# --- Show write observers ---
+# In-process structures derived from `shows` (see showindex) register here and
+# are told about every show write SqlClient commits.
+_show_observers = []
+
+def register_show_observer(observer):
+    _show_observers.append(observer)
+
+def notify_show_upserted(row: dict):
+    for observer in _show_observers:
+        observer.upsert(row)
+
+def notify_show_deleted(show_id: str):
+    for observer in _show_observers:
+        observer.remove(show_id)
+
+def show_column_values(data: dict) -> dict:
+    """Convert validated payload fields into values pymysql can bind to `shows` columns."""
+    row = {}
+    for key, value in data.items():
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, dict):
+            value = json.dumps(value)
+        row[key] = value
+    return row
+
+# Signs a user out everywhere: their refresh tokens can no longer be exchanged.
+REVOKE_REFRESH_TOKENS_SQL = "UPDATE refresh_tokens SET revoked_at = UTC_TIMESTAMP() WHERE user_id = %s AND revoked_at IS NULL"
+
+def _batches(items: list):
+    for start in range(0, len(items), BULK_BATCH_SIZE):
+        yield items[start:start + BULK_BATCH_SIZE]
+
+def _not_found(show_id):
+    return "not_found", f"Podcast with id {show_id} not found"
+
+class _BulkAborted(Exception):
+    """Raised inside a bulk transaction to roll it back without a database error."""
+
+# Errors caused by the data of a single row; anything else aborts the whole batch.
+_ROW_ERRORS = (pymysql.IntegrityError, pymysql.DataError)
+
+def _executemany_isolated(tx, sql: str, rows: list, atomic: bool) -> list:
+    """Run `sql` for every row in batches and return one error (or None) per row.
+
+    In atomic mode the first failure propagates so the caller can roll back.
+    Otherwise each batch runs under a savepoint; a failing batch is rolled back
+    to it and replayed row by row, so only the offending rows are skipped.
+    """
+    errors = [None] * len(rows)
+    for start in range(0, len(rows), BULK_BATCH_SIZE):
+        batch = rows[start:start + BULK_BATCH_SIZE]
+        if atomic:
+            tx.executemany(sql, batch)
+            continue
+        tx.execute("SAVEPOINT bulk_batch")
+        try:
+            tx.executemany(sql, batch)
+            continue
+        except _ROW_ERRORS:
+            tx.execute("ROLLBACK TO SAVEPOINT bulk_batch")
+        for offset, row in enumerate(batch):
+            tx.execute("SAVEPOINT bulk_row")
+            try:
+                tx.execute(sql, row)
+            except _ROW_ERRORS as e:
+                tx.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                errors[start + offset] = str(e)
+    return errors
+
+def _load_show_index_rows():
+    columns = ", ".join(f"`{column}`" for column in INDEXED_COLUMNS)
+    with get_db_connection() as db:
+        with db.cursor() as cursor:
+            rows, _ = _run(cursor, f"SELECT `id`, {columns} FROM shows", fetch='all')
+            return rows
+
+show_index = None
+if SHOW_INDEX_ENABLED:
+    show_index = ShowIndex(_load_show_index_rows)
+    register_show_observer(show_index)
+
+def _load_show_search_rows():
+    columns = ", ".join(f"`{field}`" for field, _ in SEARCH_FIELDS)
+    with get_db_connection() as db:
+        with db.cursor() as cursor:
+            rows, _ = _run(cursor, f"SELECT `id`, {columns} FROM shows", fetch='all')
+            return rows
+
+# Built lazily on the first search, so it costs nothing until used.
+show_search = ShowSearchIndex(_load_show_search_rows)
+register_show_observer(show_search)
+
+class UnitOfWork:
+    """Statements of one `SqlClient.transaction()`: one connection, one commit.
+
+    Errors propagate out of `execute` and roll the whole unit back. Work that
+    must only happen once the data is durable (observer notifications, cache
+    invalidation) is queued with `on_commit`.
+    """
+
+    def __init__(self, db, cursor):
+        self.db = db
+        self.cursor = cursor
+        self.wrote = False
+        self._on_commit = []
+
+    def execute(self, query: str, params=None, fetch: str = None):
+        """Run one statement and return `(result, rows_affected)`."""
+        if not self.wrote and is_write_query(query):
+            self.wrote = True
+        return _run(self.cursor, query, params, fetch)
+
+    def executemany(self, query: str, rows) -> int:
+        self.wrote = True
+        return _run_many(self.cursor, query, rows)
+
+    def on_commit(self, callback, *args):
+        self._on_commit.append((callback, args))
+
 
 class SqlClient:
     def _execute_query(self, query: str, params: tuple = None, fetch: str = None, is_transaction=False):
-        """Common function to execute SQL queries."""
+        """Common function to execute SQL queries.
+
+        Plain SELECTs go to a healthy read replica when there is one, and are
+        retried on the primary if the replica cannot be reached. Everything
+        else runs on the primary and keeps the client's reads there for a while.
+        """
+        read = not is_transaction and is_read_query(query)
+        if read and replicas is not None:
+            replica = replicas.choose()
+            if replica is not None:
+                try:
+                    with get_db_connection(replica) as db:
+                        with db.cursor() as cursor:
+                            result, rows_affected = _run(cursor, query, params, fetch)
+                            return result, rows_affected, None
+                except pymysql.Error as e:
+                    if not is_unavailable(e):
+                        return None, 0, e
+                    replicas.failed(replica, e)
         try:
             with get_db_connection() as db:
                 with db.cursor() as cursor:
-                    rows_affected = cursor.execute(query, params)
-                    if fetch == 'one':
-                        result = cursor.fetchone()
-                    elif fetch == 'all':
-                        result = cursor.fetchall()
-                    else:
-                        result = None
-                    
+                    result, rows_affected = _run(cursor, query, params, fetch)
+
                     if is_transaction:
                         db.commit()
+                    if is_transaction or is_write_query(query):
+                        note_write()
                     
                     return result, rows_affected, None
         except pymysql.Error as e:
             # In a real app, you'd want to log this error.
             return None, 0, e
 
-    def get_all_podcasts(self):
-        sql = "SELECT * FROM shows"
-        shows, _, error = self._execute_query(sql, fetch='all')
+    @contextmanager
+    def transaction(self):
+        """Run several statements on one pooled connection and commit them together.
+
+        Yields a `UnitOfWork`. Leaving the block normally commits; any
+        exception rolls back and propagates. `on_commit` callbacks run after
+        a successful commit, outside the transaction.
+        """
+        with get_db_connection() as db:
+            with db.cursor() as cursor:
+                started = time.perf_counter()
+                db.begin()
+                unit = UnitOfWork(db, cursor)
+                try:
+                    yield unit
+                    db.commit()
+                except BaseException:
+                    db.rollback()
+                    metrics.observe_transaction("rollback", time.perf_counter() - started)
+                    raise
+                metrics.observe_transaction("commit", time.perf_counter() - started)
+        if unit.wrote:
+            note_write()
+        for callback, args in unit._on_commit:
+            callback(*args)
+
+    def get_all_podcasts(self, keyset: Keyset = None, columns: tuple = None):
+        shows, error = self.filter_podcasts({}, keyset, columns)
         if error:
             return []
         return shows
 
-    def get_podcast_by_id(self, show_id: str):
-        sql = "SELECT * FROM shows WHERE id = %s"
+    def get_podcast_by_id(self, show_id: str, columns: tuple = None):
+        sql = f"SELECT {show_select_list(columns)} FROM shows WHERE id = %s"
         show, _, error = self._execute_query(sql, (show_id,), fetch='one')
         if error:
             return None, str(error)
-        return show, None
+        return decode_json_columns(show), None
+
+    def filter_podcasts(self, filters: dict, keyset: Keyset = None, columns: tuple = None):
+        # The bitmap index only narrows the candidates: it can be up to
+        # SHOW_INDEX_MAX_AGE behind writes made by other processes, so the
+        # filters themselves always stay in the query.
+        ids = None
+        paged = False
+        indexed = {k: v for k, v in filters.items() if k in INDEXED_COLUMNS and v is not None}
+        if show_index is not None and indexed:
+            try:
+                ids = show_index.match(indexed)
+            except pymysql.Error as e:
+                return None, e
+            if ids is not None:
+                if not ids:
+                    return [], None
+                unindexed = any(v is not None for k, v in filters.items() if k not in indexed)
+                if keyset is not None and keyset.column == "id" and not unindexed:
+                    # The index already holds the ids in order, so seek the page in memory.
+                    ids = keyset.slice_ids(ids)
+                    if not ids:
+                        return [], None
+                    paged = True
+                elif len(ids) > SHOW_INDEX_MAX_IDS:
+                    ids = None
+        query, values = build_show_query(filters, keyset, columns, ids)
+        results, _, error = self._execute_query(query, values, fetch='all')
+        if error:
+            return None, error
+        if paged and len(results) < len(ids):
+            # Some of the page no longer matches (a stale index), so the page
+            # would come up short and end paging early; ask MySQL instead.
+            query, values = build_show_query(filters, keyset, columns)
+            results, _, error = self._execute_query(query, values, fetch='all')
+            if error:
+                return None, error
+        return decode_json_columns(results), None
 
-    def filter_podcasts(self, filters: dict):
-        query = "SELECT * FROM shows"
-        where_clauses = []
-        values = []
+    def search_podcasts(self, query: str, limit: int, offset: int = 0, columns: tuple = None):
+        """Return up to `limit + 1` shows matching `query`, best match first, starting at `offset`."""
+        try:
+            ranked = show_search.search(query)
+        except pymysql.Error as e:
+            return None, e
+        if ranked is None:
+            # The index is still being built by another request; use a plain substring scan.
+            fields = [field for field, _ in SEARCH_FIELDS]
+            where = " OR ".join(f"`{field}` LIKE %s" for field in fields)
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            sql = (f"SELECT {show_select_list(columns)} FROM shows WHERE {where} "
+                   f"ORDER BY `title`, `id` LIMIT %s OFFSET %s")
+            results, _, error = self._execute_query(sql, (pattern,) * len(fields) + (limit + 1, offset), fetch='all')
+            if error:
+                return None, error
+            return decode_json_columns(results), None
 
-        for key, value in filters.items():
-            if value is not None:
-                # For boolean values, SQL expects 1 or 0
-                if isinstance(value, bool):
-                    value = 1 if value else 0
-                where_clauses.append(f"`{key}` = %s")
-                values.append(value)
+        ids = [show_id for _, show_id in ranked[offset:offset + limit + 1]]
+        if not ids:
+            return [], None
+        sql, values = build_show_query({}, columns=columns, ids=ids)
+        results, _, error = self._execute_query(sql, values, fetch='all')
+        if error:
+            return None, error
+        position = {show_id: i for i, show_id in enumerate(ids)}
+        # A show deleted by another process since the last reload simply drops out.
+        return sorted(decode_json_columns(results), key=lambda row: position[row["id"]]), None
+
+    def _bulk_write(self, statements: list, atomic: bool, precheck: bool = False):
+        """Apply `(sql, ids, rows)` statements to many shows in a single transaction.
+
+        Returns `(outcomes, error)` with one `(status, message)` pair per id, in
+        statement order; status is "ok", "failed", "not_found" or "rolled_back".
+        With `precheck`, ids missing from `shows` are reported as not found
+        instead of silently matching zero rows. Observers are told about every
+        written show once the transaction has committed.
+        """
+        all_ids = [show_id for _, ids, _ in statements for show_id in ids]
+        missing = set()
+        try:
+            with self.transaction() as tx:
+                if precheck:
+                    existing = set()
+                    for chunk in _batches(all_ids):
+                        placeholders = ", ".join(["%s"] * len(chunk))
+                        rows, _ = tx.execute(f"SELECT id FROM shows WHERE id IN ({placeholders}) FOR UPDATE", chunk, fetch='all')
+                        existing.update(row["id"] for row in rows)
+                    missing = set(all_ids) - existing
+                    if missing and atomic:
+                        raise _BulkAborted("Some podcasts were not found")
+
+                outcomes = []
+                for sql, ids, rows in statements:
+                    todo = [i for i, show_id in enumerate(ids) if show_id not in missing]
+                    written = _executemany_isolated(tx, sql, [rows[i] for i in todo], atomic)
+                    statement_outcomes = [_not_found(show_id) for show_id in ids]
+                    for i, error in zip(todo, written):
+                        statement_outcomes[i] = ("failed", error) if error else ("ok", None)
+                    outcomes.extend(statement_outcomes)
+
+                done = [show_id for show_id, (status, _) in zip(all_ids, outcomes) if status == "ok"]
+                for chunk in _batches(done):
+                    query, values = build_show_query({}, ids=chunk)
+                    rows, _ = tx.execute(query, values, fetch='all')
+                    for row in rows:
+                        tx.on_commit(notify_show_upserted, row)
+            return outcomes, None
+        except _BulkAborted as e:
+            return [_not_found(show_id) if show_id in missing else ("rolled_back", None) for show_id in all_ids], str(e)
+        except _ROW_ERRORS as e:
+            # Only reachable in atomic mode: nothing was written.
+            return [("rolled_back", None)] * len(all_ids), str(e)
+        except pymysql.Error as e:
+            return None, e
 
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
+    def bulk_create_podcasts(self, shows: list, atomic: bool = True):
+        """Insert many ShowCreate payloads with batched multi-row INSERTs.
 
-        results, _, error = self._execute_query(query, tuple(values), fetch='all')
-        if error:
+        Returns `(results, error)`, where `results[i]` is `{"id", "status", "error"}`
+        for `shows[i]`. In atomic mode any failure leaves the table untouched.
+        """
+        rows = []
+        for show_data in shows:
+            row = {"id": os.urandom(16).hex()}
+            row.update(show_column_values(show_data.model_dump()))
+            rows.append(row)
+        if not rows:
+            return [], None
+        columns = list(rows[0])
+        sql = (f"INSERT INTO shows ({', '.join(f'`{c}`' for c in columns)}) "
+               f"VALUES ({', '.join(['%s'] * len(columns))})")
+        ids = [row["id"] for row in rows]
+        outcomes, error = self._bulk_write([(sql, ids, [tuple(row.values()) for row in rows])], atomic)
+        if outcomes is None:
             return None, error
-        return results, None
+        return [{"id": show_id, "status": status, "error": message}
+                for show_id, (status, message) in zip(ids, outcomes)], error
+
+    def bulk_update_podcasts(self, updates: list, atomic: bool = True):
+        """Apply many partial updates, each `(show_id, ShowUpdate)`, in one transaction.
+
+        Updates setting the same fields share one statement. Returns
+        `(results, error)` like `bulk_create_podcasts`.
+        """
+        groups = {}
+        for index, (show_id, show_data) in enumerate(updates):
+            data = show_column_values(show_data.model_dump(exclude_unset=True))
+            if not data:
+                return None, "No update data provided"
+            compiled, values = compile_show_update(data)
+            groups.setdefault(compiled.sql, []).append((index, show_id, values + (show_id,)))
+
+        statements, order = [], []
+        for sql, items in groups.items():
+            statements.append((sql, [show_id for _, show_id, _ in items], [values for _, _, values in items]))
+            order.extend(index for index, _, _ in items)
+        if not statements:
+            return [], None
+
+        outcomes, error = self._bulk_write(statements, atomic, precheck=True)
+        if outcomes is None:
+            return None, error
+        results = [None] * len(updates)
+        for index, (status, message) in zip(order, outcomes):
+            results[index] = {"id": updates[index][0], "status": status, "error": message}
+        return results, error
+
+    def iter_podcasts(self, filters: dict, columns: tuple = None):
+        """Yield matching shows one at a time from an unbuffered server-side cursor.
+
+        Unlike the other methods this raises `pymysql.Error` instead of
+        returning it, since rows may already have been handed to the caller.
+        """
+        query, values = build_show_query(filters, columns=columns)
+        replica = replicas.choose() if replicas is not None else None
+        while True:
+            streaming = False
+            try:
+                with get_db_connection(replica) as db:
+                    cursor = db.cursor(pymysql.cursors.SSDictCursor)
+                    cursor.execute(query, values)
+                    streaming = True
+                    # If the consumer stops early the pool discards this connection,
+                    # so the cursor is deliberately not closed (which would drain every
+                    # remaining row) on that path.
+                    for row in cursor:
+                        yield decode_json_columns(row)
+                    cursor.close()
+                return
+            except pymysql.Error as e:
+                # Like `_execute_query`, retry on the primary if the replica
+                # cannot be reached, but only before any row went out.
+                if streaming or replica is None or not is_unavailable(e):
+                    raise
+                replicas.failed(replica, e)
+                replica = None
 
     def delete_user(self, user_id: str):
-        # First, delete any associations this user has with shows to maintain referential integrity.
-        unassociate_sql = "DELETE FROM show_partners WHERE partner_id = %s"
-        self._execute_query(unassociate_sql, (user_id,), is_transaction=True)
-        # We don't check for errors here, as the user may not have any associations.
-
-        # Then, delete the user.
-        delete_sql = "DELETE FROM users WHERE id = %s"
-        rows_affected, _, error = self._execute_query(delete_sql, (user_id,), is_transaction=True)
-        if error:
-            return False, str(error)
-        if rows_affected == 0:
-            return False, "User not found"
+        """Delete a user together with their partner record and show associations."""
+        try:
+            with self.transaction() as tx:
+                # Children first to maintain referential integrity; a user may have no partner record.
+                tx.execute(
+                    "DELETE sp FROM show_partners sp JOIN partners p ON sp.partner_id = p.id WHERE p.user_id = %s",
+                    (user_id,),
+                )
+                tx.execute("DELETE FROM partners WHERE user_id = %s", (user_id,))
+                tx.execute("DELETE FROM refresh_tokens WHERE user_id = %s", (user_id,))
+                _, rows_affected = tx.execute("DELETE FROM users WHERE id = %s", (user_id,))
+                if rows_affected == 0:
+                    return False, "User not found"
+                tx.on_commit(user_cache.invalidate_user, user_id)
+        except pymysql.Error as e:
+            return False, str(e)
         return True, None
 
     def unassociate_partner_from_show(self, show_id: str, partner_id: str):
         sql = "DELETE FROM show_partners WHERE show_id = %s AND partner_id = %s"
-        rows_affected, _, error = self._execute_query(sql, (show_id, partner_id), is_transaction=True)
+        _, rows_affected, error = self._execute_query(sql, (show_id, partner_id), is_transaction=True)
         if error:
             return False, str(error)
         if rows_affected == 0:
@@ -117,48 +608,48 @@ class SqlClient:
         # We check if any of the fields in the model have been set by the client.
         if not show_data.model_fields_set:
             return None, "No update data provided"
-        
-        update_data = show_data.model_dump(exclude_unset=True)
-
-        set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
-        sql_update = f"UPDATE shows SET {set_clause} WHERE id = %s"
-        values = list(update_data.values()) + [show_id]
 
-        _, rows_affected, error = self._execute_query(sql_update, tuple(values), is_transaction=True)
-        if error:
-            return None, str(error)
-        if rows_affected == 0:
-            return None, f"Podcast with id {show_id} not found"
+        update_data = show_column_values(show_data.model_dump(exclude_unset=True))
+        compiled, values = compile_show_update(update_data)
 
-        sql_select = "SELECT * FROM shows WHERE id = %s"
-        updated_show, _, error = self._execute_query(sql_select, (show_id,), fetch='one')
-        return updated_show, str(error) if error else None
+        try:
+            with self.transaction() as tx:
+                _, rows_affected = tx.execute(compiled.sql, values + (show_id,))
+                if rows_affected == 0:
+                    return None, f"Podcast with id {show_id} not found"
+                updated_show, _ = tx.execute("SELECT * FROM shows WHERE id = %s", (show_id,), fetch='one')
+                decode_json_columns(updated_show)
+                tx.on_commit(notify_show_upserted, updated_show)
+        except pymysql.Error as e:
+            return None, str(e)
+        return updated_show, None
 
     def delete_podcast(self, show_id: str):
-        # sql = "DELETE FROM demographic WHERE show_id = %s"
-        # _, rows_affected, error = self._execute_query(sql, (show_id,), is_transaction=True)
-        # if error:
-        #     return False, str(error)
-        # if rows_affected == 0:
-        #     return False, f"Podcast with id {show_id} not found"
-
-        
-        sql = "DELETE FROM shows WHERE id = %s"
-        _, rows_affected, error = self._execute_query(sql, (show_id,), is_transaction=True)
-        if error:
-            return False, str(error)
-        if rows_affected == 0:
-            return False, f"Podcast with id {show_id} not found"
+        # Associations and demographics belong to the show; ledger rows are
+        # financial records, so a show that has any cannot be deleted.
+        try:
+            with self.transaction() as tx:
+                tx.execute("DELETE FROM show_partners WHERE show_id = %s", (show_id,))
+                tx.execute("DELETE FROM demographic WHERE show_id = %s", (show_id,))
+                _, rows_affected = tx.execute("DELETE FROM shows WHERE id = %s", (show_id,))
+                if rows_affected == 0:
+                    return False, f"Podcast with id {show_id} not found"
+                tx.on_commit(notify_show_deleted, show_id)
+        except pymysql.Error as e:
+            return False, str(e)
         return True, None
 
     def update_password(self, user_id: str, new_password: str):
-        password_hash = get_password_hash(new_password)
-        sql = "UPDATE users SET password_hash = %s WHERE id = %s"
-        _, rows_affected, error = self._execute_query(sql, (password_hash, user_id), is_transaction=True)
-        if error:
-            return False, str(error)
-        if rows_affected == 0:
-            return False, f"User with id {user_id} not found"
+        password_hash = hash_pool.hash_sync(new_password)
+        try:
+            with self.transaction() as tx:
+                _, rows_affected = tx.execute("UPDATE users SET password_hash = %s WHERE id = %s", (password_hash, user_id))
+                if rows_affected == 0:
+                    return False, f"User with id {user_id} not found"
+                tx.execute(REVOKE_REFRESH_TOKENS_SQL, (user_id,))
+                tx.on_commit(user_cache.invalidate_user, user_id)
+        except pymysql.Error as e:
+            return False, str(e)
         return True, None
 
     def get_user_by_email(self, email: str):
@@ -173,7 +664,7 @@ class SqlClient:
 
     def create_partner(self, partner_data):
         user_id = os.urandom(16).hex()
-        password_hash = get_password_hash(partner_data.password)
+        password_hash = hash_pool.hash_sync(partner_data.password)
         partner_id = os.urandom(16).hex()
 
         sql_user = "INSERT INTO users (id, name, email, password_hash, role) VALUES (%s, %s, %s, %s, 'partner')"
@@ -181,14 +672,11 @@ class SqlClient:
         sql_select = "SELECT * FROM users WHERE id = %s"
 
         try:
-            with get_db_connection() as db:
-                with db.cursor() as cursor:
-                    cursor.execute(sql_user, (user_id, partner_data.name, partner_data.email, password_hash))
-                    cursor.execute(sql_partner, (partner_id, user_id))
-                    db.commit()
-                    cursor.execute(sql_select, (user_id,))
-                    new_user = cursor.fetchone()
-                    return new_user, None
+            with self.transaction() as tx:
+                tx.execute(sql_user, (user_id, partner_data.name, partner_data.email, password_hash))
+                tx.execute(sql_partner, (partner_id, user_id))
+                new_user, _ = tx.execute(sql_select, (user_id,), fetch='one')
+            return new_user, None
         except pymysql.IntegrityError:
             return None, f"Partner with email {partner_data.email} already exists."
         except pymysql.Error as e:
@@ -207,9 +695,72 @@ class SqlClient:
             
         return {"message": "Partner associated successfully", "show_id": show_id, "partner_id": partner_id}, None
 
-    def get_podcasts_for_partner(self, partner_id: str):
-        sql = """
-            SELECT s.* 
+    def update_partner_associations(self, add: list, remove: list):
+        """Add and remove many `(show_id, partner_id)` pairs in one transaction.
+
+        Removals are applied before additions, each as multi-row statements.
+        Returns `({"add": [...], "remove": [...]}, error)` with a status per
+        requested pair: "new", "already_present", "removed", "not_present" or
+        "invalid" (unknown show or partner).
+        """
+        pairs = list(dict.fromkeys(add + remove))
+        show_ids = list({show_id for show_id, _ in pairs})
+        partner_ids = list({partner_id for _, partner_id in pairs})
+        known_shows, known_partners, present = set(), set(), set()
+
+        def invalid(pair):
+            return pair[0] not in known_shows or pair[1] not in known_partners
+
+        try:
+            with self.transaction() as tx:
+                for chunk in _batches(show_ids):
+                    rows, _ = tx.execute(f"SELECT id FROM shows WHERE id IN ({', '.join(['%s'] * len(chunk))}) FOR SHARE", chunk, fetch='all')
+                    known_shows.update(row["id"] for row in rows)
+                for chunk in _batches(partner_ids):
+                    rows, _ = tx.execute(f"SELECT id FROM partners WHERE id IN ({', '.join(['%s'] * len(chunk))}) FOR SHARE", chunk, fetch='all')
+                    known_partners.update(row["id"] for row in rows)
+                for chunk in _batches([pair for pair in pairs if not invalid(pair)]):
+                    rows, _ = tx.execute(
+                        "SELECT show_id, partner_id FROM show_partners "
+                        f"WHERE (show_id, partner_id) IN ({', '.join(['(%s, %s)'] * len(chunk))}) FOR UPDATE",
+                        [value for pair in chunk for value in pair],
+                        fetch='all',
+                    )
+                    present.update((row["show_id"], row["partner_id"]) for row in rows)
+
+                to_remove = [pair for pair in dict.fromkeys(remove) if not invalid(pair) and pair in present]
+                for chunk in _batches(to_remove):
+                    tx.execute(
+                        f"DELETE FROM show_partners WHERE (show_id, partner_id) IN ({', '.join(['(%s, %s)'] * len(chunk))})",
+                        [value for pair in chunk for value in pair],
+                    )
+                remaining = present - set(to_remove)
+                to_add = [pair for pair in dict.fromkeys(add) if not invalid(pair) and pair not in remaining]
+                if to_add:
+                    tx.executemany(
+                        "INSERT INTO show_partners (id, show_id, partner_id) VALUES (%s, %s, %s)",
+                        [(os.urandom(16).hex(), show_id, partner_id) for show_id, partner_id in to_add],
+                    )
+        except pymysql.Error as e:
+            return None, e
+
+        def report(pair, status):
+            result = {"show_id": pair[0], "partner_id": pair[1], "status": status}
+            if pair[0] not in known_shows:
+                result.update(status="invalid", error=f"Show with id {pair[0]} not found")
+            elif pair[1] not in known_partners:
+                result.update(status="invalid", error=f"Partner with id {pair[1]} not found")
+            return result
+
+        added, removed = set(to_add), set(to_remove)
+        return {
+            "add": [report(pair, "new" if pair in added else "already_present") for pair in add],
+            "remove": [report(pair, "removed" if pair in removed else "not_present") for pair in remove],
+        }, None
+
+    def get_podcasts_for_partner(self, partner_id: str, columns: tuple = None):
+        sql = f"""
+            SELECT {show_select_list(columns, alias="s")}
             FROM shows s
             JOIN show_partners sp ON s.id = sp.show_id
             WHERE sp.partner_id = %s
@@ -217,65 +768,70 @@ class SqlClient:
         podcasts, _, error = self._execute_query(sql, (partner_id,), fetch='all')
         if error:
             return [], str(error)
-        return podcasts, None
+        return decode_json_columns(podcasts), None
 
-    def create_podcast(self, show_data):
+    def get_revenue(self, granularity: str, show_id: str = None, start=None, end=None, group_by: str = None):
+        """Revenue per period from the precomputed rollup, for one show or the whole portfolio."""
+        query, values = revenue_query(granularity, show_id, start, end, group_by)
+        rows, _, error = self._execute_query(query, values, fetch='all')
+        if error:
+            return None, error
+        return rows, None
+
+    def get_payout_inputs(self, start=None, end=None, partner_id: str = None):
+        """Read the ledger lines, split rules and show partners a payout run needs.
+
+        Everything is read in one transaction so the three agree. With
+        `partner_id`, only ledger lines of that partner's shows are read; the
+        shows' other partners are still returned since shares are split evenly.
+        """
+        where, values = ["payment_date IS NOT NULL"], []
+        if start is not None:
+            where.append("payment_date >= %s")
+            values.append(start)
+        if end is not None:
+            where.append("payment_date <= %s")
+            values.append(end)
+        if partner_id is not None:
+            where.append("show_id IN (SELECT show_id FROM show_partners WHERE partner_id = %s)")
+            values.append(partner_id)
         try:
-            print('in create function')
-            print(show_data)
-            # show_data.pop("annual_usd", None)
-            # keys = ["id","title","show_type","subnetwork_name","media_type"]
-
-            # keys = [
-            # "id", "title", "minimum_guarantee", "media_type", "tentpole", "relationship_level", "show_type",
-            # "evergreen_ownership_pct", "has_sponsorship_revenue", "has_non_evergreen_revenue", "requires_partner_access",
-            # "has_branded_revenue", "has_marketing_revenue", "has_web_mgmt_revenue", "genre_id", "is_original",
-            # "shows_per_year", "latest_cpm_usd", "ad_slots", "avg_show_length_mins", "start_date", "show_name_in_qbo",
-            # "side_bonus_percent", "youtube_ads_percent", "subscriptions_percent", "standard_ads_percent",
-            # "sponsorship_ad_fp_lead_percent", "sponsorship_ad_partner_lead_percent", "sponsorship_ad_partner_sold_percent",
-            # "programmatic_ads_span_percent", "merchandise_percent", "branded_revenue_percent",
-            # "marketing_services_revenue_percent", "direct_customer_hands_off_percent", "youtube_hands_off_percent",
-            # "subscription_hands_off_percent", "revenue_2023", "revenue_2024", "revenue_2025",
-            # "evergreen_production_staff_name", "show_host_contact", "show_primary_contact", "age_range", "gender",
-            # "region", "primary_education", "secondary_education", "genre_name", "subnetwork_name"
-            # ]
-
-
-
-            # show_dict = {key: None for key in keys}
-
-            # columns = ', '.join([f'`{k}`' for k in show_dict.keys()])
-            # print(columns)
-
-            show_id = os.urandom(16).hex()
-            show_dict = show_data.dict()
-            show_dict['id'] = show_id
-            show_dict.pop("annual_usd", None)
-            
-            show_dict.pop("subnetwork_id", None)
+            with self.transaction() as tx:
+                lines, _ = tx.execute(
+                    "SELECT show_id, payment_date, amount_received, advertiser_name FROM ledger_transaction "
+                    f"WHERE {' AND '.join(where)}",
+                    tuple(values),
+                    fetch='all',
+                )
+                rule_sql = "SELECT advertiser_name, split_type, partner_pct, evergreen_pct, effective_date FROM revenue_split"
+                if end is not None:
+                    rules, _ = tx.execute(rule_sql + " WHERE effective_date <= %s", (end,), fetch='all')
+                else:
+                    rules, _ = tx.execute(rule_sql, fetch='all')
+                links, _ = tx.execute("SELECT show_id, partner_id FROM show_partners", fetch='all')
+        except pymysql.Error as e:
+            return None, e
+        show_partners = {}
+        for link in links:
+            show_partners.setdefault(link["show_id"], set()).add(link["partner_id"])
+        return {"lines": lines, "rules": rules, "show_partners": show_partners}, None
 
-            # Handle JSON serializable fields
-            if 'annual_usd' in show_dict and show_dict['annual_usd'] is not None:
-                show_dict['annual_usd'] = json.dumps(show_dict['annual_usd'])
+    def create_podcast(self, show_data):
+        show_id = os.urandom(16).hex()
+        show_dict = {"id": show_id}
+        show_dict.update(show_column_values(show_data.model_dump()))
 
-            columns = ', '.join([f'`{k}`' for k in show_dict.keys()])
-            placeholders = ', '.join(['%s'] * len(show_dict))
-            sql = f"INSERT INTO shows ({columns}) VALUES ({placeholders})"
-            # sql=f"INSERT INTO shows (id,title) VALUES (1101,'test')"
-            values = tuple(show_dict.values())
-            print(sql)
-            # _, _, error = self._execute_query(sql, is_transaction=True)
+        columns = ', '.join([f'`{k}`' for k in show_dict.keys()])
+        placeholders = ', '.join(['%s'] * len(show_dict))
+        sql = f"INSERT INTO shows ({columns}) VALUES ({placeholders})"
 
-            _, _, error = self._execute_query(sql, values, is_transaction=True)
-            if error:
-                return None, error
-            show_id = '1101'
-            # Fetch the newly created show to return it
-            fetch_sql = "SELECT * FROM shows WHERE id = %s"
-            new_show, _, fetch_error = self._execute_query(fetch_sql, (show_id,), fetch='one')
-            if fetch_error:
-                return None, fetch_error
-
-            return new_show, None
-        except Exception as e:
-            print(e)
+        try:
+            with self.transaction() as tx:
+                tx.execute(sql, tuple(show_dict.values()))
+                # Read back on the same connection, inside the same transaction.
+                new_show, _ = tx.execute("SELECT * FROM shows WHERE id = %s", (show_id,), fetch='one')
+                decode_json_columns(new_show)
+                tx.on_commit(notify_show_upserted, new_show)
+        except pymysql.Error as e:
+            return None, e
+        return new_show, None
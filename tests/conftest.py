@@ -0,0 +1,62 @@
+import datetime
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+# The modules live at the repository root rather than in a package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def raw_show_row():
+    """A `shows` row as pymysql's DictCursor returns it: DECIMALs as Decimal,
+    TINYINT flags as ints, the JSON column as text, ENUMs as strings."""
+    return {
+        "id": "0f3c1a2b4d5e6f708192a3b4c5d6e7f8",
+        "title": "Invisible Choir",
+        "minimum_guarantee": Decimal("1500.50"),
+        "annual_usd": '{"2023": 1.0, "2024": 2500.25}',
+        "subnetwork_id": None,
+        "media_type": "audio",
+        "tentpole": 1,
+        "relationship_level": "strong",
+        "show_type": "Original",
+        "evergreen_ownership_pct": Decimal("0.35"),
+        "has_sponsorship_revenue": 0,
+        "has_non_evergreen_revenue": None,
+        "requires_partner_access": 1,
+        "has_branded_revenue": None,
+        "has_marketing_revenue": None,
+        "has_web_mgmt_revenue": None,
+        "genre_id": "g1",
+        "is_original": 1,
+        "shows_per_year": 52,
+        "latest_cpm_usd": Decimal("18.00"),
+        "ad_slots": 3,
+        "avg_show_length_mins": 45,
+        "start_date": datetime.date(2021, 3, 14),
+        "show_name_in_qbo": "Invisible Choir",
+        "side_bonus_percent": None,
+        "youtube_ads_percent": Decimal("0.10"),
+        "subscriptions_percent": None,
+        "standard_ads_percent": Decimal("0.50"),
+        "sponsorship_ad_fp_lead_percent": None,
+        "sponsorship_ad_partner_lead_percent": None,
+        "sponsorship_ad_partner_sold_percent": None,
+        "programmatic_ads_span_percent": None,
+        "merchandise_percent": None,
+        "branded_revenue_percent": None,
+        "marketing_services_revenue_percent": None,
+        "direct_customer_hands_off_percent": None,
+        "youtube_hands_off_percent": None,
+        "subscription_hands_off_percent": None,
+        "revenue_2023": Decimal("12000.00"),
+        "revenue_2024": None,
+        "revenue_2025": None,
+        "evergreen_production_staff_name": "Sam",
+        "show_host_contact": None,
+        "show_primary_contact": "host@example.com",
+        "row_version": 7,
+    }
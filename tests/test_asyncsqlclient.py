@@ -0,0 +1,46 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from asyncsqlclient import PURGE_EXPIRED_REFRESH_TOKENS_SQL, AsyncSqlClient
+
+
+class FakeTransaction:
+    """Records statements; SELECTs return `row`."""
+
+    def __init__(self, row=None):
+        self.row = row
+        self.statements = []
+
+    async def execute(self, query, params=None, fetch=None):
+        self.statements.append((query, params))
+        return (dict(self.row) if self.row and fetch else None), 1
+
+
+@pytest.fixture
+def client():
+    client = AsyncSqlClient()
+    client.tx = FakeTransaction()
+
+    @asynccontextmanager
+    async def transaction():
+        yield client.tx
+
+    client.transaction = transaction
+    return client
+
+
+def test_store_refresh_token_purges_expired_tokens(client):
+    stored, error = asyncio.run(client.store_refresh_token("u1", "hash", datetime.utcnow() + timedelta(days=30)))
+    assert (stored, error) == (True, None)
+    assert client.tx.statements[0] == (PURGE_EXPIRED_REFRESH_TOKENS_SQL, ("u1",))
+    assert client.tx.statements[1][0].startswith("INSERT INTO refresh_tokens")
+
+
+def test_rotate_refresh_token_purges_expired_tokens(client):
+    client.tx.row = {"id": "t1", "user_id": "u1", "expires_at": datetime.utcnow() + timedelta(days=1), "revoked_at": None}
+    user, error = asyncio.run(client.rotate_refresh_token("hash", "new-hash", datetime.utcnow() + timedelta(days=30)))
+    assert error is None
+    assert (PURGE_EXPIRED_REFRESH_TOKENS_SQL, ("u1",)) in client.tx.statements
@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+
+from export import EXPORT_CHUNK_ROWS, csv_chunks, ndjson_chunks
+from projection import SHOW_COLUMNS
+
+
+def _rows(raw_show_row, count):
+    rows = []
+    for i in range(count):
+        row = dict(raw_show_row, id=f"show{i:04d}")
+        if i % 2:
+            row["annual_usd"] = None
+        rows.append(row)
+    return rows
+
+
+def test_ndjson_export_with_annual_usd_completes(raw_show_row):
+    rows = _rows(raw_show_row, EXPORT_CHUNK_ROWS + 3)
+    body = b"".join(ndjson_chunks(iter(rows)))
+    lines = body.decode().splitlines()
+    assert len(lines) == len(rows)
+    first = json.loads(lines[0])
+    assert list(first) == list(SHOW_COLUMNS)
+    assert first["annual_usd"] == {"2023": 1.0, "2024": 2500.25}
+    assert first["tentpole"] is True
+    assert first["minimum_guarantee"] == 1500.5
+    assert first["start_date"] == "2021-03-14"
+    assert json.loads(lines[1])["annual_usd"] is None
+
+
+def test_ndjson_export_projection(raw_show_row):
+    body = b"".join(ndjson_chunks(iter([raw_show_row]), ("id", "annual_usd")))
+    assert json.loads(body) == {"id": raw_show_row["id"], "annual_usd": {"2023": 1.0, "2024": 2500.25}}
+
+
+def test_csv_export_with_annual_usd_completes(raw_show_row):
+    rows = _rows(raw_show_row, EXPORT_CHUNK_ROWS + 3)
+    body = b"".join(csv_chunks(iter(rows))).decode()
+    records = list(csv.DictReader(io.StringIO(body)))
+    assert len(records) == len(rows)
+    assert json.loads(records[0]["annual_usd"]) == {"2023": 1.0, "2024": 2500.25}
+    assert records[0]["tentpole"] == "true"
+    assert records[0]["start_date"] == "2021-03-14"
+    assert records[0]["media_type"] == "audio"
+    assert records[1]["annual_usd"] == ""
@@ -0,0 +1,64 @@
+import copy
+from decimal import Decimal
+
+import pytest
+from fastapi.responses import JSONResponse
+
+import fastjson
+from fastjson import decode_json_columns, encode_shows
+from models import Show
+from projection import partial_show_model
+
+PROJECTIONS = [
+    None,
+    ("id", "title"),
+    ("id", "minimum_guarantee", "annual_usd", "media_type", "tentpole", "start_date"),
+]
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(fastjson, "orjson", None)
+    elif fastjson.orjson is None:
+        pytest.skip("orjson is not installed")
+
+
+def empty_row(row):
+    """The same show with every nullable column NULL."""
+    nullable = {name for name, field in Show.model_fields.items() if field.default is None}
+    return {name: (None if name in nullable else value) for name, value in row.items()}
+
+
+def odd_row(row):
+    row = dict(row)
+    row.update(minimum_guarantee=Decimal("0.10"), latest_cpm_usd=Decimal("1E+2"),
+               annual_usd='{"2024": {"q1": [1, 2.5, null]}, "note": "caf\\u00e9"}', tentpole=0)
+    return row
+
+
+def exponent_row(row):
+    """Floats that orjson and the stdlib format differently."""
+    row = dict(row)
+    row.update(minimum_guarantee=Decimal("1E+16"), latest_cpm_usd=Decimal("0.00001"),
+               annual_usd='{"a": 1e-7, "b": 1e16, "c": [0.00001, -2.5e20]}')
+    return row
+
+
+def validated(row, columns):
+    """The row as the `response_model` path sent it: validated, dumped and rendered by JSONResponse."""
+    model = partial_show_model(columns) if columns else Show
+    return model.model_validate(decode_json_columns(copy.deepcopy(row))).model_dump(mode="json")
+
+
+@pytest.mark.parametrize("columns", PROJECTIONS)
+@pytest.mark.parametrize("make_row", [dict, empty_row, odd_row, exponent_row])
+def test_encode_shows_matches_response_model(encoder, raw_show_row, make_row, columns):
+    row = make_row(raw_show_row)
+    assert encode_shows(row, columns) == JSONResponse(validated(row, columns)).body
+
+
+@pytest.mark.parametrize("columns", PROJECTIONS)
+def test_encode_shows_list_matches_response_model(encoder, raw_show_row, columns):
+    rows = [raw_show_row, empty_row(raw_show_row), odd_row(raw_show_row), exponent_row(raw_show_row)]
+    assert encode_shows(rows, columns) == JSONResponse([validated(row, columns) for row in rows]).body
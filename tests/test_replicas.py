@@ -0,0 +1,59 @@
+import socket
+import threading
+import time
+
+import pymysql
+import pytest
+
+import replicas
+from replicas import ReplicaSet, is_unavailable
+from sqlclient import _connect
+
+
+@pytest.fixture
+def blackhole():
+    """A port that accepts connections but never sends a byte, like a hung server."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    accepted = []
+
+    def accept():
+        while True:
+            try:
+                accepted.append(server.accept()[0])
+            except OSError:
+                return
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield f"127.0.0.1:{server.getsockname()[1]}"
+    server.close()
+    for conn in accepted:
+        conn.close()
+
+
+@pytest.fixture
+def replica(blackhole, monkeypatch):
+    for name in ("DB_REPLICA_CONNECT_TIMEOUT", "DB_REPLICA_READ_TIMEOUT", "DB_REPLICA_CHECK_TIMEOUT"):
+        monkeypatch.setattr(replicas, name, 0.5)
+    replica_set = ReplicaSet([blackhole], 3306, _connect, {
+        "min_size": 0, "max_size": 2, "timeout": 1, "max_age": 60, "ping_after": 5,
+    })
+    yield replica_set.replicas[0]
+    replica_set.close()
+
+
+def test_check_gives_up_on_a_hung_replica(replica):
+    started = time.monotonic()
+    replica.check(5)
+    assert time.monotonic() - started < 3
+    assert not replica.healthy
+    assert replica.reason.startswith("unreachable")
+
+
+def test_read_connection_to_a_hung_replica_fails_as_unavailable(replica):
+    started = time.monotonic()
+    with pytest.raises(pymysql.Error) as raised:
+        replica.pool.acquire()
+    assert time.monotonic() - started < 3
+    assert is_unavailable(raised.value)
@@ -0,0 +1,57 @@
+import pytest
+
+from showsearch import _SearchSnapshot, normalize
+
+TITLES = {
+    "s1": "Invisible Choir",
+    "s2": "Murder in House Two",
+    "s3": "The Chad and Cheese Podcast",
+    "s4": "Choir Practice",
+    "s5": "Choirboys",
+    "s6": "Singing Choirs of America",
+}
+
+
+@pytest.fixture
+def snapshot():
+    snapshot = _SearchSnapshot()
+    for show_id, title in TITLES.items():
+        snapshot.upsert({"id": show_id, "title": title})
+    return snapshot
+
+
+def search(snapshot, query):
+    return snapshot.search(normalize(query))
+
+
+def test_mid_word_substring_matches(snapshot):
+    results = dict((show_id, score) for score, show_id in search(snapshot, "hoi"))
+    assert {"s1", "s4", "s5", "s6"} <= set(results)
+    assert "s2" not in results
+
+
+def test_exact_then_prefix_then_word_start_then_substring(snapshot):
+    ranked = [show_id for _, show_id in search(snapshot, "choir")]
+    assert ranked[:4] == ["s4", "s5", "s1", "s6"]
+    scores = [score for score, _ in search(snapshot, "choir practice")]
+    assert scores[0] == 1.0
+
+
+def test_multi_word_query_is_normalized_by_query_length(snapshot):
+    results = search(snapshot, "chad cheese")
+    assert results[0][1] == "s3"
+    assert results[0][0] >= 0.6
+    reordered = search(snapshot, "choir invisible")
+    assert reordered[0][1] == "s1"
+    assert reordered[0][0] >= 0.6
+
+
+def test_typos_still_match(snapshot):
+    results = search(snapshot, "Invisble Choir")
+    assert results[0][1] == "s1"
+    assert search(snapshot, "zzzz qqqq") == []
+
+
+def test_removed_show_is_not_returned(snapshot):
+    snapshot.remove("s1")
+    assert "s1" not in [show_id for _, show_id in search(snapshot, "invisible choir")]
@@ -0,0 +1,121 @@
+from contextlib import contextmanager
+
+import pymysql
+import pytest
+
+import sqlclient
+from models import Show, ShowCreate, ShowUpdate
+from sqlclient import SqlClient
+
+
+class FakeTransaction:
+    """Answers every SELECT with one stored row and counts other statements as one row changed."""
+
+    def __init__(self, row):
+        self.row = row
+        self.committed = []
+
+    def execute(self, query, params=None, fetch=None):
+        if query.lstrip().upper().startswith("SELECT"):
+            return dict(self.row), 1
+        return None, 1
+
+    def on_commit(self, callback, *args):
+        self.committed.append((callback, args))
+
+
+@pytest.fixture
+def client(raw_show_row):
+    client = SqlClient()
+    tx = FakeTransaction(raw_show_row)
+
+    @contextmanager
+    def transaction():
+        yield tx
+
+    client.transaction = transaction
+    return client
+
+
+def test_create_podcast_read_back_validates(client):
+    show, error = client.create_podcast(ShowCreate(title="Invisible Choir", annual_usd={"2024": 2500.25}))
+    assert error is None
+    assert Show.model_validate(show).annual_usd == {"2023": 1.0, "2024": 2500.25}
+
+
+def test_update_podcast_read_back_validates(client):
+    show, error = client.update_podcast("0f3c1a2b4d5e6f708192a3b4c5d6e7f8", ShowUpdate(title="Invisible Choir"))
+    assert error is None
+    assert Show.model_validate(show).annual_usd == {"2023": 1.0, "2024": 2500.25}
+
+
+class FakeReplicas:
+    def __init__(self):
+        self.replica = object()
+        self.failures = []
+
+    def choose(self):
+        return self.replica
+
+    def failed(self, replica, error):
+        self.failures.append((replica, error))
+
+
+class FakeCursor:
+    def __init__(self, rows, error=None):
+        self.rows = rows
+        self.error = error
+
+    def execute(self, query, params=None):
+        if self.error is not None:
+            raise self.error
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def close(self):
+        pass
+
+
+def fake_connections(monkeypatch, cursors):
+    """Route `get_db_connection(replica)` to the cursor for that replica (None for the primary)."""
+    opened = []
+
+    @contextmanager
+    def get_db_connection(replica=None):
+        opened.append(replica)
+        cursor = cursors[replica]
+
+        class Connection:
+            def cursor(self, cursorclass=None):
+                return cursor
+
+        yield Connection()
+
+    monkeypatch.setattr(sqlclient, "get_db_connection", get_db_connection)
+    return opened
+
+
+def test_iter_podcasts_falls_back_to_the_primary(monkeypatch, raw_show_row):
+    replicas = FakeReplicas()
+    monkeypatch.setattr(sqlclient, "replicas", replicas)
+    lost = pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+    opened = fake_connections(monkeypatch, {
+        replicas.replica: FakeCursor([], error=lost),
+        None: FakeCursor([dict(raw_show_row)]),
+    })
+    rows = list(SqlClient().iter_podcasts({}))
+    assert [row["id"] for row in rows] == [raw_show_row["id"]]
+    assert opened == [replicas.replica, None]
+    assert replicas.failures == [(replicas.replica, lost)]
+
+
+def test_iter_podcasts_does_not_retry_query_errors(monkeypatch):
+    replicas = FakeReplicas()
+    monkeypatch.setattr(sqlclient, "replicas", replicas)
+    bad = pymysql.err.ProgrammingError(1064, "You have an error in your SQL syntax")
+    opened = fake_connections(monkeypatch, {replicas.replica: FakeCursor([], error=bad)})
+    with pytest.raises(pymysql.err.ProgrammingError):
+        list(SqlClient().iter_podcasts({}))
+    assert opened == [replicas.replica]
+    assert replicas.failures == []
@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+from upload_data import iter_statements
+
+CHUNK_SIZES = [1, 3, 7, 1 << 20]
+
+
+def statements(script: bytes, chunk_size: int):
+    return [text for _, _, text in iter_statements(io.BytesIO(script), chunk_size=chunk_size)]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("delimiter", [b"//", b";;", b"$$"])
+def test_custom_delimiter(delimiter, chunk_size):
+    script = (
+        b"SET NAMES utf8mb4;\n"
+        b"DELIMITER " + delimiter + b"\n"
+        b"CREATE TRIGGER t BEFORE INSERT ON shows FOR EACH ROW\n"
+        b"BEGIN\n"
+        b"  SET NEW.title = CONCAT('a; b // c $$', NEW.title); -- not the end\n"
+        b"  SET NEW.row_version = 1 / 2;\n"
+        b"END" + delimiter + b"\n"
+        b"CREATE PROCEDURE p() SELECT 1" + delimiter + b"\n"
+        b"DELIMITER ;\n"
+        b"INSERT INTO shows VALUES ('x');\n"
+    )
+    result = statements(script, chunk_size)
+    assert len(result) == 4
+    assert result[0] == b"SET NAMES utf8mb4"
+    assert result[1].startswith(b"CREATE TRIGGER") and result[1].endswith(b"END")
+    assert b"CONCAT('a; b // c $$', NEW.title);" in result[1]
+    assert b"SET NEW.row_version = 1 / 2;" in result[1]
+    assert result[2] == b"CREATE PROCEDURE p() SELECT 1"
+    assert result[3] == b"INSERT INTO shows VALUES ('x')"
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_statement_offsets_cover_the_delimiter(chunk_size):
+    script = b"DELIMITER //\nSELECT 1//\nSELECT 2 // \n"
+    result = list(iter_statements(io.BytesIO(script), chunk_size=chunk_size))
+    assert [text for _, _, text in result] == [b"SELECT 1", b"SELECT 2"]
+    start, end, _ = result[0]
+    assert script[start:end] == b"SELECT 1//"
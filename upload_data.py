@@ -1,65 +1,435 @@
-import pymysql
+import argparse
 import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pymysql
 
 # --- Database Configuration ---
-# Values from docker-compose.yml
-DB_HOST = "127.0.0.1"  # Use localhost when running script from the host
-DB_USER = "root"
-DB_PASSWORD = "rootpassword"
-DB_NAME = "evergreen"
-DB_PORT = 3306
+# Defaults match docker-compose.yml when running the script from the host.
+DB_HOST = os.environ.get("DB_HOST", "127.0.0.1")
+DB_PORT = int(os.environ.get("DB_PORT", "3306"))
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "rootpassword")
+DB_NAME = os.environ.get("DB_NAME", "evergreen")
 SQL_DUMP_FILE = os.path.join(os.path.dirname(__file__), 'Dump20250719.sql')
 
+# --- Loader Configuration ---
+# Tables loaded at once, each on its own connection.
+UPLOAD_WORKERS = int(os.environ.get("UPLOAD_WORKERS", str(min(4, os.cpu_count() or 1))))
+# A table's INSERTs are committed in transactions of about this much SQL.
+UPLOAD_COMMIT_BYTES = int(os.environ.get("UPLOAD_COMMIT_BYTES", str(64 << 20)))
+UPLOAD_PROGRESS_SECONDS = float(os.environ.get("UPLOAD_PROGRESS_SECONDS", "5"))
+
+_CHUNK_SIZE = 1 << 20
+# Longest lookahead the scanner needs at a buffer boundary ("DELIMITER ").
+_LOOKAHEAD = 10
+
+_QUOTE_ENDS = {
+    ord("'"): re.compile(rb"[\\']"),
+    ord('"'): re.compile(rb'[\\"]'),
+    ord("`"): re.compile(rb"`"),
+}
+_NAME = rb"(?:`((?:[^`]|``)+)`|(\w+))"
+_DATA = re.compile(
+    rb"(?:INSERT|REPLACE)\s+(?:(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE)\s+)*INTO\s+" + _NAME, re.IGNORECASE,
+)
+_TABLE_DDL = re.compile(
+    rb"(?:DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?|CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?)" + _NAME, re.IGNORECASE,
+)
+_SET = re.compile(rb"(?:/\*!\d*\s*)?SET\s", re.IGNORECASE)
+# Table locks and MyISAM key toggles only serialize a parallel InnoDB load.
+_SKIP = re.compile(
+    rb"(?:UNLOCK\s+TABLES|LOCK\s+TABLES|/\*!\d*\s*ALTER\s+TABLE\s+\S+\s+(?:DISABLE|ENABLE)\s+KEYS)", re.IGNORECASE,
+)
+# Every worker connection loads with these, whatever the dump's header says.
+_WORKER_SESSION = (b"SET FOREIGN_KEY_CHECKS = 0", b"SET UNIQUE_CHECKS = 0")
+
+
+class DumpFormatError(ValueError):
+    """Raised when a SQL script cannot be split into statements."""
+
+
+# A whole quoted string or identifier, so most are skipped in a single match.
+_QUOTED = rb"""'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'|"[^"\\]*(?:(?:\\.|"")[^"\\]*)*"|`[^`]*(?:``[^`]*)*`"""
+
+
+def _normal_pattern(delimiter: bytes):
+    # Quoted text, the statement delimiter, bytes that may change the scanner's
+    # state and a DELIMITER command (which only counts at a statement start).
+    # The delimiter goes before the single bytes, or one starting with `/` or
+    # `-` (such as `//`) would never match as a whole.
+    return re.compile(_QUOTED + b"|" + re.escape(delimiter) + rb"|['\"`#/-]|(?i:DELIMITER)[ \t]", re.DOTALL)
+
+
+def iter_statements(stream, delimiter: bytes = b";", chunk_size: int = _CHUNK_SIZE):
+    """Yield `(start, end, statement)` for every statement in a binary SQL `stream`.
+
+    The script is read in chunks, so memory is bounded by the largest single
+    statement. Quoted strings and identifiers (with backslash and doubled-quote
+    escapes), `--`, `#` and `/* */` comments and `DELIMITER` commands are
+    handled; `/*! */` executable comments are kept. `start` and `end` are byte
+    offsets into the stream that cover the statement and its delimiter.
+    Structural bytes are ASCII, which UTF-8 never uses inside a multi-byte
+    character, so scanning raw bytes is safe.
+    """
+    buf = b""
+    base = 0          # stream offset of buf[0]
+    pos = 0           # next byte to scan
+    start = 0         # start of statement text not yet moved into `parts`
+    parts = []
+    statement_start = 0
+    state = None      # None, a quote byte, b"--" (line comment) or b"/*" (block comment)
+    normal = _normal_pattern(delimiter)
+    eof = False
+    starved = False   # the scanner cannot decide without more input
+
+    while True:
+        if (starved or pos >= len(buf) - _LOOKAHEAD) and not eof:
+            starved = False
+            # Keep the unfinished statement text, drop everything already consumed.
+            parts.append(buf[start:pos])
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            base += pos
+            start = pos = 0
+            continue
+
+        if state is None:
+            match = normal.search(buf, pos)
+            if match is None:
+                if not eof:
+                    pos = max(pos, len(buf) - _LOOKAHEAD)
+                    continue
+                text = (b"".join(parts) + buf[start:]).strip()
+                if text:
+                    yield statement_start, base + len(buf), text
+                return
+            i = match.start()
+            if max(i, match.end() - 1) > len(buf) - _LOOKAHEAD and not eof:
+                pos, starved = i, True  # decide once the bytes after it are buffered
+                continue
+            token = match.group()
+            if len(token) > 1 and token[0] in _QUOTE_ENDS:
+                pos = match.end()
+            elif token == delimiter:
+                parts.append(buf[start:i])
+                text = b"".join(parts).strip()
+                parts = []
+                pos = start = i + len(delimiter)
+                if text:
+                    yield statement_start, base + pos, text
+                statement_start = base + pos
+            elif token[0] in _QUOTE_ENDS:
+                # Runs past the buffered input; scan it piece by piece.
+                state = token[0]
+                pos = i + 1
+            elif token == b"#" or (token == b"-" and re.match(rb"--(?:\s|$)", buf[i:i + 3])):
+                parts.append(buf[start:i])
+                state = b"--"
+                pos = start = i
+            elif token == b"/" and buf[i + 1:i + 2] == b"*" and buf[i + 2:i + 3] not in (b"!", b"+"):
+                parts.append(buf[start:i] + b" ")
+                state = b"/*"
+                pos = start = i + 2
+            elif token[0:1].upper() == b"D" and not (b"".join(parts) + buf[start:i]).strip():
+                newline = buf.find(b"\n", i)
+                if newline < 0 and not eof:
+                    pos, starved = i, True
+                    continue
+                end = len(buf) if newline < 0 else newline + 1
+                new_delimiter = buf[match.end():end].strip()
+                if not new_delimiter:
+                    raise DumpFormatError(f"DELIMITER without a delimiter at byte {base + i}")
+                delimiter = new_delimiter
+                normal = _normal_pattern(delimiter)
+                parts = []
+                pos = start = end
+                statement_start = base + end
+            else:
+                pos = i + 1
+        elif state == b"--":
+            newline = buf.find(b"\n", pos)
+            if newline < 0:
+                pos = start = len(buf)
+                if eof:
+                    state = None
+                continue
+            # The newline stays in the statement text to keep tokens apart.
+            state = None
+            pos = start = newline
+        elif state == b"/*":
+            close = buf.find(b"*/", pos)
+            if close < 0:
+                if eof:
+                    raise DumpFormatError(f"Unterminated comment at byte {base + pos}")
+                pos = start = max(pos, len(buf) - 1)
+                continue
+            state = None
+            pos = start = close + 2
+        else:
+            match = _QUOTE_ENDS[state].search(buf, pos)
+            if match is None:
+                if eof:
+                    raise DumpFormatError(f"Unterminated quoted text near byte {base + pos}")
+                pos = len(buf)
+                continue
+            i = match.start()
+            if i + 2 > len(buf) and not eof:
+                pos, starved = i, True
+                continue
+            if buf[i] == ord("\\"):
+                pos = i + 2
+            elif buf[i + 1:i + 2] == bytes((state,)):
+                pos = i + 2  # doubled quote
+            else:
+                state = None
+                pos = i + 1
+
+
 def execute_sql_from_file(cursor, filepath):
     """
-    Reads a .sql file and executes the statements.
+    Executes every statement of a .sql file in order, skipping ones that fail.
     """
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-        # Split by semicolon followed by a newline, which is a common delimiter for dumps.
-        # This is more robust than splitting by just ';'.
-        commands = content.split(';\n')
-        for command in commands:
-            # Strip whitespace and skip empty commands.
-            command = command.strip()
-            if command:
-                try:
-                    cursor.execute(command)
-                except pymysql.MySQLError as e:
-                    print(f"Skipping statement due to error: {e}\nStatement: '{command[:100]}...'\n")
+    with open(filepath, "rb") as f:
+        for _, _, statement in iter_statements(f):
+            try:
+                cursor.execute(statement)
+            except pymysql.MySQLError as e:
+                print(f"Skipping statement due to error: {e}\nStatement: '{statement[:100].decode(errors='replace')}...'\n")
+
+
+def _connect():
+    return pymysql.connect(host=DB_HOST,
+                           user=DB_USER,
+                           password=DB_PASSWORD,
+                           database=DB_NAME,
+                           port=DB_PORT,
+                           charset='utf8mb4',
+                           max_allowed_packet=1 << 30,
+                           cursorclass=pymysql.cursors.DictCursor)
+
+
+def _name(match) -> str:
+    quoted, bare = match.group(1), match.group(2)
+    return (quoted.replace(b"``", b"`") if quoted is not None else bare).decode()
+
+
+class _Range:
+    """Read-only view of `size` bytes of an open file from its current position."""
+
+    def __init__(self, f, size: int):
+        self.f = f
+        self.remaining = size
+
+    def read(self, n: int) -> bytes:
+        data = self.f.read(min(n, self.remaining)) if self.remaining > 0 else b""
+        self.remaining -= len(data)
+        return data
+
 
-def upload_data_from_dump():
+def apply_schema(path: str, conn, resume_from: str = None):
+    """First pass: run everything except table data, in dump order, on `conn`.
+
+    Returns `(session, tables)`: the session settings from the dump's header
+    (to replay on every loader connection) and, per table in dump order, the
+    byte ranges holding its INSERTs. With `resume_from`, tables before it in
+    the dump are left untouched.
     """
-    Connects to the database and executes the SQL statements from the dump file.
+    session, tables = [], {}
+    in_header = True
+    resumed = resume_from is None
+    skipped = set()
+    with open(path, "rb") as f, conn.cursor() as cursor:
+        for start, end, statement in iter_statements(f):
+            if _SKIP.match(statement):
+                continue
+            data = _DATA.match(statement)
+            if data is not None:
+                in_header = False
+                table = _name(data)
+                if table in skipped:
+                    continue
+                ranges = tables.setdefault(table, [])
+                if ranges and ranges[-1][1] == start:
+                    ranges[-1][1] = end
+                else:
+                    ranges.append([start, end])
+                continue
+            if _SET.match(statement):
+                if in_header:
+                    session.append(statement)
+            else:
+                in_header = False
+                ddl = _TABLE_DDL.match(statement)
+                if ddl is not None and not resumed:
+                    if _name(ddl) != resume_from:
+                        skipped.add(_name(ddl))
+                        continue
+                    resumed = True
+            cursor.execute(statement)
+    conn.commit()
+    if not resumed:
+        raise DumpFormatError(f"Table '{resume_from}' does not appear in {path}")
+    return session, tables
+
+
+class _Progress:
+    def __init__(self, total_bytes: int, tables: int):
+        self.total_bytes = total_bytes
+        self.tables = tables
+        self.done_bytes = 0
+        self.rows = 0
+        self.tables_done = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, rows: int, nbytes: int):
+        with self._lock:
+            self.rows += rows
+            self.done_bytes += nbytes
+
+    def table_done(self):
+        with self._lock:
+            self.tables_done += 1
+
+    def line(self) -> str:
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            pct = self.done_bytes / self.total_bytes * 100 if self.total_bytes else 100.0
+            rate = self.rows / elapsed if elapsed else 0.0
+            return (f"[{elapsed:7.1f}s] {pct:5.1f}%  {self.rows:,} rows  {rate:,.0f} rows/s  "
+                    f"{self.tables_done}/{self.tables} tables")
+
+
+def _load_table(path: str, table: str, ranges: list, session: list, connect, commit_bytes: int, progress: _Progress) -> dict:
+    """Second pass for one table: replay its INSERTs in large transactions on a fresh connection."""
+    started = time.perf_counter()
+    rows = 0
+    conn = connect()
+    try:
+        with conn.cursor() as cursor, open(path, "rb") as f:
+            for statement in list(session) + list(_WORKER_SESSION):
+                cursor.execute(statement)
+            conn.begin()
+            pending = 0
+            for start, end in ranges:
+                f.seek(start)
+                done = 0
+                for _, stmt_end, statement in iter_statements(_Range(f, end - start)):
+                    count = cursor.execute(statement)
+                    rows += count
+                    pending += len(statement)
+                    progress.add(count, stmt_end - done)
+                    done = stmt_end
+                    if pending >= commit_bytes:
+                        conn.commit()
+                        conn.begin()
+                        pending = 0
+            conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        progress.table_done()
+    seconds = time.perf_counter() - started
+    return {"rows": rows, "seconds": round(seconds, 3), "rows_per_second": round(rows / seconds, 1) if seconds else None}
+
+
+def load_dump(path: str = SQL_DUMP_FILE, connect=_connect, workers: int = UPLOAD_WORKERS,
+              commit_bytes: int = UPLOAD_COMMIT_BYTES, resume_from: str = None, report=print) -> dict:
+    """Load a mysqldump file: all DDL first, then every table's data in parallel.
+
+    Returns `{"tables": {name: stats or {"error": ...}}, "rows", "seconds",
+    "rows_per_second"}`. A table that fails is rolled back to its last commit
+    and the others carry on; re-run with `resume_from` to reload from it.
     """
-    conn = None
+    started = time.perf_counter()
+    conn = connect()
     try:
-        # Establish a connection to the database
-        conn = pymysql.connect(host=DB_HOST,
-                               user=DB_USER,
-                               password=DB_PASSWORD,
-                               database=DB_NAME,
-                               port=DB_PORT,
-                               charset='utf8mb4',
-                               cursorclass=pymysql.cursors.DictCursor)
-
-        print(f"Successfully connected to database '{DB_NAME}' at {DB_HOST}:{DB_PORT}.")
-
-        with conn.cursor() as cursor:
-            print(f"Executing SQL dump file: {SQL_DUMP_FILE}")
-            execute_sql_from_file(cursor, SQL_DUMP_FILE)
-
-        conn.commit()
-        print("\nData upload process completed successfully.")
-
-    except pymysql.MySQLError as e:
-        print(f"Database operation failed: {e}")
-    except FileNotFoundError:
-        print(f"Error: SQL dump file not found at {SQL_DUMP_FILE}")
+        session, tables = apply_schema(path, conn, resume_from)
     finally:
-        if conn:
-            conn.close()
-            print("Database connection closed.")
+        conn.close()
+    total_bytes = sum(end - start for ranges in tables.values() for start, end in ranges)
+    report(f"Schema applied; loading {total_bytes / (1 << 20):,.1f} MiB of data into {len(tables)} tables "
+           f"with {workers} workers...")
+
+    progress = _Progress(total_bytes, len(tables))
+    stop = threading.Event()
+
+    def report_progress():
+        while not stop.wait(UPLOAD_PROGRESS_SECONDS):
+            report(progress.line())
+
+    reporter = threading.Thread(target=report_progress, daemon=True)
+    reporter.start()
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="loader") as pool:
+            # Biggest tables first, so one large table does not start last and finish alone.
+            order = sorted(tables, key=lambda t: -sum(end - start for start, end in tables[t]))
+            futures = {
+                table: pool.submit(_load_table, path, table, tables[table], session, connect, commit_bytes, progress)
+                for table in order
+            }
+            for table in tables:  # dump order
+                try:
+                    results[table] = futures[table].result()
+                except pymysql.MySQLError as e:
+                    results[table] = {"error": str(e)}
+    finally:
+        stop.set()
+        reporter.join()
+    report(progress.line())
+
+    seconds = time.perf_counter() - started
+    return {
+        "tables": results,
+        "rows": progress.rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(progress.rows / seconds, 1) if seconds else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load a mysqldump file into the database.")
+    parser.add_argument("path", nargs="?", default=SQL_DUMP_FILE, help="dump file (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=UPLOAD_WORKERS, help="tables loaded in parallel")
+    parser.add_argument("--commit-bytes", type=int, default=UPLOAD_COMMIT_BYTES,
+                        help="commit a table's INSERTs every this many bytes of SQL")
+    parser.add_argument("--resume-from", metavar="TABLE",
+                        help="leave tables before TABLE alone; recreate and reload TABLE and every table after it")
+    args = parser.parse_args(argv)
+
+    print(f"Loading {args.path} into '{DB_NAME}' at {DB_HOST}:{DB_PORT}.")
+    try:
+        summary = load_dump(args.path, workers=args.workers, commit_bytes=args.commit_bytes,
+                            resume_from=args.resume_from)
+    except (pymysql.MySQLError, DumpFormatError) as e:
+        print(f"Database operation failed: {e}", file=sys.stderr)
+        return 1
+    except FileNotFoundError:
+        print(f"Error: SQL dump file not found at {args.path}", file=sys.stderr)
+        return 1
+
+    failed = [table for table, stats in summary["tables"].items() if "error" in stats]
+    for table, stats in summary["tables"].items():
+        if "error" in stats:
+            print(f"  {table:<32} FAILED: {stats['error']}")
+        else:
+            print(f"  {table:<32} {stats['rows']:>12,} rows  {stats['seconds']:>8.1f}s  {stats['rows_per_second'] or 0:>12,.0f} rows/s")
+    print(f"Loaded {summary['rows']:,} rows in {summary['seconds']:.1f}s ({summary['rows_per_second'] or 0:,.0f} rows/s).")
+    if failed:
+        print(f"{len(failed)} table(s) failed; fix the cause and re-run with --resume-from {failed[0]}", file=sys.stderr)
+        return 1
+    return 0
+
 
 if __name__ == "__main__":
-    upload_data_from_dump()
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- Configuration ---
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "60"))
+USER_CACHE_MAX_SIZE = int(os.environ.get("USER_CACHE_MAX_SIZE", "10000"))
+
+
+class TTLCache:
+    """A thread-safe LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, expires_at: float = None):
+        """Store `value`; it expires after the TTL or at `expires_at`, whichever is sooner."""
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        if deadline <= time.time():
+            return
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[0] if entry else None
+
+    def pop_matching(self, predicate) -> int:
+        """Drop every entry whose value satisfies `predicate`; returns how many were dropped."""
+        with self._lock:
+            keys = [key for key, (value, _) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "max_size": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class UserCache:
+    """Caches decoded token claims (by token) and user rows (by email).
+
+    Entries never outlive the `exp` claim of the token that produced them, and
+    `invalidate_user` drops a user's row as soon as it changes in the database.
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_MAX_SIZE, ttl: float = USER_CACHE_TTL):
+        self.claims = TTLCache(maxsize, ttl)
+        self.users = TTLCache(maxsize, ttl)
+
+    def get_claims(self, token: str):
+        return self.claims.get(token)
+
+    def set_claims(self, token: str, claims: dict):
+        self.claims.set(token, claims, expires_at=claims.get("exp"))
+
+    def get_user(self, email: str):
+        return self.users.get(email)
+
+    def set_user(self, user: dict, expires_at: float = None):
+        self.users.set(user["email"], user, expires_at=expires_at)
+
+    def invalidate_user(self, user_id: str = None, email: str = None):
+        if user_id is not None:
+            # Rows are keyed by email; invalidations are rare enough (password
+            # changes, deletions) that finding the row by id is a plain scan.
+            self.users.pop_matching(lambda user: user["id"] == user_id)
+        if email is not None:
+            self.users.pop(email)
+
+    def clear(self):
+        self.claims.clear()
+        self.users.clear()
+
+    def stats(self):
+        return {"claims": self.claims.stats(), "users": self.users.stats()}
+
+
+user_cache = UserCache()